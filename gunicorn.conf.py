@@ -0,0 +1,18 @@
+import os
+
+
+def pre_fork(server, worker):
+    """Give the new worker the lowest order-number index no live worker holds."""
+    taken = {getattr(live, 'order_number_index', None) for live in server.WORKERS.values()}
+    worker.order_number_index = next(index for index in range(len(taken) + 1) if index not in taken)
+
+
+def post_fork(server, worker):
+    # Read by orders.numbers; added to ORDER_NUMBER_WORKER_BASE to form the worker id.
+    os.environ['ORDER_NUMBER_WORKER_INDEX'] = str(worker.order_number_index)
+
+
+def post_worker_init(worker):
+    """Warm per-process in-memory indexes before the worker takes traffic."""
+    from products.facets import warm_up
+    warm_up()
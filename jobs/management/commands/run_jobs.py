@@ -0,0 +1,64 @@
+import os
+import signal
+import traceback
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs from the database queue until stopped (SIGINT/SIGTERM finish running jobs first). '
+        'On SQLite jobs run one at a time: its single writer lock makes concurrent read-then-write tasks '
+        'fail with "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help='Jobs run at once per process (default 4; 1 on SQLite).')
+        parser.add_argument('--processes', type=int, help='Worker processes to fork (default 1).')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no jobs are ready.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            if (options['threads'] or 1) > 1 or (options['processes'] or 1) > 1:
+                self.stderr.write(self.style.WARNING('SQLite allows one writer at a time; running jobs serially.'))
+            options['threads'] = options['processes'] = 1
+        options['threads'] = options['threads'] or 4
+        options['processes'] = options['processes'] or 1
+
+        if options['processes'] <= 1:
+            processed = self.make_worker(options).run()
+            self.stdout.write(self.style.SUCCESS(f'Worker {os.getpid()} stopped after {processed} jobs.'))
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        children = []
+        for _ in range(options['processes']):
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    self.make_worker(options).run()
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os._exit(code)
+            children.append(pid)
+
+        def forward(signum, frame):
+            for pid in children:
+                os.kill(pid, signum)
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        for pid in children:
+            os.waitpid(pid, 0)
+        self.stdout.write(self.style.SUCCESS(f'{len(children)} worker processes stopped.'))
+
+    def make_worker(self, options):
+        return Worker(threads=options['threads'], poll_interval=options['poll_interval'], burst=options['burst'])
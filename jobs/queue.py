@@ -0,0 +1,159 @@
+"""A small job queue kept in the application database.
+
+Request handlers ``enqueue`` work and return straight away.  Because the
+job row is written in the caller's transaction, a job exists exactly when
+the change that asked for it was committed.  Workers (``manage.py
+run_jobs``) claim ready jobs in batches.  On PostgreSQL they use ``SELECT
+... FOR UPDATE SKIP LOCKED`` so workers never wait on each other; on
+SQLite a single ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)`` claims
+under the database write lock instead.  Failed jobs are retried with
+exponential backoff until ``max_attempts``.  Jobs left running by a dead
+worker are requeued after ``JOB_LOCK_TIMEOUT``.
+
+Tasks are plain functions registered with ``@task`` in an app's
+``tasks.py``; they take JSON-serialisable keyword arguments and should be
+safe to run more than once.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register ``func`` as a task; ``func.enqueue(**kwargs)`` queues a call to it."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = func
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+
+        def enqueue_call(_run_at=None, _delay=None, _idempotency_key=None, **kwargs):
+            enqueue(func, kwargs, run_at=_run_at, delay=_delay, idempotency_key=_idempotency_key)
+
+        func.enqueue = enqueue_call
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(func, kwargs=None, run_at=None, delay=None, idempotency_key=None, max_attempts=None):
+    """Queue a call to ``func`` (a task or its registered name).
+
+    ``run_at`` or ``delay`` (seconds) schedules it for later.  When a job
+    with the same ``idempotency_key`` already exists nothing new is queued.
+    """
+    name = getattr(func, 'task_name', func)
+    if name not in registry:
+        raise ValueError(f'Unknown task: {name}.')
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    job = Job(
+        name=name,
+        payload=kwargs or {},
+        run_at=run_at,
+        max_attempts=max_attempts or getattr(registry[name], 'max_attempts', None) or settings.JOB_MAX_ATTEMPTS,
+        idempotency_key=idempotency_key,
+    )
+    # ignore_conflicts skips duplicates without a savepoint round trip inside the caller's transaction.
+    Job.objects.bulk_create([job], ignore_conflicts=idempotency_key is not None)
+
+
+def claim(worker_id, limit):
+    """Mark up to ``limit`` ready jobs as running for ``worker_id`` and return them."""
+    token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    now = timezone.now()
+    ready = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+    changes = {'status': 'running', 'locked_by': token, 'locked_at': now, 'attempts': F('attempts') + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            if not ids:
+                return []
+            Job.objects.filter(pk__in=ids).update(**changes)
+    else:
+        # SQLite: one UPDATE ... WHERE id IN (SELECT ... LIMIT n) statement runs under the
+        # database write lock, so concurrent workers queue up instead of taking the same jobs.
+        # A read-then-write transaction would fail with "database is locked" instead.
+        if not Job.objects.filter(pk__in=Subquery(ready.values('pk')[:limit]), status='queued').update(**changes):
+            return []
+    return list(Job.objects.filter(locked_by=token, status='running').order_by('run_at', 'id'))
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``, with jitter so retries don't bunch up."""
+    delay = min(settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome; returns whether it succeeded."""
+    try:
+        func = registry[job.name]
+    except KeyError:
+        _finish(job, 'failed', f'Unknown task: {job.name}.')
+        return False
+    try:
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            logger.warning('Job %s failed (attempt %s of %s), retrying in %.0fs', job, job.attempts, job.max_attempts, delay)
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                status='queued', run_at=timezone.now() + timedelta(seconds=delay), last_error=error,
+                locked_by='', locked_at=None,
+            )
+        else:
+            logger.error('Job %s failed for good after %s attempts', job, job.attempts)
+            _finish(job, 'failed', error)
+        return False
+    _finish(job, 'succeeded')
+    return True
+
+
+def _finish(job, status, error=''):
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=status, last_error=error, finished_at=timezone.now(), locked_by='', locked_at=None
+    )
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs whose worker has held them longer than ``timeout`` seconds, presumably dead."""
+    cutoff = timezone.now() - timedelta(seconds=timeout or settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', last_error='Worker lost while running the job.', finished_at=timezone.now(),
+        locked_by='', locked_at=None,
+    )
+    return failed + stale.update(status='queued', locked_by='', locked_at=None)
+
+
+def purge_finished(max_age=None):
+    """Delete succeeded jobs older than ``max_age`` seconds; failed ones stay for inspection."""
+    cutoff = timezone.now() - timedelta(seconds=max_age or settings.JOB_RETENTION)
+    return Job.objects.filter(status='succeeded', finished_at__lt=cutoff).delete()[0]
+
+
+def enqueue_periodic(now=None):
+    """Queue the current run of every task in ``JOB_SCHEDULE`` (``{task name: interval seconds}``).
+
+    The idempotency key names the interval slot, so any number of workers
+    calling this queue each run once.
+    """
+    now = now or timezone.now()
+    for name, interval in settings.JOB_SCHEDULE.items():
+        slot = int(now.timestamp() // interval)
+        enqueue(name, run_at=now, idempotency_key=f'periodic:{name}:{slot}')
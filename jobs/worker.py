@@ -0,0 +1,86 @@
+"""The polling loop behind ``manage.py run_jobs``."""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, close_old_connections, connection
+
+from .queue import claim, enqueue_periodic, purge_finished, requeue_stale, run_job
+
+logger = logging.getLogger(__name__)
+
+HOUSEKEEPING_INTERVAL = 30
+
+
+class Worker:
+    """Claims jobs in batches and runs them on a pool of threads."""
+
+    def __init__(self, threads=4, poll_interval=1.0, burst=False):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._last_housekeeping = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as pool:
+            while not self.stopping.is_set():
+                self.housekeeping()
+                free = self.threads - self._inflight
+                try:
+                    jobs = claim(self.worker_id, free) if free > 0 else []
+                except DatabaseError:
+                    logger.exception('Could not claim jobs')
+                    close_old_connections()
+                    jobs = []
+                for job in jobs:
+                    with self._lock:
+                        self._inflight += 1
+                    pool.submit(self.execute, job)
+                if not jobs:
+                    if self.burst and not self._inflight:
+                        break
+                    self.stopping.wait(self.poll_interval)
+        # Leaving the with block waits for running jobs to finish.
+        connection.close()
+        return self.processed
+
+    def execute(self, job):
+        close_old_connections()
+        try:
+            run_job(job)
+        except Exception:
+            # Recording the outcome failed (e.g. the database went away); the lock timeout requeues it.
+            logger.exception('Could not record the outcome of job %s', job)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._inflight -= 1
+                self.processed += 1
+
+    def housekeeping(self):
+        now = time.monotonic()
+        if now - self._last_housekeeping < HOUSEKEEPING_INTERVAL:
+            return
+        self._last_housekeeping = now
+        try:
+            enqueue_periodic()
+            requeued = requeue_stale()
+            if requeued:
+                logger.warning('Requeued %s jobs from lost workers', requeued)
+            purge_finished()
+        except Exception:
+            logger.exception('Job queue housekeeping failed')
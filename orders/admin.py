@@ -0,0 +1,49 @@
+from django.contrib import admin, messages
+
+from .models import Order, OrderItem, OrderStatusUpdate
+from .transitions import STATUS_LABELS, TIMESTAMPS, TRANSITIONS, transition_orders
+
+
+def _transition_action(target):
+    @admin.action(description=f'Mark selected orders as {STATUS_LABELS[target].lower()}', permissions=['change'])
+    def action(modeladmin, request, queryset):
+        result = transition_orders(queryset, target, user=request.user, notes='Bulk update from the admin.')
+        if result['updated']:
+            modeladmin.message_user(
+                request, f"{len(result['updated'])} orders marked as {STATUS_LABELS[target].lower()}.", messages.SUCCESS
+            )
+        if result['rejected']:
+            sample = ', '.join(f"{row['order_number']} ({row['reason']})" for row in result['rejected'][:10])
+            more = len(result['rejected']) - 10
+            modeladmin.message_user(
+                request,
+                f"{len(result['rejected'])} orders skipped: {sample}{f' and {more} more' if more > 0 else ''}",
+                messages.WARNING,
+            )
+
+    action.__name__ = f'mark_{target}'
+    return action
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ['product', 'product_name', 'product_sku', 'color', 'quantity', 'unit_price', 'line_total']
+
+
+class OrderStatusUpdateInline(admin.TabularInline):
+    model = OrderStatusUpdate
+    extra = 0
+    readonly_fields = ['status', 'notes', 'created_at', 'created_by']
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ['order_number', 'user', 'status', 'payment_status', 'total', 'created_at']
+    list_filter = ['status', 'payment_status']
+    search_fields = ['order_number', 'user__email']
+    # Status only changes through the actions, which enforce the state machine and record history.
+    readonly_fields = ['order_number', 'status', *TIMESTAMPS.values()]
+    list_select_related = ['user']
+    inlines = [OrderItemInline, OrderStatusUpdateInline]
+    actions = [_transition_action(target) for target in TRANSITIONS if target != 'pending']
@@ -0,0 +1,248 @@
+"""Incremental sales rollups for the admin dashboards.
+
+Every paid order adds its items to per-day totals: overall, per product,
+per brand and per coupon.  Refunds are booked as negative revenue on the
+day they happen, spread over the order's lines in proportion to their
+value.  Revenue leaves out shipping and tax, so refunds do too: a full
+refund takes back the subtotal less the discount, a partial one the same
+share of it as of the order total.  Orders are applied by a background job (``orders.tasks``) queued
+whenever an order or refund changes.  Each order remembers what it has contributed
+(``sales_recorded_on`` / ``sales_refunded``), so applying an order again
+only books the difference and the rollups never need a rescan.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from payments.models import Refund as GatewayRefund
+
+from .models import (
+    DailyBrandSales, DailyCouponSales, DailyProductSales, DailySales, Order, OrderItem, Refund,
+)
+
+CENT = Decimal('0.01')
+PAID_STATUSES = ('paid', 'partially_refunded', 'refunded')
+ROLLUP_FIELDS = ['orders', 'units', 'revenue', 'discount', 'refunds']
+
+REPORTS = {
+    'day': (DailySales, None),
+    'product': (DailyProductSales, 'product_id'),
+    'brand': (DailyBrandSales, 'brand_id'),
+    'coupon': (DailyCouponSales, 'coupon_id'),
+}
+
+
+def _zero():
+    return dict.fromkeys(ROLLUP_FIELDS, 0)
+
+
+def _allocate(amount, weights):
+    """Split ``amount`` over ``weights`` proportionally, to the cent, summing exactly."""
+    total = sum(weights)
+    if not total:
+        return [Decimal('0.00')] * len(weights)
+    shares = [(amount * weight / total).quantize(CENT) for weight in weights]
+    shares[-1] += amount - sum(shares)
+    return shares
+
+
+def is_counted(order):
+    return order.payment_status in PAID_STATUSES
+
+
+def refund_target(order):
+    """How much of the order's revenue (subtotal less discount) should show as refunded in the rollups."""
+    if not is_counted(order):
+        return Decimal('0.00')
+    booked = order.subtotal - order.discount
+    if order.payment_status == 'refunded' or order.status in ('refunded', 'cancelled'):
+        return booked
+    if order.payment_status != 'partially_refunded':
+        return Decimal('0.00')
+    refunded = Refund.objects.filter(order=order, status='completed').aggregate(total=Sum('amount'))['total']
+    settled = GatewayRefund.objects.filter(payment__order=order, status='completed').aggregate(total=Sum('amount'))['total']
+    # A refund requested on the order and paid out by the gateway is recorded on both sides, so the
+    # larger side is what has been refunded; refunds made only at the gateway show up on its side alone.
+    refunded = min(max(refunded or Decimal('0.00'), settled or Decimal('0.00')), order.total)
+    return (refunded * booked / order.total).quantize(CENT) if order.total else Decimal('0.00')
+
+
+class RollupBatch:
+    """Accumulates rollup deltas and writes one increment per touched row."""
+
+    def __init__(self):
+        self.rows = {name: defaultdict(_zero) for name in REPORTS}
+
+    def add_order(self, order, items, day, sale, refund):
+        """Book a sale (``sale`` is +1 or 0) and ``refund`` of ``order`` on ``day``."""
+        weights = [item['line_total'] for item in items]
+        discounts = _allocate(order.discount, weights) if sale else [0] * len(items)
+        refunds = _allocate(refund, weights) if refund else [0] * len(items)
+
+        self._add('day', day, None, sale, sum(item['quantity'] for item in items) * sale,
+                  order.subtotal * sale, order.discount * sale, refund)
+        if order.coupon_id:
+            self._add('coupon', day, order.coupon_id, sale, sum(item['quantity'] for item in items) * sale,
+                      order.subtotal * sale, order.discount * sale, refund)
+
+        seen_products, seen_brands = set(), set()
+        for item, discount, refunded in zip(items, discounts, refunds):
+            product_id, brand_id = item['product_id'] or 0, item['product__brand_id'] or 0
+            first_product = product_id not in seen_products
+            first_brand = brand_id not in seen_brands
+            seen_products.add(product_id)
+            seen_brands.add(brand_id)
+            for name, key, first in (('product', (product_id, brand_id), first_product), ('brand', brand_id, first_brand)):
+                self._add(name, day, key, sale if first else 0, item['quantity'] * sale,
+                          item['line_total'] * sale, discount, refunded)
+
+    def _add(self, name, day, key, orders, units, revenue, discount, refunds):
+        row = self.rows[name][(day, key)]
+        row['orders'] += orders
+        row['units'] += units
+        row['revenue'] += revenue
+        row['discount'] += discount
+        row['refunds'] += refunds
+
+    def flush(self):
+        for name, rows in self.rows.items():
+            model, key_field = REPORTS[name]
+            for (day, key), deltas in rows.items():
+                lookup = {'date': day}
+                if name == 'product':
+                    lookup['product_id'], extra = key[0], {'brand_id': key[1]}
+                elif key_field:
+                    lookup[key_field], extra = key, {}
+                else:
+                    extra = {}
+                _increment(model, lookup, deltas, extra)
+        self.rows = {name: defaultdict(_zero) for name in REPORTS}
+
+
+def _increment(model, lookup, deltas, extra):
+    increments = {field: F(field) + value for field, value in deltas.items() if value}
+    if not increments:
+        return
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **extra, **deltas)
+    except IntegrityError:
+        # Another writer created the row first.
+        model.objects.filter(**lookup).update(**increments)
+
+
+def _order_items(order_ids):
+    items = defaultdict(list)
+    for item in OrderItem.objects.filter(order_id__in=order_ids).order_by('order_id', 'id').values(
+        'order_id', 'product_id', 'product__brand_id', 'quantity', 'line_total'
+    ):
+        items[item['order_id']].append(item)
+    return items
+
+
+def stage_order(batch, order, items, today):
+    """Add whatever ``order`` hasn't contributed yet to ``batch``; returns marker updates or None."""
+    counted = is_counted(order)
+    target = refund_target(order)
+    if counted == (order.sales_recorded_on is not None) and target == order.sales_refunded:
+        return None
+    updates = {}
+    if counted and order.sales_recorded_on is None:
+        sale_day = timezone.localdate(order.paid_at) if order.paid_at else today
+        batch.add_order(order, items, sale_day, 1, 0)
+        updates['sales_recorded_on'] = sale_day
+    refund = target - order.sales_refunded
+    if refund:
+        batch.add_order(order, items, today, 0, refund)
+        updates['sales_refunded'] = target
+    return updates
+
+
+def _apply_orders(orders, today):
+    # Callers hold row locks on ``orders``.
+    items = _order_items([order.pk for order in orders])
+    batch = RollupBatch()
+    staged = [(order, stage_order(batch, order, items[order.pk], today)) for order in orders]
+    batch.flush()
+    for order, updates in staged:
+        if updates:
+            Order.objects.filter(pk=order.pk).update(**updates)
+
+
+def apply_orders_sales(order_ids):
+    """Bring the rollups up to date with these orders' payment and refund state."""
+    with transaction.atomic():
+        orders = list(Order.objects.select_for_update().filter(pk__in=order_ids).order_by('pk'))
+        if orders:
+            _apply_orders(orders, timezone.localdate())
+
+
+def schedule_order_sales(order):
+    """Queue the order for the rollups if this change could have moved them."""
+    from .tasks import update_sales_rollups
+
+    if is_counted(order) or order.sales_recorded_on is not None:
+        update_sales_rollups.enqueue(order_ids=[order.pk])
+
+
+def backfill(chunk_size=1000, rebuild=False):
+    """Stream historical orders in primary-key chunks into the rollups; yields progress."""
+    if rebuild:
+        with transaction.atomic():
+            for model, _ in REPORTS.values():
+                model.objects.all().delete()
+            Order.objects.update(sales_recorded_on=None, sales_refunded=0)
+    today = timezone.localdate()
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update()
+                .filter(pk__gt=last_id, payment_status__in=PAID_STATUSES)
+                .order_by('pk')[:chunk_size]
+            )
+            if not orders:
+                return
+            last_id = orders[-1].pk
+            _apply_orders(orders, today)
+        yield len(orders)
+
+
+def sales_report(by, start, end, interval='day', keys=None, product_ids=None):
+    """Totals from the rollups for ``start``..``end`` inclusive.
+
+    ``by`` picks the rollup (day, product, brand or coupon); ``interval``
+    groups by day or month; ``keys`` restricts to some products/brands/coupons
+    and ``product_ids`` (a list or queryset) narrows product rows, e.g. to a
+    category subtree.
+    """
+    model, key_field = REPORTS[by]
+    rows = model.objects.filter(date__gte=start, date__lte=end)
+    if keys is not None and key_field:
+        rows = rows.filter(**{f'{key_field}__in': keys})
+    if product_ids is not None and by == 'product':
+        rows = rows.filter(product_id__in=product_ids)
+    period = TruncMonth('date') if interval == 'month' else F('date')
+    group = ['period', key_field] if key_field else ['period']
+    results = (
+        rows.annotate(period=period)
+        .values(*group)
+        .annotate(**{f'total_{field}': Sum(field) for field in ROLLUP_FIELDS})
+        .order_by(*group)
+    )
+    report = []
+    for row in results:
+        entry = {'period': row['period']}
+        if key_field:
+            entry[key_field] = row[key_field]
+        for field in ROLLUP_FIELDS:
+            entry[field] = row[f'total_{field}']
+        entry['net'] = entry['revenue'] - entry['discount'] - entry['refunds']
+        report.append(entry)
+    return report
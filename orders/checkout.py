@@ -0,0 +1,117 @@
+"""Turn a cart into an order.
+
+Everything happens in one transaction with a fixed number of queries,
+however many lines the cart holds: the cart row is locked, its lines are
+priced and validated in one annotated query, stock is taken for every line
+in one conditional UPDATE (recorded as holds that the payment later
+commits or releases), and the order items go in with one bulk_create.  The confirmation email is
+queued as a background job in the same transaction.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from products.carts import CENT, invalidate_cart_summary, priced_items
+from products.inventory import InsufficientStock, reserve_stock
+from products.models import Cart, CartItem
+from techlaptops.db import delete_rows
+from users.models import Address
+
+from .coupons import get_coupon, redeem_coupon, validate_coupon
+from .models import Order, OrderItem, OrderStatusUpdate
+from .tasks import send_order_confirmation
+
+
+class CheckoutError(Exception):
+    """The cart cannot be turned into an order; the message is safe to show."""
+
+
+def _load_lines(cart):
+    lines = list(
+        priced_items(cart.pk).values(
+            'product_id', 'product__name', 'product__sku', 'product__is_active', 'product__stock_quantity',
+            'color_id', 'color__name', 'color__is_available', 'quantity', 'price_each', 'amount',
+        )
+    )
+    if not lines:
+        raise CheckoutError('Your cart is empty.')
+    for line in lines:
+        if not line['product__is_active']:
+            raise CheckoutError(f"{line['product__name']} is no longer available.")
+        if line['color_id'] and not line['color__is_available']:
+            raise CheckoutError(f"{line['product__name']} in {line['color__name']} is no longer available.")
+    return lines
+
+
+def _redeem_coupon(code, subtotal, now):
+    coupon = get_coupon(code)
+    discount, error = validate_coupon(coupon, subtotal, now)
+    if error:
+        raise CheckoutError(error)
+    if not redeem_coupon(coupon, now):
+        raise CheckoutError('This coupon has been used up.')
+    return coupon, discount
+
+
+def checkout(cart, user, shipping_address_id=None, billing_address_id=None, coupon_code='', customer_notes='',
+             shipping_cost=Decimal('0.00'), tax=Decimal('0.00')):
+    """Create an order from ``cart`` and empty it; raises CheckoutError when it can't."""
+    now = timezone.now()
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().get(pk=cart.pk)
+        lines = _load_lines(cart)
+
+        addresses = {}
+        address_ids = {pk for pk in (shipping_address_id, billing_address_id) if pk}
+        if address_ids:
+            addresses = Address.objects.filter(user=user, pk__in=address_ids).in_bulk()
+            if len(addresses) != len(address_ids):
+                raise CheckoutError('Unknown address.')
+
+        subtotal = sum((line['amount'] for line in lines), Decimal('0')).quantize(CENT)
+        coupon, discount = _redeem_coupon(coupon_code, subtotal, now) if coupon_code else (None, Decimal('0.00'))
+
+        order = Order.objects.create(
+            user=user,
+            shipping_address=addresses.get(shipping_address_id),
+            billing_address=addresses.get(billing_address_id or shipping_address_id),
+            subtotal=subtotal,
+            shipping_cost=shipping_cost,
+            tax=tax,
+            discount=discount,
+            total=subtotal + shipping_cost + tax - discount,
+            coupon=coupon,
+            coupon_code=coupon.code if coupon else '',
+            customer_notes=customer_notes,
+        )
+
+        quantities = {}
+        for line in lines:
+            quantities[line['product_id']] = quantities.get(line['product_id'], 0) + line['quantity']
+        try:
+            reserve_stock(quantities, reference=order.order_number, order=order)
+        except InsufficientStock as exc:
+            name = next(line['product__name'] for line in lines if line['product_id'] == exc.product_id)
+            raise CheckoutError(f'Not enough stock left for {name}.') from None
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=line['product_id'],
+                product_name=line['product__name'],
+                product_sku=line['product__sku'],
+                color=line['color__name'] or '',
+                quantity=line['quantity'],
+                unit_price=line['price_each'].quantize(CENT),
+                line_total=line['amount'].quantize(CENT),
+            )
+            for line in lines
+        ])
+        OrderStatusUpdate.objects.create(order=order, status=order.status, notes='Order placed.', created_by=user)
+        send_order_confirmation.enqueue(order_id=order.pk, _idempotency_key=f'order-confirmation:{order.order_number}')
+
+        # Emptying the cart in one statement; the per-item signals would only invalidate the same summary.
+        delete_rows(CartItem, 'cart', [cart.pk])
+        invalidate_cart_summary([cart.pk])
+    return order
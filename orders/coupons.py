@@ -0,0 +1,112 @@
+"""Coupon lookups, validation and redemption.
+
+Active coupons are held in a per-process cache keyed by upper-cased code
+(codes are unique regardless of case) and reloaded in one query every
+``COUPON_CACHE_TTL`` seconds, or as soon as a coupon is saved or deleted
+in this process.  The cached copy is only used to price carts; redemption
+is a conditional UPDATE, so the database has the final say on
+``max_uses`` however stale the cache is.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from products.carts import CENT, unit_price_expression
+from products.models import CartItem
+
+from .models import Coupon
+
+
+class CouponCache:
+    """Active coupons by code, refreshed wholesale after a TTL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._coupons = {}
+        self._loaded_at = None
+
+    def get(self, code):
+        code = (code or '').strip().upper()
+        if not code:
+            return None
+        ttl = getattr(settings, 'COUPON_CACHE_TTL', 60)
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > ttl:
+                self._coupons = {coupon.code.upper(): coupon for coupon in Coupon.objects.filter(is_active=True)}
+                self._loaded_at = time.monotonic()
+            return self._coupons.get(code)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+coupon_cache = CouponCache()
+
+
+def get_coupon(code):
+    return coupon_cache.get(code)
+
+
+def validate_coupon(coupon, subtotal, now=None):
+    """Return ``(discount, error)`` for applying ``coupon`` to ``subtotal``."""
+    now = now or timezone.now()
+    if coupon is None or not coupon.is_active or not coupon.valid_from <= now <= coupon.valid_to:
+        return Decimal('0.00'), 'This coupon is not valid.'
+    if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
+        return Decimal('0.00'), 'This coupon has been used up.'
+    if subtotal < coupon.minimum_order_amount:
+        return Decimal('0.00'), f'This coupon needs an order of at least {coupon.minimum_order_amount}.'
+    if coupon.discount_type == 'percentage':
+        discount = subtotal * coupon.discount_value / 100
+    else:
+        discount = coupon.discount_value
+    return min(discount, subtotal).quantize(CENT), None
+
+
+def redeem_coupon(coupon, now=None):
+    """Count one use of ``coupon`` if it has uses left; returns whether it was redeemed.
+
+    ``UPDATE ... WHERE current_uses < max_uses`` makes concurrent redemptions
+    of the last use race in the database rather than in Python.
+    """
+    now = now or timezone.now()
+    return bool(
+        Coupon.objects.filter(
+            Q(max_uses=0) | Q(current_uses__lt=F('max_uses')),
+            pk=coupon.pk, is_active=True, valid_from__lte=now, valid_to__gte=now,
+        ).update(current_uses=F('current_uses') + 1)
+    )
+
+
+def release_coupon(coupon_id, uses=1):
+    """Give back ``uses`` uses, e.g. when the orders that redeemed them are cancelled."""
+    Coupon.objects.filter(pk=coupon_id, current_uses__gt=0).update(current_uses=Greatest(F('current_uses') - uses, 0))
+
+
+def price_carts(cart_ids, code, now=None):
+    """Price many carts against one coupon code with a single aggregate query.
+
+    Returns ``{cart_id: {'subtotal', 'discount', 'total', 'error'}}``.
+    """
+    coupon = get_coupon(code)
+    subtotals = dict.fromkeys(cart_ids, Decimal('0.00'))
+    rows = (
+        CartItem.objects.filter(cart_id__in=cart_ids)
+        .values('cart_id')
+        .annotate(subtotal=Sum(unit_price_expression() * F('quantity')))
+        .order_by()
+    )
+    for row in rows:
+        subtotals[row['cart_id']] = row['subtotal'].quantize(CENT)
+    now = now or timezone.now()
+    priced = {}
+    for cart_id, subtotal in subtotals.items():
+        discount, error = validate_coupon(coupon, subtotal, now)
+        priced[cart_id] = {'subtotal': subtotal, 'discount': discount, 'total': subtotal - discount, 'error': error}
+    return priced
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from orders.analytics import backfill
+
+
+class Command(BaseCommand):
+    help = 'Stream paid orders into the daily sales rollups, in primary-key chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--rebuild', action='store_true', help='Empty the rollups and recount every order.')
+
+    def handle(self, *args, **options):
+        processed = 0
+        for count in backfill(chunk_size=options['chunk_size'], rebuild=options['rebuild']):
+            processed += count
+            self.stdout.write(f'  {processed} orders')
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {processed} paid orders.'))
@@ -0,0 +1,63 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from orders.coupons import get_coupon, redeem_coupon
+from orders.models import Coupon
+
+
+class Command(BaseCommand):
+    help = (
+        'Race concurrent shoppers to redeem one limited coupon and report throughput and '
+        'over-redemption.  Creates a throwaway coupon; point it at a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shoppers', type=int, default=500)
+        parser.add_argument('--max-uses', type=int, default=100)
+        parser.add_argument('--threads', type=int, default=32)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('Each thread needs its own connection to a shared database; in-memory SQLite cannot do that.')
+
+        now = timezone.now()
+        coupon = Coupon.objects.create(
+            code=f'BENCH{uuid.uuid4().hex[:8].upper()}', discount_type='fixed', discount_value=100,
+            valid_from=now - timedelta(hours=1), valid_to=now + timedelta(hours=1), max_uses=options['max_uses'],
+        )
+        results = {'redeemed': 0, 'used_up': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def shop(_):
+            try:
+                outcome = 'redeemed' if redeem_coupon(get_coupon(coupon.code)) else 'used_up'
+            except OperationalError:
+                outcome = 'errors'
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(shop, range(options['shoppers'])))
+        elapsed = time.perf_counter() - started
+
+        coupon.refresh_from_db()
+        self.stdout.write(
+            f"{options['shoppers']} shoppers on {options['threads']} threads in {elapsed:.2f}s "
+            f"({options['shoppers'] / elapsed:.0f} redemptions/s)\n"
+            f"redeemed: {results['redeemed']}  used up: {results['used_up']}  errors: {results['errors']}\n"
+            f"current_uses: {coupon.current_uses} of {coupon.max_uses}"
+        )
+        coupon.delete()
+        if coupon.current_uses > coupon.max_uses or results['redeemed'] != coupon.current_uses:
+            raise CommandError('The coupon was over-redeemed.')
+        self.stdout.write(self.style.SUCCESS('No over-redemption.'))
@@ -0,0 +1,47 @@
+import bisect
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.numbers import OrderNumberGenerator, random_order_number
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sortable order number generator with the legacy random scheme: '
+        'numbers per second, and where each new number lands in a sorted (B-tree-like) index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200000)
+        parser.add_argument('--existing', type=int, default=50000, help='Keys already in the index before inserting.')
+        parser.add_argument('--page-size', type=int, default=100, help='Keys per simulated leaf page.')
+
+    def handle(self, *args, **options):
+        sortable = OrderNumberGenerator(worker_id=1).next_number
+        for name, generate in (('random', random_order_number), ('sortable', sortable)):
+            started = time.perf_counter()
+            for _ in range(options['count']):
+                generate()
+            rate = options['count'] / (time.perf_counter() - started)
+
+            appends, pages = self.locality(generate, options['existing'], options['count'] // 10, options['page_size'])
+            self.stdout.write(
+                f'{name:>8}: {rate:>12,.0f} numbers/s   '
+                f'{appends:6.1%} inserts at the right edge   '
+                f'{pages:>6} distinct leaf pages touched'
+            )
+
+    @staticmethod
+    def locality(generate, existing, inserts, page_size):
+        """Insert into a sorted list and see how scattered the insert positions are."""
+        index = sorted(generate() for _ in range(existing))
+        appends, pages = 0, set()
+        for _ in range(inserts):
+            key = generate()
+            position = bisect.bisect_left(index, key)
+            if position == len(index):
+                appends += 1
+            pages.add(position // page_size)
+            index.insert(position, key)
+        return appends / inserts, len(pages)
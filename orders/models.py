@@ -1,6 +1,7 @@
 from django.db import models
-from django.utils.crypto import get_random_string
-import uuid
+from django.db.models.functions import Upper
+
+from .numbers import new_order_number
 
 class Coupon(models.Model):
     """Coupon model for discounts."""
@@ -21,9 +22,19 @@ class Coupon(models.Model):
     max_uses = models.PositiveIntegerField(default=0)  # 0 means unlimited
     current_uses = models.PositiveIntegerField(default=0)
     
+    class Meta:
+        constraints = [
+            # Codes are looked up case-insensitively, so "save10" and "SAVE10" would be one coupon.
+            models.UniqueConstraint(Upper('code'), name='coupon_code_upper_unique'),
+        ]
+    
     def __str__(self):
         return self.code
     
+    def save(self, *args, **kwargs):
+        self.code = self.code.strip().upper()
+        super().save(*args, **kwargs)
+    
     @property
     def is_valid(self):
         """Check if the coupon is currently valid."""
@@ -67,9 +78,6 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     
-    # Shipping information
-    shipping_address = models.F  default='pending')
-    
     # Shipping information
     shipping_address = models.ForeignKey('users.Address', on_delete=models.SET_NULL, null=True, related_name='shipping_orders')
     billing_address = models.ForeignKey('users.Address', on_delete=models.SET_NULL, null=True, related_name='billing_orders')
@@ -97,8 +105,23 @@ class Order(models.Model):
     customer_notes = models.TextField(blank=True)
     admin_notes = models.TextField(blank=True)
     
+    # What the sales rollups already account for (see orders.analytics)
+    sales_recorded_on = models.DateField(null=True, blank=True, editable=False)
+    sales_refunded = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Covers the order history list so it can be answered from the index alone.
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                include=[
+                    'order_number', 'status', 'payment_status', 'subtotal', 'shipping_cost', 'tax',
+                    'discount', 'total', 'coupon_code', 'paid_at', 'shipped_at', 'delivered_at', 'cancelled_at',
+                ],
+                name='order_user_recent_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.order_number
@@ -106,13 +129,19 @@ class Order(models.Model):
     def save(self, *args, **kwargs):
         if not self.order_number:
             self.order_number = self._generate_order_number()
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # The sales markers belong to orders.analytics; a stale instance must not write them back.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SALES_MARKER_FIELDS
+            ]
         super().save(*args, **kwargs)
     
+    SALES_MARKER_FIELDS = ('sales_recorded_on', 'sales_refunded')
+
     def _generate_order_number(self):
-        """Generate a unique order number."""
-        prefix = 'ORD'
-        random_str = get_random_string(length=8, allowed_chars='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-        return f"{prefix}-{random_str}"
+        """Generate a unique, time-sortable order number."""
+        return new_order_number()
     
     @property
     def order_total(self):
@@ -132,6 +161,11 @@ class OrderItem(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     line_total = models.DecimalField(max_digits=10, decimal_places=2)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'id'], include=['product', 'product_name', 'quantity'], name='orderitem_order_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.quantity} x {self.product_name} in order {self.order.order_number}"
 
@@ -147,6 +181,9 @@ class OrderStatusUpdate(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at'], include=['status'], name='orderstatus_order_recent_idx'),
+        ]
     
     def __str__(self):
         return f"Status update for order {self.order.order_number}: {self.status}"
@@ -173,3 +210,64 @@ class Refund(models.Model):
     
     def __str__(self):
         return f"Refund for order {self.order.order_number}"
+
+
+class SalesRollup(models.Model):
+    """Per-day sales totals, maintained incrementally by orders.analytics."""
+    
+    date = models.DateField()
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+    """All sales on one day."""
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date'], name='dailysales_date_unique'),
+        ]
+
+
+class DailyProductSales(SalesRollup):
+    """Sales of one product on one day."""
+    
+    # Plain ids so history survives products being deleted; 0 means unknown
+    product_id = models.BigIntegerField()
+    brand_id = models.BigIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('product_id', 'date')
+        indexes = [
+            models.Index(fields=['date', 'product_id'], name='dailyproductsales_date_idx'),
+        ]
+
+
+class DailyBrandSales(SalesRollup):
+    """Sales of one brand on one day."""
+    
+    brand_id = models.BigIntegerField()
+    
+    class Meta:
+        unique_together = ('brand_id', 'date')
+        indexes = [
+            models.Index(fields=['date', 'brand_id'], name='dailybrandsales_date_idx'),
+        ]
+
+
+class DailyCouponSales(SalesRollup):
+    """Orders placed with one coupon on one day."""
+    
+    coupon_id = models.BigIntegerField()
+    
+    class Meta:
+        unique_together = ('coupon_id', 'date')
+        indexes = [
+            models.Index(fields=['date', 'coupon_id'], name='dailycouponsales_date_idx'),
+        ]
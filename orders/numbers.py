@@ -0,0 +1,137 @@
+"""Time-sortable order numbers generated in-process.
+
+An order number packs a 64-bit id -- 42 bits of milliseconds since
+``EPOCH``, 10 bits of worker id and a 12-bit per-millisecond sequence --
+into 13 Crockford base32 characters behind the ``ORD-`` prefix.  Numbers
+from one process are strictly increasing and numbers from different
+workers differ in the worker bits, so no database check or retry is
+needed, and new rows land at the right-hand edge of the unique index.
+
+Every process that creates orders needs its own worker id (0-1023):
+``ORDER_NUMBER_WORKER_BASE`` for the host plus ``ORDER_NUMBER_WORKER_INDEX``
+for the process.  gunicorn.conf.py hands each web worker a free index
+after it forks.  A process with no index, or one that forked and would
+share its parent's, refuses to number orders rather than risk duplicates.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import get_random_string
+
+PREFIX = 'ORD'
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'  # Crockford base32, in ASCII order
+LENGTH = 13
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def encode(value):
+    chars = []
+    for _ in range(LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+def default_worker_id(inherited_index=None):
+    """This process's worker id; ``inherited_index`` is the index a forked child got from its parent."""
+    index = os.environ.get('ORDER_NUMBER_WORKER_INDEX')
+    if index is None:
+        if settings.DEBUG:
+            # Development servers run a single process.
+            return os.getpid() & MAX_WORKER_ID
+        raise ImproperlyConfigured(
+            'Set ORDER_NUMBER_WORKER_INDEX for this process (gunicorn.conf.py does it for web workers).'
+        )
+    if index == inherited_index:
+        raise ImproperlyConfigured(
+            f'This process forked from one using ORDER_NUMBER_WORKER_INDEX={index}; '
+            'give each forked worker its own index.'
+        )
+    worker_id = int(getattr(settings, 'ORDER_NUMBER_WORKER_BASE', 0)) + int(index)
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise ImproperlyConfigured(f'Order number worker id {worker_id} is outside 0-{MAX_WORKER_ID}.')
+    return worker_id
+
+
+class OrderNumberGenerator:
+    """Monotonic id source for one process; safe to share between threads."""
+
+    def __init__(self, worker_id=None, clock=time.time):
+        self.worker_id = worker_id
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self._inherited_index = None
+
+    def reset_after_fork(self):
+        # A forked worker must not reuse its parent's worker id; it is resolved again on first use,
+        # after gunicorn's post_fork hook has set the child's own index.
+        self._lock = threading.Lock()
+        self._inherited_index = os.environ.get('ORDER_NUMBER_WORKER_INDEX')
+        self.worker_id = None
+
+    def next_id(self):
+        with self._lock:
+            if self.worker_id is None:
+                self.worker_id = default_worker_id(self._inherited_index)
+            now_ms = int(self.clock() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock stepped back: keep counting from the last tick.
+                self._sequence += 1
+            else:
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_number(self):
+        return f'{PREFIX}-{encode(self.next_id())}'
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = OrderNumberGenerator()
+                os.register_at_fork(after_in_child=_generator.reset_after_fork)
+    return _generator
+
+
+def random_order_number():
+    """The original scheme: eight random characters, unique only by luck and the constraint."""
+    return f"{PREFIX}-{get_random_string(length=8, allowed_chars='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')}"
+
+
+def new_order_number():
+    if getattr(settings, 'ORDER_NUMBER_SCHEME', 'sortable') == 'random':
+        return random_order_number()
+    return generator().next_number()
+
+
+def order_number_timestamp(order_number):
+    """Creation time (epoch seconds) encoded in a sortable order number, or None for old random ones."""
+    body = order_number.partition('-')[2]
+    if len(body) != LENGTH:
+        return None
+    return ((decode(body) >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS) / 1000
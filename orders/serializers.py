@@ -0,0 +1,99 @@
+from rest_framework import serializers
+from payments.models import Payment
+from users.serializers import AddressSerializer
+from .models import Order, OrderItem, OrderStatusUpdate
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_number', 'status', 'payment_status', 'subtotal', 'shipping_cost',
+            'tax', 'discount', 'total', 'coupon_code', 'created_at', 'paid_at',
+            'shipped_at', 'delivered_at', 'cancelled_at'
+        ]
+        read_only_fields = fields
+
+
+class OrderListSerializer(OrderSerializer):
+    """Order history row; the summary fields come from queryset annotations."""
+    item_count = serializers.IntegerField(read_only=True)
+    first_item_name = serializers.CharField(read_only=True)
+    thumbnail = serializers.CharField(read_only=True)
+    latest_status = serializers.CharField(read_only=True)
+    latest_status_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + [
+            'item_count', 'first_item_name', 'thumbnail', 'latest_status', 'latest_status_at'
+        ]
+        read_only_fields = fields
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'product_sku', 'color', 'quantity', 'unit_price', 'line_total']
+
+
+class OrderStatusUpdateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderStatusUpdate
+        fields = ['status', 'notes', 'created_at']
+
+
+class OrderPaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = ['id', 'payment_method', 'amount', 'status', 'created_at']
+
+
+class OrderDetailSerializer(OrderSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+    status_updates = OrderStatusUpdateSerializer(many=True, read_only=True)
+    payments = OrderPaymentSerializer(many=True, read_only=True)
+    shipping_address = AddressSerializer(read_only=True)
+    billing_address = AddressSerializer(read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + [
+            'customer_notes', 'shipping_address', 'billing_address', 'items', 'status_updates', 'payments'
+        ]
+        read_only_fields = fields
+
+
+class CheckoutSerializer(serializers.Serializer):
+    shipping_address = serializers.IntegerField(required=False)
+    billing_address = serializers.IntegerField(required=False)
+    coupon_code = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    customer_notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class CouponCheckSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=20)
+
+
+class CouponBatchPriceSerializer(serializers.Serializer):
+    code = serializers.CharField(max_length=20)
+    cart_ids = serializers.ListField(child=serializers.IntegerField(), max_length=1000)
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    order_numbers = serializers.ListField(child=serializers.CharField(max_length=20), allow_empty=False, max_length=5000)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    by = serializers.ChoiceField(choices=['day', 'product', 'brand', 'coupon'], default='day')
+    start = serializers.DateField()
+    end = serializers.DateField()
+    interval = serializers.ChoiceField(choices=['day', 'month'], default='day')
+    category = serializers.SlugField(required=False)
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError('end must not be before start.')
+        if (attrs['end'] - attrs['start']).days > 731:
+            raise serializers.ValidationError('Reports cover at most two years.')
+        return attrs
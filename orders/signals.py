@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from payments.models import Refund as GatewayRefund
+
+from .analytics import schedule_order_sales
+from .coupons import coupon_cache
+from .models import Coupon, Order, Refund
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_cache(sender, instance, **kwargs):
+    transaction.on_commit(coupon_cache.invalidate)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, **kwargs):
+    schedule_order_sales(instance)
+
+
+@receiver(post_save, sender=Refund)
+@receiver(post_delete, sender=Refund)
+def update_sales_rollups_on_refund(sender, instance, **kwargs):
+    # The order may be going away in the same cascade.
+    order = Order.objects.filter(pk=instance.order_id).first()
+    if order is not None:
+        schedule_order_sales(order)
+
+
+@receiver(post_save, sender=GatewayRefund)
+@receiver(post_delete, sender=GatewayRefund)
+def update_sales_rollups_on_gateway_refund(sender, instance, **kwargs):
+    order = Order.objects.filter(payments__pk=instance.payment_id).first()
+    if order is not None:
+        schedule_order_sales(order)
@@ -0,0 +1,35 @@
+"""Background work queued by orders (see jobs.queue)."""
+from django.core.mail import send_mail
+
+from jobs.queue import task
+
+from .analytics import apply_orders_sales
+from .models import Order
+
+
+@task
+def update_sales_rollups(order_ids):
+    apply_orders_sales(order_ids)
+
+
+@task(max_attempts=8)
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None or order.user is None or not order.user.email:
+        return
+    lines = [
+        f'{quantity} x {name}: {line_total}'
+        for name, quantity, line_total in order.items.order_by('id').values_list('product_name', 'quantity', 'line_total')
+    ]
+    body = '\n'.join([
+        f'Thank you for your order {order.order_number}.',
+        '',
+        *lines,
+        '',
+        f'Subtotal: {order.subtotal}',
+        f'Discount: {order.discount}',
+        f'Shipping: {order.shipping_cost}',
+        f'Tax: {order.tax}',
+        f'Total: {order.total}',
+    ])
+    send_mail(f'Order {order.order_number} confirmed', body, None, [order.user.email])
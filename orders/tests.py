@@ -0,0 +1,189 @@
+import os
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.utils import timezone
+
+from jobs.models import Job
+from orders.checkout import checkout
+from orders.coupons import get_coupon
+from orders.models import Coupon, Order, OrderItem, OrderStatusUpdate
+from orders.transitions import InvalidTransition, transition_order, transition_orders
+from products.inventory import reserve_stock
+from products.models import Brand, Cart, CartItem, Product, StockReservation
+from users.models import User
+
+# Checkout's query count, whatever the size of the cart, including its on-commit work; inside a
+# TestCase its transaction is a savepoint.
+CHECKOUT_QUERIES = 14
+
+
+@mock.patch.dict(os.environ, {'ORDER_NUMBER_WORKER_INDEX': '0'})
+class CheckoutQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.brand = Brand.objects.create(name='Checkout')
+
+    def make_cart(self, lines):
+        user = User.objects.create_user(email=f'checkout-{lines}@example.com')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Laptop {lines}-{i}', slug=f'laptop-{lines}-{i}', sku=f'CHK-{lines}-{i}',
+                brand=self.brand, description='', price=Decimal('1000'), stock_quantity=10,
+            )
+            for i in range(lines)
+        ])
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=2) for product in products])
+        return cart, user
+
+    def assert_checkout_queries(self, lines):
+        cart, user = self.make_cart(lines)
+        with self.assertNumQueries(CHECKOUT_QUERIES), self.captureOnCommitCallbacks(execute=True):
+            order = checkout(cart, user)
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), lines)
+        self.assertEqual(StockReservation.objects.filter(order=order, status='held').count(), lines)
+        self.assertFalse(CartItem.objects.filter(cart=cart).exists())
+
+    def test_single_line_cart(self):
+        self.assert_checkout_queries(1)
+
+    def test_many_line_cart(self):
+        self.assert_checkout_queries(25)
+
+
+class OrderTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='transitions@example.com')
+        cls.product = Product.objects.create(
+            name='Transition laptop', slug='transition-laptop', sku='TRN-1', brand=Brand.objects.create(name='Transition'),
+            description='', price=Decimal('1000'), stock_quantity=5,
+        )
+        now = timezone.now()
+        cls.coupon = Coupon.objects.create(
+            code='TRANSIT', discount_type='fixed', discount_value=Decimal('50'),
+            valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1), current_uses=3,
+        )
+
+    def make_order(self, status='pending', **fields):
+        number = Order.objects.count() + 1
+        return Order.objects.create(
+            user=self.user, order_number=f'TRN{number:05d}', status=status,
+            subtotal=Decimal('1000'), total=Decimal('1000'), **fields,
+        )
+
+    def rollup_jobs(self, order):
+        return Job.objects.filter(name='orders.tasks.update_sales_rollups', payload__order_ids=[order.pk]).count()
+
+    def test_legal_moves_stamp_and_record_history(self):
+        order = self.make_order()
+        for target in ('processing', 'shipped', 'delivered', 'refunded'):
+            with self.subTest(target=target):
+                order = transition_order(order, target, user=self.user, notes=f'to {target}')
+                self.assertEqual(order.status, target)
+        self.assertIsNotNone(order.shipped_at)
+        self.assertIsNotNone(order.delivered_at)
+        self.assertIsNone(order.cancelled_at)
+        self.assertEqual(
+            list(OrderStatusUpdate.objects.filter(order=order).order_by('pk').values_list('status', 'notes')),
+            [('processing', 'to processing'), ('shipped', 'to shipped'),
+             ('delivered', 'to delivered'), ('refunded', 'to refunded')],
+        )
+        self.assertEqual(self.rollup_jobs(order), 1)
+
+    def test_forbidden_moves_are_rejected_without_changes(self):
+        cases = [
+            ('pending', 'shipped', 'Cannot go from pending to shipped.'),
+            ('pending', 'delivered', 'Cannot go from pending to delivered.'),
+            ('processing', 'refunded', 'Cannot go from processing to refunded.'),
+            ('shipped', 'cancelled', 'Cannot go from shipped to cancelled.'),
+            ('delivered', 'processing', 'Cannot go from delivered to processing.'),
+            ('cancelled', 'processing', 'Cannot go from cancelled to processing.'),
+            ('refunded', 'delivered', 'Cannot go from refunded to delivered.'),
+            ('shipped', 'shipped', 'Already shipped.'),
+        ]
+        for status, target, reason in cases:
+            with self.subTest(status=status, target=target):
+                order = self.make_order(status)
+                with self.assertRaisesMessage(InvalidTransition, reason):
+                    transition_order(order, target)
+                order.refresh_from_db()
+                self.assertEqual(order.status, status)
+                self.assertFalse(OrderStatusUpdate.objects.filter(order=order).exists())
+
+    def test_unknown_status(self):
+        with self.assertRaisesMessage(InvalidTransition, 'Unknown status: lost.'):
+            transition_orders([self.make_order().pk], 'lost')
+
+    def test_batch_moves_eligible_orders_and_reports_the_rest(self):
+        pending, processing, shipped = self.make_order(), self.make_order('processing'), self.make_order('shipped')
+        result = transition_orders(Order.objects.filter(pk__in=[pending.pk, processing.pk, shipped.pk]), 'cancelled')
+        self.assertEqual(result['updated'], [pending.pk, processing.pk])
+        self.assertEqual(result['rejected'], [{
+            'order_number': shipped.order_number, 'status': 'shipped', 'reason': 'Cannot go from shipped to cancelled.',
+        }])
+        self.assertEqual(Order.objects.filter(status='cancelled', cancelled_at__isnull=False).count(), 2)
+
+    def test_cancelling_returns_stock_and_coupon_use_once(self):
+        order = self.make_order(coupon=self.coupon)
+        reserve_stock({self.product.pk: 2}, 'transition-cancel', order=order)
+        transition_order(order, 'cancelled')
+        with self.assertRaisesMessage(InvalidTransition, 'Already cancelled.'):
+            transition_order(order, 'cancelled')
+
+        self.product.refresh_from_db()
+        self.coupon.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 5)
+        self.assertEqual(StockReservation.objects.get(order=order).status, 'released')
+        self.assertEqual(self.coupon.current_uses, 2)
+        self.assertEqual(self.rollup_jobs(order), 1)
+
+    def test_order_changed_by_another_writer_after_the_read_is_rejected(self):
+        raced, kept = self.make_order(), self.make_order()
+        pending_race = [raced.pk]
+
+        def concurrent_writer(execute, sql, params, many, context):
+            # Another process moves one order on between the locked read and the guarded UPDATE.
+            if sql.startswith('UPDATE "orders_order"') and pending_race:
+                Order.objects.filter(pk=pending_race.pop()).update(status='shipped')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(concurrent_writer):
+            result = transition_orders([raced.pk, kept.pk], 'cancelled')
+
+        self.assertEqual(result['updated'], [kept.pk])
+        self.assertEqual(result['rejected'], [{
+            'order_number': raced.order_number, 'status': 'shipped', 'reason': 'Cannot go from shipped to cancelled.',
+        }])
+        self.assertEqual(Order.objects.get(pk=raced.pk).status, 'shipped')
+        self.assertEqual(list(OrderStatusUpdate.objects.values_list('order_id', flat=True)), [kept.pk])
+
+
+class CouponCodeTests(TestCase):
+    def make_coupon(self, code):
+        now = timezone.now()
+        # Runs the cache invalidation the save queues for after commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            return Coupon.objects.create(
+                code=code, discount_type='percentage', discount_value=Decimal('10'),
+                valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1),
+            )
+
+    def test_codes_are_stored_upper_cased_and_found_in_any_case(self):
+        coupon = self.make_coupon(' save10 ')
+        self.assertEqual(Coupon.objects.get(pk=coupon.pk).code, 'SAVE10')
+        for typed in ('SAVE10', 'save10', ' Save10'):
+            with self.subTest(typed=typed):
+                self.assertEqual(get_coupon(typed).pk, coupon.pk)
+
+    def test_codes_differing_only_in_case_are_rejected(self):
+        self.make_coupon('SAVE10')
+        with self.assertRaises(IntegrityError):
+            Coupon.objects.bulk_create([Coupon(
+                code='save10', discount_type='fixed', discount_value=Decimal('5'),
+                valid_from=timezone.now(), valid_to=timezone.now(),
+            )])
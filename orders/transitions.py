@@ -0,0 +1,130 @@
+"""The order status state machine.
+
+``TRANSITIONS`` lists where each status may go next.  Every status change,
+for one order or thousands, goes through ``transition_orders``: it locks
+and reads the orders once, moves the eligible ones with a single
+conditional UPDATE, writes their history with one ``bulk_create`` and
+reports the rest as rejected instead of failing the whole batch.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from products.inventory import release_order_holds
+
+from .coupons import release_coupon
+from .models import Order, OrderStatusUpdate
+from .tasks import update_sales_rollups
+
+TRANSITIONS = {
+    'pending': {'processing', 'cancelled'},
+    'processing': {'shipped', 'cancelled'},
+    'shipped': {'delivered'},
+    'delivered': {'refunded'},
+    'cancelled': set(),
+    'refunded': set(),
+}
+
+# Timestamp fields stamped when an order enters a status.
+TIMESTAMPS = {
+    'shipped': 'shipped_at',
+    'delivered': 'delivered_at',
+    'cancelled': 'cancelled_at',
+}
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+
+
+class InvalidTransition(Exception):
+    """An order cannot move to the requested status; the message is safe to show."""
+
+
+def allowed_transitions(status):
+    return sorted(TRANSITIONS.get(status, ()))
+
+
+def can_transition(current, target):
+    return target in TRANSITIONS.get(current, ())
+
+
+def sources_for(target):
+    """Statuses from which an order may move to ``target``."""
+    return [status for status, targets in TRANSITIONS.items() if target in targets]
+
+
+def _rejection(order_number, status, target):
+    if status == target:
+        reason = f'Already {STATUS_LABELS[target].lower()}.'
+    else:
+        reason = f'Cannot go from {STATUS_LABELS[status].lower()} to {STATUS_LABELS[target].lower()}.'
+    return {'order_number': order_number, 'status': status, 'reason': reason}
+
+
+def transition_orders(orders, target, user=None, notes=''):
+    """Move ``orders`` (a queryset or order ids) to ``target``.
+
+    Returns ``{'updated': [order ids], 'rejected': [{'order_number', 'status', 'reason'}]}``.
+    """
+    if target not in TRANSITIONS:
+        raise InvalidTransition(f'Unknown status: {target}.')
+    if not isinstance(orders, QuerySet):
+        orders = Order.objects.filter(pk__in=list(orders))
+    sources = sources_for(target)
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            orders.select_for_update().order_by('pk').values_list('pk', 'order_number', 'status', 'coupon_id')
+        )
+        eligible = [row for row in rows if row[2] in sources]
+        rejected = [_rejection(number, current, target) for _, number, current, _ in rows if current not in sources]
+        if not eligible:
+            return {'updated': [], 'rejected': rejected}
+        order_ids = [row[0] for row in eligible]
+
+        changes = {'status': target, 'updated_at': now}
+        if target in TIMESTAMPS:
+            changes[TIMESTAMPS[target]] = now
+        # The status guard repeats the check in SQL, so nothing slips past the state machine.
+        moved = Order.objects.filter(pk__in=order_ids, status__in=sources).update(**changes)
+        if moved != len(order_ids):
+            # Another writer got to some of them after the read (SQLite takes no row locks); those
+            # are reported with the status they have now and get no history or side effects.
+            current = {
+                pk: (status, updated_at)
+                for pk, status, updated_at in
+                Order.objects.filter(pk__in=order_ids).values_list('pk', 'status', 'updated_at')
+            }
+            ours = {pk for pk, state in current.items() if state == (target, now)}
+            rejected += [
+                _rejection(number, current.get(pk, (current_status,))[0], target)
+                for pk, number, current_status, _ in eligible if pk not in ours
+            ]
+            eligible = [row for row in eligible if row[0] in ours]
+            order_ids = [row[0] for row in eligible]
+            if not eligible:
+                return {'updated': [], 'rejected': rejected}
+        OrderStatusUpdate.objects.bulk_create([
+            OrderStatusUpdate(order_id=order_id, status=target, notes=notes, created_by=user)
+            for order_id in order_ids
+        ])
+
+        if target == 'cancelled':
+            release_order_holds(order_ids)
+            for coupon_id, uses in Counter(row[3] for row in eligible if row[3]).items():
+                release_coupon(coupon_id, uses)
+        if target in ('cancelled', 'refunded'):
+            # Queryset updates skip post_save, so queue the sales rollups here.
+            update_sales_rollups.enqueue(order_ids=order_ids)
+    return {'updated': order_ids, 'rejected': rejected}
+
+
+def transition_order(order, target, user=None, notes=''):
+    """Move one order to ``target``; raises InvalidTransition when it can't."""
+    result = transition_orders([order.pk], target, user=user, notes=notes)
+    if result['rejected']:
+        raise InvalidTransition(result['rejected'][0]['reason'])
+    order.refresh_from_db()
+    return order
@@ -0,0 +1,12 @@
+from django.urls import path
+from .views import CheckoutView, CouponBatchPriceView, CouponCheckView, OrderDetailView, OrderListView, OrderTransitionView, SalesReportView
+
+urlpatterns = [
+    path('', OrderListView.as_view(), name='order-list'),
+    path('checkout/', CheckoutView.as_view(), name='checkout'),
+    path('coupons/check/', CouponCheckView.as_view(), name='coupon-check'),
+    path('coupons/price/', CouponBatchPriceView.as_view(), name='coupon-batch-price'),
+    path('transitions/', OrderTransitionView.as_view(), name='order-transitions'),
+    path('analytics/sales/', SalesReportView.as_view(), name='sales-report'),
+    path('<str:order_number>/', OrderDetailView.as_view(), name='order-detail'),
+]
@@ -0,0 +1,152 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from products.models import Cart, Category, ProductCard
+from techlaptops.pagination import KeysetPagination
+from .analytics import sales_report
+from .checkout import CheckoutError, checkout
+from .coupons import price_carts
+from .models import Order, OrderItem, OrderStatusUpdate
+from .serializers import (
+    CheckoutSerializer, CouponBatchPriceSerializer, CouponCheckSerializer, OrderDetailSerializer,
+    OrderListSerializer, OrderSerializer, OrderTransitionSerializer, SalesReportQuerySerializer
+)
+from .transitions import transition_orders
+
+
+class OrderListView(generics.ListAPIView):
+    """List the authenticated user's order history, newest first.
+
+    Item counts, the first item (with its card thumbnail) and the latest
+    status are correlated subqueries, so a page is a single query.
+    """
+    serializer_class = OrderListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ['created_at']
+
+    def get_queryset(self):
+        items = OrderItem.objects.filter(order=OuterRef('pk'))
+        first_item = items.order_by('id')
+        latest = OrderStatusUpdate.objects.filter(order=OuterRef('pk')).order_by('-created_at', '-id')
+        # Only the columns the covering order_user_recent_idx carries, so pages come off the index.
+        columns = [field for field in OrderSerializer.Meta.fields if field != 'id'] + ['user']
+        return Order.objects.filter(user=self.request.user).only(*columns).annotate(
+            item_count=Coalesce(Subquery(
+                items.order_by().values('order').annotate(count=Count('id')).values('count')[:1]
+            ), 0),
+            first_item_name=Subquery(first_item.values('product_name')[:1]),
+            thumbnail=Subquery(
+                ProductCard.objects.filter(
+                    product_id=Subquery(first_item.values('product_id')[:1])
+                ).values('primary_image')[:1]
+            ),
+            latest_status=Coalesce(Subquery(latest.values('status')[:1]), 'status'),
+            latest_status_at=Subquery(latest.values('created_at')[:1]),
+        )
+
+
+class OrderDetailView(generics.RetrieveAPIView):
+    """Retrieve one of the authenticated user's orders with items, status timeline and payments."""
+    serializer_class = OrderDetailSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'order_number'
+
+    def get_queryset(self):
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('shipping_address', 'billing_address')
+            .prefetch_related('items', 'status_updates', 'payments')
+        )
+
+
+class CheckoutView(APIView):
+    """Place an order for everything in the authenticated user's cart."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = Cart.objects.filter(user=request.user).first()
+        if cart is None:
+            return Response({"detail": "Your cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        try:
+            order = checkout(
+                cart,
+                request.user,
+                shipping_address_id=data.get('shipping_address'),
+                billing_address_id=data.get('billing_address'),
+                coupon_code=data.get('coupon_code', ''),
+                customer_notes=data.get('customer_notes', ''),
+            )
+        except CheckoutError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class CouponCheckView(APIView):
+    """Preview a coupon code against the authenticated user's cart."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CouponCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = Cart.objects.filter(user=request.user).first()
+        if cart is None:
+            return Response({"detail": "Your cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
+        priced = price_carts([cart.pk], serializer.validated_data['code'])[cart.pk]
+        if priced['error']:
+            return Response({"detail": priced['error']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(priced)
+
+
+class CouponBatchPriceView(APIView):
+    """Price many carts against one coupon code, e.g. before a campaign mailing."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CouponBatchPriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        priced = price_carts(serializer.validated_data['cart_ids'], serializer.validated_data['code'])
+        return Response({"results": [{"cart_id": cart_id, **values} for cart_id, values in priced.items()]})
+
+
+class OrderTransitionView(APIView):
+    """Move a batch of orders to a new status, e.g. everything that left the warehouse today (admin only)."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        numbers = set(data['order_numbers'])
+        orders = Order.objects.filter(order_number__in=numbers)
+        result = transition_orders(orders, data['status'], user=request.user, notes=data.get('notes', ''))
+        rejected = result['rejected']
+        if len(result['updated']) + len(rejected) < len(numbers):
+            missing = numbers - set(orders.values_list('order_number', flat=True))
+            rejected += [{"order_number": number, "status": None, "reason": "Order not found."} for number in sorted(missing)]
+        return Response({"status": data['status'], "updated": len(result['updated']), "rejected": rejected})
+
+
+class SalesReportView(APIView):
+    """Revenue by day, product, brand or coupon from the daily rollups (admin only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        serializer = SalesReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        product_ids = None
+        if params.get('category'):
+            category = Category.objects.filter(slug=params['category']).first()
+            if category is None:
+                return Response({"detail": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
+            product_ids = category.get_subtree_products().values('pk')
+        by = 'product' if product_ids is not None else params['by']
+        report = sales_report(by, params['start'], params['end'], params['interval'], product_ids=product_ids)
+        return Response({"by": by, "interval": params['interval'], "results": report})
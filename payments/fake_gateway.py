@@ -0,0 +1,183 @@
+"""An in-process stand-in for the Razorpay API, for offline benchmarks.
+
+``FakeRazorpay`` serves the handful of endpoints the gateway client uses
+(orders, payments, capture, refund) from memory over real HTTP with
+keep-alive, so connection pooling behaves as it would against the real
+API.  It can add latency and random 5xx errors to exercise timeouts,
+retries and the circuit breaker.  ``pay(order_id)`` stands in for the
+customer completing checkout and returns an authorized payment id.
+"""
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _id(prefix):
+    return f'{prefix}_{uuid.uuid4().hex[:14]}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+
+    routes = [
+        ('POST', re.compile(r'^/v1/orders$'), 'create_order'),
+        ('GET', re.compile(r'^/v1/orders/(?P<id>[\w]+)$'), 'fetch_order'),
+        ('GET', re.compile(r'^/v1/payments/(?P<id>[\w]+)$'), 'fetch_payment'),
+        ('POST', re.compile(r'^/v1/payments/(?P<id>[\w]+)/capture$'), 'capture'),
+        ('POST', re.compile(r'^/v1/payments/(?P<id>[\w]+)/refund$'), 'refund'),
+    ]
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; without this, Nagle's algorithm stalls keep-alive replies.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.fake._lock:
+            self.server.fake.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        fake = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        path = self.path.split('?')[0]
+        with fake._lock:
+            fake.requests += 1
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake.failure_rate and random.random() < fake.failure_rate:
+            return self.reply(500, {'error': {'code': 'SERVER_ERROR', 'description': 'Injected failure.'}})
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                status, payload = getattr(fake, name)(body, **match.groupdict())
+                return self.reply(status, payload)
+        self.reply(404, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'The requested URL was not found.'}})
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops connection bursts into SYN retries
+
+
+def _bad_request(description):
+    return 400, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': description}}
+
+
+class FakeRazorpay:
+    """Start with ``start()`` (returns the base URL) and stop with ``stop()``, or use as a context manager."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.orders, self.payments = {}, {}
+        self.requests = 0
+        self.connections = 0  # TCP connections clients have opened
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.fake = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def pay(self, order_id, method='upi'):
+        """Simulate the customer paying ``order_id``; returns the authorized payment's id."""
+        with self._lock:
+            order = self.orders[order_id]
+            payment = {
+                'id': _id('pay'), 'entity': 'payment', 'amount': order['amount'], 'currency': order['currency'],
+                'status': 'authorized', 'order_id': order_id, 'method': method, 'captured': False,
+                'amount_refunded': 0, 'created_at': int(time.time()),
+            }
+            self.payments[payment['id']] = payment
+            order['status'] = 'attempted'
+            order['attempts'] += 1
+        return payment['id']
+
+    def create_order(self, body):
+        if not isinstance(body.get('amount'), int) or body['amount'] < 100:
+            return _bad_request('The amount must be at least INR 1.00.')
+        order = {
+            'id': _id('order'), 'entity': 'order', 'amount': body['amount'], 'amount_paid': 0,
+            'amount_due': body['amount'], 'currency': body.get('currency', 'INR'), 'receipt': body.get('receipt'),
+            'status': 'created', 'attempts': 0, 'notes': body.get('notes') or {}, 'created_at': int(time.time()),
+        }
+        with self._lock:
+            self.orders[order['id']] = order
+        return 200, order
+
+    def fetch_order(self, body, id):
+        order = self.orders.get(id)
+        return (200, order) if order else _bad_request('The id provided does not exist')
+
+    def fetch_payment(self, body, id):
+        payment = self.payments.get(id)
+        return (200, payment) if payment else _bad_request('The id provided does not exist')
+
+    def capture(self, body, id):
+        with self._lock:
+            payment = self.payments.get(id)
+            if payment is None:
+                return _bad_request('The id provided does not exist')
+            if payment['status'] == 'captured':
+                return _bad_request('This payment has already been captured')
+            if body.get('amount') != payment['amount']:
+                return _bad_request('Capture amount must be equal to the amount authorized')
+            payment.update(status='captured', captured=True)
+            order = self.orders[payment['order_id']]
+            order.update(status='paid', amount_paid=payment['amount'], amount_due=0)
+            return 200, dict(payment)
+
+    def refund(self, body, id):
+        with self._lock:
+            payment = self.payments.get(id)
+            if payment is None or payment['status'] not in ('captured', 'refunded'):
+                return _bad_request('The payment has not been captured')
+            amount = body.get('amount') or payment['amount'] - payment['amount_refunded']
+            if amount > payment['amount'] - payment['amount_refunded']:
+                return _bad_request('The total refund amount is greater than the refund payment amount')
+            payment['amount_refunded'] += amount
+            if payment['amount_refunded'] == payment['amount']:
+                payment['status'] = 'refunded'
+            return 200, {
+                'id': _id('rfnd'), 'entity': 'refund', 'amount': amount, 'currency': payment['currency'],
+                'payment_id': id, 'notes': body.get('notes') or {}, 'status': 'processed', 'created_at': int(time.time()),
+            }
@@ -0,0 +1,196 @@
+"""The Razorpay client layer.
+
+Every call goes through one ``RazorpayGateway`` per process.  It is built
+on a ``requests`` session with a connection pool, so TLS handshakes are
+paid once per connection rather than once per call.  Each call gets a
+connect/read timeout and an overall deadline.  Failures are retried with
+jittered backoff only where a repeat cannot charge or refund twice.  A
+circuit breaker stops calling a gateway that keeps failing and fails fast
+instead of tying up worker threads until it recovers.
+"""
+import os
+import random
+import threading
+import time
+
+import razorpay
+import requests
+from django.conf import settings
+from razorpay.errors import BadRequestError
+from requests.adapters import HTTPAdapter
+
+
+class GatewayError(Exception):
+    """A gateway call did not succeed; the message is safe to log."""
+
+
+class GatewayRejected(GatewayError):
+    """The gateway understood the request and refused it (4xx); retrying won't help."""
+
+
+class GatewayUnavailable(GatewayError):
+    """The gateway timed out, errored or is being avoided by the circuit breaker."""
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and lets one trial call through after ``reset_after`` seconds."""
+
+    def __init__(self, threshold=5, reset_after=30, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        return 'half-open' if self.clock() - self._opened_at >= self.reset_after else 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures, self._opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = self.clock()
+            self._trial = False
+
+
+class _Client(razorpay.Client):
+    """The SDK client, minus the package metadata lookup it does on every request."""
+
+    _version = None
+
+    def _get_version(self):
+        if _Client._version is None:
+            _Client._version = super()._get_version()
+        return _Client._version
+
+
+def pooled_session(pool_size):
+    session = requests.Session()
+    # Retries are ours to decide (see RazorpayGateway._call), so the adapter never retries on its own.
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class RazorpayGateway:
+    """Thread-safe Razorpay client with pooled connections, timeouts, retries and a circuit breaker."""
+
+    def __init__(self, key_id, key_secret, base_url=None, connect_timeout=3.05, read_timeout=10, deadline=20,
+                 retries=2, backoff=0.2, pool_size=20, breaker=None, session=None):
+        options = {'base_url': base_url} if base_url else {}
+        self.client = _Client(session=session or pooled_session(pool_size), auth=(key_id, key_secret), **options)
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    def _call(self, func, *args, idempotent=False, **kwargs):
+        """Call ``func`` with the timeout, retries and breaker applied.
+
+        Only idempotent calls are retried after the request may have reached
+        the gateway; others are retried only when the connection never opened.
+        """
+        if not self.breaker.allow():
+            raise GatewayUnavailable('Payment gateway is unavailable; try again shortly.')
+        started = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                result = func(*args, timeout=self.timeout, **kwargs)
+            except BadRequestError as e:
+                self.breaker.record_success()
+                raise GatewayRejected(str(e) or 'Rejected by the payment gateway.') from e
+            except requests.ConnectTimeout as e:
+                error = e
+            except (requests.RequestException, razorpay.errors.ServerError, razorpay.errors.GatewayError, ValueError) as e:
+                # ValueError: a non-JSON body, e.g. a proxy's error page.
+                error = e
+                if not idempotent:
+                    break
+            else:
+                self.breaker.record_success()
+                return result
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            if attempt == self.retries or time.monotonic() - started + delay + self.timeout[0] > self.deadline:
+                break
+            time.sleep(delay)
+        self.breaker.record_failure()
+        raise GatewayUnavailable(f'Payment gateway call failed: {type(error).__name__}.') from error
+
+    def create_order(self, amount, receipt, currency='INR', notes=None):
+        """Create a gateway order for ``amount`` rupees (a Decimal)."""
+        data = {'amount': int(amount * 100), 'currency': currency, 'receipt': receipt, 'notes': notes or {}}
+        return self._call(self.client.order.create, data)
+
+    def fetch_order(self, order_id):
+        return self._call(self.client.order.fetch, order_id, idempotent=True)
+
+    def fetch_payment(self, payment_id):
+        return self._call(self.client.payment.fetch, payment_id, idempotent=True)
+
+    def capture(self, payment_id, amount, currency='INR'):
+        # A repeated capture is refused rather than charged twice, so it is safe to retry; if an earlier
+        # attempt went through after all, the refusal just means the payment is already ours.
+        try:
+            return self._call(
+                self.client.payment.capture, payment_id, int(amount * 100), {'currency': currency}, idempotent=True
+            )
+        except GatewayRejected as e:
+            if 'already been captured' not in str(e):
+                raise
+            return self.fetch_payment(payment_id)
+
+    def refund(self, payment_id, amount, notes=None):
+        return self._call(self.client.payment.refund, payment_id, {'amount': int(amount * 100), 'notes': notes or {}})
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def _forget_gateway():
+    # Pooled sockets must not be shared with a forked child.
+    global _gateway
+    _gateway = None
+
+
+def get_gateway():
+    """The process-wide gateway client, built from settings on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = RazorpayGateway(
+                    settings.RAZORPAY_KEY_ID,
+                    settings.RAZORPAY_KEY_SECRET,
+                    base_url=settings.RAZORPAY_API_BASE_URL or None,
+                    connect_timeout=settings.RAZORPAY_CONNECT_TIMEOUT,
+                    read_timeout=settings.RAZORPAY_READ_TIMEOUT,
+                    retries=settings.RAZORPAY_RETRIES,
+                    pool_size=settings.RAZORPAY_POOL_SIZE,
+                    breaker=CircuitBreaker(settings.RAZORPAY_BREAKER_THRESHOLD, settings.RAZORPAY_BREAKER_RESET),
+                )
+    return _gateway
+
+
+os.register_at_fork(after_in_child=_forget_gateway)
@@ -0,0 +1,77 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from django.core.management.base import BaseCommand
+
+from payments.fake_gateway import FakeRazorpay
+from payments.gateway import CircuitBreaker, GatewayError, RazorpayGateway
+
+
+class Command(BaseCommand):
+    help = (
+        'Run order-create/pay/capture/refund flows against an in-process fake Razorpay and compare '
+        'the pooled gateway client with a fresh client per call, then show the circuit breaker under an outage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flows', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--latency', type=float, default=0.005, help='Seconds the fake gateway takes per call.')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of calls answered with a 500.')
+
+    def handle(self, *args, **options):
+        with FakeRazorpay(latency=options['latency'], failure_rate=options['failure_rate']) as fake:
+            pooled = RazorpayGateway('rzp_test', 'secret', base_url=fake.base_url, pool_size=options['threads'])
+            for name, gateway_for_call in (
+                ('fresh client', lambda: RazorpayGateway('rzp_test', 'secret', base_url=fake.base_url, session=requests.Session())),
+                ('pooled client', lambda: pooled),
+            ):
+                connections_before = fake.connections
+                self.run_flows(name, fake, gateway_for_call, options)
+                self.stdout.write(f'{"":>15}  {fake.connections - connections_before} TCP connections opened')
+
+            self.stdout.write('Gateway outage (every call fails):')
+            fake.failure_rate = 1.0
+            breaker = CircuitBreaker(threshold=5, reset_after=30)
+            gateway = RazorpayGateway('rzp_test', 'secret', base_url=fake.base_url, breaker=breaker, backoff=0.05)
+            for i in range(10):
+                started = time.perf_counter()
+                try:
+                    gateway.fetch_order('order_missing')
+                except GatewayError as e:
+                    outcome = str(e)
+                self.stdout.write(
+                    f'  call {i + 1:>2}: {(time.perf_counter() - started) * 1000:7.1f} ms  breaker {breaker.state:<9} {outcome}'
+                )
+
+    def run_flows(self, name, fake, gateway_for_call, options):
+        latencies, failures = [], []
+
+        def timed(call, *args):
+            started = time.perf_counter()
+            try:
+                return call(*args)
+            finally:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        def flow(i):
+            try:
+                order = timed(gateway_for_call().create_order, Decimal('54999.00'), f'bench-{i}')
+                payment_id = fake.pay(order['id'])
+                timed(gateway_for_call().capture, payment_id, Decimal('54999.00'))
+                timed(gateway_for_call().refund, payment_id, Decimal('999.00'))
+            except GatewayError as e:
+                failures.append(e)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(flow, range(options['flows'])))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        self.stdout.write(
+            f'{name:>15}: {options["flows"] / elapsed:8.1f} flows/s   call p50 {statistics.median(latencies):6.1f} ms   '
+            f'p99 {latencies[int(len(latencies) * 0.99)]:6.1f} ms   {len(failures)} failed flows'
+        )
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from payments.models import GatewayPayload, Payment, Refund
+
+
+class Command(BaseCommand):
+    help = (
+        'Move raw gateway payloads still stored inline on payments and refunds into the compressed '
+        'GatewayPayload table, in batches, and empty the inline column.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in (Payment, Refund):
+            moved, raw_bytes, stored_bytes = self.move(model, options['batch_size'])
+            ratio = f', {raw_bytes / stored_bytes:.1f}x smaller' if stored_bytes else ''
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: moved {moved} payloads '
+                f'({raw_bytes / 1024:.0f} KiB of JSON into {stored_bytes / 1024:.0f} KiB{ratio})'
+            )
+
+    def move(self, model, batch_size):
+        owner = model._meta.model_name
+        fields = ['pk', 'legacy_gateway_response'] + (['gateway_method', 'gateway_error_code'] if model is Payment else [])
+        pending = model._base_manager.exclude(legacy_gateway_response={}).order_by('pk').only(*fields)
+        moved = raw_bytes = stored_bytes = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                rows = list(pending.filter(pk__gt=last_pk).select_for_update()[:batch_size])
+                if not rows:
+                    break
+                # A payload written since the deploy is newer than the inline copy, so it is kept.
+                stored = set(
+                    GatewayPayload.objects.filter(**{f'{owner}__in': rows}).values_list(f'{owner}_id', flat=True)
+                )
+                blobs = []
+                for row in rows:
+                    if row.pk in stored:
+                        continue
+                    data = GatewayPayload.compress(row.legacy_gateway_response)
+                    raw_bytes += len(json.dumps(row.legacy_gateway_response, cls=DjangoJSONEncoder))
+                    stored_bytes += len(data)
+                    blobs.append(GatewayPayload(**{owner: row}, data=data))
+                    row.set_gateway_fields(row.legacy_gateway_response)
+                GatewayPayload.objects.bulk_create(blobs, ignore_conflicts=True)
+                if model is Payment:
+                    model._base_manager.bulk_update(rows, ['gateway_method', 'gateway_error_code'])
+                model._base_manager.filter(pk__in=[row.pk for row in rows]).update(legacy_gateway_response={})
+            moved += len(blobs)
+            last_pk = rows[-1].pk
+        return moved, raw_bytes, stored_bytes
@@ -0,0 +1,78 @@
+import csv
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from payments.reconciliation import REPORT_FIELDS, SettlementError, SettlementReconciler, read_settlement
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a gateway settlement CSV and reconcile it against payments and refunds, '
+        'reporting missing, mismatched-amount and duplicate entries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Settlement CSV, or '-' for stdin.")
+        parser.add_argument('--output', help="Write discrepancies as CSV here ('-' for stdout).")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--amounts-in-paise', action='store_true', help='Amounts are in paise rather than rupees.')
+        parser.add_argument('--since', help='Also report completed payments created from this date (YYYY-MM-DD) '
+                                            'that are not in the file.')
+        parser.add_argument('--until', help='End of the --since period (exclusive).')
+
+    def handle(self, *args, **options):
+        since, until = (self.parse_day(options, name) for name in ('since', 'until'))
+        path = options['path']
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+        output = options['output']
+        out = None
+        if output:
+            out = self.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            write = lambda row: None  # noqa: E731
+
+        started = time.perf_counter()
+        try:
+            counts = SettlementReconciler(write, options['chunk_size'], options['amounts_in_paise']).run(
+                read_settlement(stream), since=since, until=until
+            )
+        except SettlementError as exc:
+            raise CommandError(str(exc))
+        finally:
+            # stdin and stdout belong to the caller; only the files opened here are closed.
+            if stream is not sys.stdin:
+                stream.close()
+            if out is not None and out is not self.stdout:
+                out.close()
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {kind.replace("_", " ")}' for kind, count in counts.items() if kind != 'rows')
+        target = self.stderr if output == '-' else self.stdout
+        problems = sum(counts[kind] for kind in ('missing', 'amount_mismatch', 'status_mismatch', 'duplicate', 'unsettled'))
+        style = self.style.WARNING if problems else self.style.SUCCESS
+        target.write(style(f'Reconciled {counts["rows"]} rows in {elapsed:.1f}s: {summary}.'))
+
+    def parse_day(self, options, name):
+        value = options[name]
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f'--{name} must be a date as YYYY-MM-DD, not {value!r}.')
+        # Midnight in the shop's time zone, compared against created_at as an aware datetime.
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
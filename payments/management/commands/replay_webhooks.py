@@ -0,0 +1,107 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.models import Payment, WebhookEvent
+from payments.webhooks import process_all, sign, webhook_secret
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the Razorpay webhook endpoint: send bursts of signed payment events, '
+        'including redeliveries, and report acknowledgement latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/payments/webhooks/razorpay/')
+        parser.add_argument('--events', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--duplicates', type=float, default=0.2, help='Share of events delivered twice.')
+        parser.add_argument('--process', action='store_true', help='Drain the inbox in-process afterwards and time it.')
+
+    def handle(self, *args, **options):
+        if not webhook_secret():
+            raise CommandError('Set RAZORPAY_WEBHOOK_SECRET or RAZORPAY_KEY_SECRET first.')
+        deliveries = self.build_events(options['events'], options['duplicates'])
+        before = WebhookEvent.objects.count()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(lambda delivery: self.send(options['url'], *delivery), deliveries))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        codes = Counter(code for code, _ in results)
+        self.stdout.write(
+            f'{len(deliveries)} deliveries in {elapsed:.2f}s ({len(deliveries) / elapsed:,.0f}/s), '
+            f'status codes {dict(codes)}'
+        )
+        self.stdout.write(
+            f'ack latency ms: p50 {self.percentile(latencies, 50):.1f}  p95 {self.percentile(latencies, 95):.1f}  '
+            f'p99 {self.percentile(latencies, 99):.1f}  max {latencies[-1]:.1f}  mean {statistics.mean(latencies):.1f}'
+        )
+        self.stdout.write(f'{WebhookEvent.objects.count() - before} new inbox rows for {options["events"]} distinct events')
+
+        if options['process']:
+            started = time.perf_counter()
+            handled = process_all()
+            self.stdout.write(f'Processed {handled} events in {time.perf_counter() - started:.2f}s')
+
+    def build_events(self, count, duplicates):
+        """Captured events for pending payments where there are any, made-up gateway orders otherwise."""
+        pending = list(
+            Payment.objects.filter(status='pending').exclude(payment_gateway_order_id='')
+            .values_list('payment_gateway_order_id', 'amount')[:count]
+        )
+        deliveries = []
+        for i in range(count):
+            gateway_order_id, amount = pending[i] if i < len(pending) else (f'order_replay{uuid.uuid4().hex[:14]}', 1000)
+            event = {
+                'entity': 'event',
+                'event': 'payment.captured',
+                'contains': ['payment'],
+                'created_at': int(time.time()),
+                'payload': {'payment': {'entity': {
+                    'id': f'pay_replay{uuid.uuid4().hex[:14]}',
+                    'entity': 'payment',
+                    'amount': int(amount * 100),
+                    'currency': 'INR',
+                    'status': 'captured',
+                    'order_id': gateway_order_id,
+                    'method': 'upi',
+                }}},
+            }
+            body = json.dumps(event).encode()
+            delivery = (body, sign(body), f'evt_replay{uuid.uuid4().hex[:14]}')
+            deliveries.append(delivery)
+        # Redeliveries reuse the event id, as the gateway does when it retries.
+        deliveries += deliveries[:int(count * duplicates)]
+        return deliveries
+
+    @staticmethod
+    def send(url, body, signature, event_id):
+        request = urllib.request.Request(url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'X-Razorpay-Signature': signature,
+            'X-Razorpay-Event-Id': event_id,
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        except urllib.error.URLError:
+            code = 'unreachable'
+        return code, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def percentile(values, pct):
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
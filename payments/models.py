@@ -1,6 +1,65 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-class Payment(models.Model):
+
+class PayloadDeferringManager(models.Manager):
+    """Leaves the legacy inline payload column out of every fetch."""
+    
+    def get_queryset(self):
+        return super().get_queryset().defer('legacy_gateway_response')
+
+
+class GatewayResponseMixin(models.Model):
+    """Keeps ``payment_gateway_response`` in ``GatewayPayload`` rather than on the row.
+    
+    The payload is read on first access (``select_related('raw_payload')``
+    fetches it up front) and written by ``save()`` only when it was assigned.
+    Bulk writers call ``save_gateway_responses`` themselves.
+    """
+    
+    # Moved out by the move_gateway_payloads command; drop once every row reads '{}'.
+    legacy_gateway_response = models.JSONField(
+        default=dict, blank=True, editable=False, db_column='payment_gateway_response'
+    )
+    
+    objects = PayloadDeferringManager()
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def payment_gateway_response(self):
+        if '_gateway_response' not in self.__dict__:
+            self._gateway_response = self._load_gateway_response()
+        return self._gateway_response
+    
+    @payment_gateway_response.setter
+    def payment_gateway_response(self, value):
+        self._gateway_response = value or {}
+        self._gateway_response_changed = True
+        self.set_gateway_fields(self._gateway_response)
+    
+    def _load_gateway_response(self):
+        if self.pk is None:
+            return {}
+        try:
+            return self.raw_payload.payload
+        except GatewayPayload.DoesNotExist:
+            return self.legacy_gateway_response or {}
+    
+    def set_gateway_fields(self, response):
+        """Copy the queried parts of a gateway payload onto real columns."""
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.__dict__.get('_gateway_response_changed'):
+            save_gateway_responses([self])
+
+
+class Payment(GatewayResponseMixin):
     """Payment model."""
     
     PAYMENT_METHOD_CHOICES = [
@@ -24,17 +83,23 @@ class Payment(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    transaction_id = models.CharField(max_length=255, blank=True)
-    payment_gateway_order_id = models.CharField(max_length=255, blank=True)
-    payment_gateway_response = models.JSONField(default=dict, blank=True)
+    # Indexed for settlement reconciliation and webhook batches, which look payments up by gateway ids.
+    transaction_id = models.CharField(max_length=255, blank=True, db_index=True)
+    payment_gateway_order_id = models.CharField(max_length=255, blank=True, db_index=True)
+    gateway_method = models.CharField(max_length=20, blank=True)
+    gateway_error_code = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Payment for order {self.order.order_number}"
+    
+    def set_gateway_fields(self, response):
+        self.gateway_method = response.get('method') or ''
+        self.gateway_error_code = response.get('error_code') or ''
 
 
-class Refund(models.Model):
+class Refund(GatewayResponseMixin):
     """Payment refund model."""
     
     STATUS_CHOICES = [
@@ -47,10 +112,89 @@ class Refund(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    transaction_id = models.CharField(max_length=255, blank=True)
-    payment_gateway_response = models.JSONField(default=dict, blank=True)
+    transaction_id = models.CharField(max_length=255, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Refund for payment {self.payment.id}"
+
+
+class GatewayPayload(models.Model):
+    """Raw gateway payload of one payment or refund, stored as zlib-compressed JSON."""
+    
+    payment = models.OneToOneField(
+        Payment, on_delete=models.CASCADE, null=True, blank=True, related_name='raw_payload'
+    )
+    refund = models.OneToOneField(
+        Refund, on_delete=models.CASCADE, null=True, blank=True, related_name='raw_payload'
+    )
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(payment__isnull=False, refund__isnull=True)
+                | models.Q(payment__isnull=True, refund__isnull=False),
+                name='gatewaypayload_one_owner',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Payload for {'payment' if self.payment_id else 'refund'} {self.payment_id or self.refund_id}"
+    
+    @staticmethod
+    def compress(payload):
+        return zlib.compress(json.dumps(payload, separators=(',', ':'), cls=DjangoJSONEncoder).encode(), 6)
+    
+    @property
+    def payload(self):
+        return json.loads(zlib.decompress(self.data))
+
+
+def save_gateway_responses(instances):
+    """Upsert the assigned payloads of saved payments or refunds (one model per call) in one query."""
+    changed = [obj for obj in instances if obj.__dict__.get('_gateway_response_changed')]
+    if not changed:
+        return
+    owner = changed[0]._meta.model_name
+    GatewayPayload.objects.bulk_create(
+        [GatewayPayload(**{owner: obj}, data=GatewayPayload.compress(obj._gateway_response)) for obj in changed],
+        update_conflicts=True, unique_fields=[owner], update_fields=['data', 'updated_at'],
+    )
+    for obj in changed:
+        obj._gateway_response_changed = False
+
+
+class WebhookEvent(models.Model):
+    """Gateway webhook inbox: stored as received, applied later by payments.webhooks."""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    
+    gateway = models.CharField(max_length=20, default='razorpay')
+    event_id = models.CharField(max_length=100)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            # Gateways redeliver; the second copy of an event is dropped at insert time.
+            models.UniqueConstraint(fields=['gateway', 'event_id'], name='webhookevent_unique_event'),
+        ]
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='webhookevent_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.gateway} {self.event} {self.event_id}"
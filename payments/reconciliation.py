@@ -0,0 +1,214 @@
+"""Streaming reconciliation of gateway settlement exports.
+
+Settlement rows are read in chunks.  Each chunk is matched to ``Payment``
+(by ``transaction_id``, falling back to ``payment_gateway_order_id``) and
+to ``payments.Refund`` with one ``IN`` lookup per key.  Discrepancies are
+written out as they are found rather than collected.  Entity ids already
+seen live in a throwaway on-disk SQLite table, which catches duplicates
+anywhere in the file and, with ``since``, the completed payments that never
+settled, while memory stays flat however long the file is.
+"""
+import csv
+import os
+import sqlite3
+import tempfile
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db.models import Q
+
+from .models import Payment, Refund
+
+# Razorpay settlement recon exports; alternative spellings seen in other reports.
+COLUMN_ALIASES = {
+    'entity_id': ('entity_id', 'id', 'transaction_id'),
+    'type': ('type', 'entity_type'),
+    'amount': ('amount', 'credit', 'debit'),
+    'order_id': ('order_id',),
+}
+REPORT_FIELDS = ['kind', 'type', 'entity_id', 'order_id', 'settlement_amount', 'recorded_amount', 'detail']
+SETTLED_PAYMENT_STATUSES = ('completed', 'refunded')
+CENT = Decimal('0.01')
+
+
+class SettlementError(ValueError):
+    """A settlement file that cannot be reconciled."""
+
+
+class SeenIds:
+    """Disk-backed set of the settlement entity ids read so far."""
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3', prefix='settlement-')
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('PRAGMA journal_mode=OFF')
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.execute('CREATE TABLE seen (id TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def add(self, ids):
+        self.db.executemany('INSERT OR IGNORE INTO seen VALUES (?)', ((i,) for i in ids))
+
+    def filter(self, ids):
+        """The subset of ``ids`` seen so far."""
+        found = set()
+        ids = list(ids)
+        for start in range(0, len(ids), 900):
+            batch = ids[start:start + 900]
+            marks = ','.join('?' * len(batch))
+            found.update(row[0] for row in self.db.execute(f'SELECT id FROM seen WHERE id IN ({marks})', batch))
+        return found
+
+    def close(self):
+        self.db.close()
+        os.unlink(self.path)
+
+
+def _column(row, field):
+    for name in COLUMN_ALIASES[field]:
+        if row.get(name) not in (None, ''):
+            return row[name].strip()
+    return ''
+
+
+def _amount(value, in_paise):
+    try:
+        amount = Decimal(value.replace(',', ''))
+    except (InvalidOperation, AttributeError):
+        return None
+    return (amount / 100 if in_paise else amount).quantize(CENT)
+
+
+class SettlementReconciler:
+    """Match settlement rows against payments and refunds; ``writer`` receives discrepancy dicts."""
+
+    def __init__(self, writer, chunk_size=5000, amounts_in_paise=False):
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.amounts_in_paise = amounts_in_paise
+        self.counts = dict.fromkeys(
+            ['rows', 'matched', 'missing', 'amount_mismatch', 'status_mismatch', 'duplicate', 'unsettled', 'skipped'], 0
+        )
+        self.seen = SeenIds()
+
+    def run(self, rows, since=None, until=None):
+        """Reconcile every row; with ``since``, also report completed payments missing from the file."""
+        try:
+            rows = iter(rows)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                self.reconcile_chunk(chunk)
+            if since is not None:
+                self.find_unsettled(since, until)
+        finally:
+            self.seen.close()
+        return self.counts
+
+    def report(self, kind, row_type, entity_id, order_id='', settlement_amount=None, recorded_amount=None, detail=''):
+        self.counts[kind] += 1
+        self.writer({
+            'kind': kind, 'type': row_type, 'entity_id': entity_id, 'order_id': order_id,
+            'settlement_amount': settlement_amount, 'recorded_amount': recorded_amount, 'detail': detail,
+        })
+
+    def reconcile_chunk(self, chunk):
+        rows = []
+        for row in chunk:
+            self.counts['rows'] += 1
+            entity_id, row_type = _column(row, 'entity_id'), _column(row, 'type').lower() or 'payment'
+            amount = _amount(_column(row, 'amount'), self.amounts_in_paise)
+            if not entity_id or amount is None or row_type not in ('payment', 'refund'):
+                # Adjustments, transfers and fee lines have no counterpart here.
+                self.counts['skipped'] += 1
+                continue
+            rows.append((row_type, entity_id, _column(row, 'order_id'), amount))
+
+        # The first occurrence of an id is reconciled; every later one is a duplicate.
+        ids = [entity_id for _, entity_id, _, _ in rows]
+        seen = self.seen.filter(ids)
+        self.seen.add(ids)
+        fresh = []
+        for row in rows:
+            if row[1] in seen:
+                self.report('duplicate', row[0], row[1], row[2], row[3], detail='Entity appears more than once.')
+            else:
+                seen.add(row[1])
+                fresh.append(row)
+
+        payment_rows = [row for row in fresh if row[0] == 'payment']
+        refund_rows = [row for row in fresh if row[0] == 'refund']
+        self.match_payments(payment_rows)
+        self.match_refunds(refund_rows)
+
+    def match_payments(self, rows):
+        if not rows:
+            return
+        fields = ('transaction_id', 'payment_gateway_order_id', 'amount', 'status')
+        by_transaction = {
+            payment['transaction_id']: payment
+            for payment in Payment.objects.filter(transaction_id__in=[row[1] for row in rows]).values(*fields)
+        }
+        unmatched_orders = [row[2] for row in rows if row[1] not in by_transaction and row[2]]
+        by_order = {
+            payment['payment_gateway_order_id']: payment
+            for payment in Payment.objects.filter(payment_gateway_order_id__in=unmatched_orders).values(*fields)
+        } if unmatched_orders else {}
+
+        for row_type, entity_id, order_id, amount in rows:
+            payment = by_transaction.get(entity_id) or by_order.get(order_id)
+            if payment is None:
+                self.report('missing', row_type, entity_id, order_id, amount, detail='No payment with this id or gateway order.')
+            elif payment['amount'] != amount:
+                self.report('amount_mismatch', row_type, entity_id, order_id, amount, payment['amount'])
+            elif payment['status'] not in SETTLED_PAYMENT_STATUSES:
+                self.report('status_mismatch', row_type, entity_id, order_id, amount, payment['amount'],
+                            detail=f"Settled but recorded as {payment['status']}.")
+            else:
+                self.counts['matched'] += 1
+
+    def match_refunds(self, rows):
+        if not rows:
+            return
+        refunds = dict(
+            Refund.objects.filter(transaction_id__in=[row[1] for row in rows]).values_list('transaction_id', 'amount')
+        )
+        for row_type, entity_id, order_id, amount in rows:
+            # Refund lines carry a negative amount in some exports.
+            amount = abs(amount)
+            if entity_id not in refunds:
+                self.report('missing', row_type, entity_id, order_id, amount, detail='No refund with this id.')
+            elif refunds[entity_id] != amount:
+                self.report('amount_mismatch', row_type, entity_id, order_id, amount, refunds[entity_id])
+            else:
+                self.counts['matched'] += 1
+
+    def find_unsettled(self, since, until=None):
+        """Report completed gateway payments from the period that never appeared in the file."""
+        payments = Payment.objects.filter(
+            ~Q(transaction_id=''), status__in=SETTLED_PAYMENT_STATUSES, created_at__gte=since,
+        )
+        if until is not None:
+            payments = payments.filter(created_at__lt=until)
+        batch = []
+        for payment in payments.values_list('transaction_id', 'payment_gateway_order_id', 'amount').iterator(self.chunk_size):
+            batch.append(payment)
+            if len(batch) == self.chunk_size:
+                self._report_unsettled(batch)
+                batch = []
+        self._report_unsettled(batch)
+
+    def _report_unsettled(self, batch):
+        settled = self.seen.filter(transaction_id for transaction_id, _, _ in batch)
+        for transaction_id, order_id, amount in batch:
+            if transaction_id not in settled:
+                self.report('unsettled', 'payment', transaction_id, order_id, recorded_amount=amount,
+                            detail='Completed payment not in the settlement file.')
+
+
+def read_settlement(stream):
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or not any(name in reader.fieldnames for name in COLUMN_ALIASES['entity_id']):
+        raise SettlementError('The file has no entity_id column.')
+    return reader
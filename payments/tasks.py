@@ -0,0 +1,9 @@
+"""Background work queued by payments (see jobs.queue)."""
+from jobs.queue import task
+
+from .webhooks import process_all
+
+
+@task
+def process_webhook_events():
+    process_all()
@@ -0,0 +1,138 @@
+import json
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from orders.analytics import apply_orders_sales
+from orders.models import DailySales, Order
+from payments.models import Payment, Refund, WebhookEvent
+from payments.webhooks import InvalidWebhook, process_pending, receive_event, sign
+from products.inventory import reserve_stock
+from products.models import Brand, Product, StockReservation
+from users.models import User
+
+SECRET = 'webhook-test-secret'
+
+
+def event_body(event, **entities):
+    return json.dumps({
+        'event': event,
+        'payload': {name: {'entity': entity} for name, entity in entities.items()},
+    }).encode()
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=SECRET)
+class WebhookTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='webhooks@example.com')
+        cls.product = Product.objects.create(
+            name='Webhook laptop', slug='webhook-laptop', sku='WHK-1', brand=Brand.objects.create(name='Webhook'),
+            description='', price=Decimal('1000'), stock_quantity=5,
+        )
+
+    def make_payment(self, number, amount=Decimal('1000'), payment=None, **order_fields):
+        order = Order.objects.create(
+            user=self.user, order_number=f'WHK{number:05d}', subtotal=amount, total=amount, **order_fields,
+        )
+        return Payment.objects.create(
+            order=order, payment_method='razorpay', amount=amount, payment_gateway_order_id=f'order_{number}',
+            **(payment or {}),
+        )
+
+    def deliver(self, body, event_id=None):
+        receive_event(body, sign(body, SECRET), event_id=event_id)
+
+    def captured(self, payment, payment_id):
+        return event_body('payment.captured', payment={'id': payment_id, 'order_id': payment.payment_gateway_order_id})
+
+    def refunded(self, refund_id, payment_id, paise):
+        return event_body('refund.processed', refund={'id': refund_id, 'payment_id': payment_id, 'amount': paise})
+
+    def test_bad_signature_and_malformed_body_are_refused(self):
+        body = event_body('payment.captured')
+        with self.assertRaises(InvalidWebhook):
+            receive_event(body, sign(body, 'another-secret'))
+        with self.assertRaises(InvalidWebhook):
+            receive_event(b'not json', sign(b'not json', SECRET))
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_redeliveries_are_stored_once(self):
+        payment = self.make_payment(1)
+        body = self.captured(payment, 'pay_1')
+        self.deliver(body, event_id='evt_1')
+        self.deliver(body, event_id='evt_1')
+        self.deliver(body)
+        self.deliver(body)
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+
+    def test_batch_applies_captures_and_failures(self):
+        paid, failed, retried = self.make_payment(1), self.make_payment(2), self.make_payment(3)
+        reserve_stock({self.product.pk: 1}, 'webhook-retry', order=retried.order)
+        self.deliver(self.captured(paid, 'pay_1'))
+        self.deliver(event_body('payment.failed', payment={'id': 'pay_2', 'order_id': 'order_2'}))
+        self.deliver(event_body('payment.failed', payment={'id': 'pay_3a', 'order_id': 'order_3'}))
+        self.deliver(self.captured(retried, 'pay_3b'))
+        self.deliver(event_body('payment.captured', payment={'id': 'pay_9', 'order_id': 'order_9'}))
+        self.deliver(event_body('order.notification'))
+
+        self.assertEqual(process_pending(), 6)
+
+        statuses = dict(Payment.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {paid.pk: 'completed', failed.pk: 'failed', retried.pk: 'completed'})
+        orders = dict(Order.objects.values_list('pk', 'payment_status'))
+        self.assertEqual(orders, {paid.order_id: 'paid', failed.order_id: 'failed', retried.order_id: 'paid'})
+        self.assertEqual(Payment.objects.get(pk=retried.pk).transaction_id, 'pay_3b')
+        # The failed attempt kept its hold, so the capture that followed commits it.
+        self.assertEqual(StockReservation.objects.get(order=retried.order).status, 'committed')
+        self.assertEqual(
+            sorted(WebhookEvent.objects.values_list('status', flat=True)),
+            ['failed', 'ignored', 'processed', 'processed', 'processed', 'processed'],
+        )
+        self.assertEqual(process_pending(), 0)
+
+    def test_out_of_order_failure_does_not_undo_a_capture(self):
+        payment = self.make_payment(1)
+        self.deliver(self.captured(payment, 'pay_1'))
+        process_pending()
+        self.deliver(event_body('payment.failed', payment={'id': 'pay_0', 'order_id': 'order_1'}))
+        process_pending()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'completed')
+        self.assertEqual(Order.objects.get(pk=payment.order_id).payment_status, 'paid')
+
+    def test_refunds_settle_once_and_reach_the_sales_rollups(self):
+        payment = self.make_payment(
+            1, payment={'status': 'completed', 'transaction_id': 'pay_1'}, payment_status='paid', paid_at=timezone.now(),
+        )
+        apply_orders_sales([payment.order_id])
+
+        self.deliver(self.refunded('rfnd_1', 'pay_1', 30000))
+        self.deliver(self.refunded('rfnd_1', 'pay_1', 30000), event_id='evt_again')
+        process_pending()
+        order = Order.objects.get(pk=payment.order_id)
+        self.assertEqual(order.payment_status, 'partially_refunded')
+        self.assertEqual(list(Refund.objects.values_list('transaction_id', 'amount')), [('rfnd_1', Decimal('300.00'))])
+        self.assertTrue(
+            Job.objects.filter(name='orders.tasks.update_sales_rollups', payload__order_ids=[order.pk]).exists()
+        )
+        apply_orders_sales([order.pk])
+        self.assertEqual(DailySales.objects.get().refunds, Decimal('300.00'))
+
+        self.deliver(self.refunded('rfnd_2', 'pay_1', 70000))
+        process_pending()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'refunded')
+        self.assertEqual(Order.objects.get(pk=order.pk).payment_status, 'refunded')
+        apply_orders_sales([order.pk])
+        self.assertEqual(DailySales.objects.get().refunds, Decimal('1000.00'))
+
+    def test_refund_for_an_unknown_payment_fails_the_event(self):
+        self.deliver(self.refunded('rfnd_1', 'pay_missing', 1000))
+        process_pending()
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, 'failed')
+        self.assertIn('pay_missing', event.last_error)
+        self.assertFalse(Refund.objects.exists())
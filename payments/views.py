@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .webhooks import InvalidWebhook, receive_event
+
+
+class RazorpayWebhookView(APIView):
+    """Accept Razorpay webhooks: verify, store in the inbox and acknowledge straight away."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            receive_event(
+                request.body,
+                request.headers.get('X-Razorpay-Signature', ''),
+                request.headers.get('X-Razorpay-Event-Id'),
+            )
+        except InvalidWebhook as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"status": "ok"})
@@ -0,0 +1,80 @@
+"""Serialized product detail cache with strong ETags.
+
+Payloads live under the product id; slugs map to ids.  Any write to a
+product or one of its related rows deletes the payload after commit, so
+the next request re-serializes it.  That delete only reaches other
+processes through a shared backend; with a process-local one (locmem)
+payloads are kept for ``PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT`` seconds at
+most, which bounds how stale another worker's stock and prices can be.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+# Bump when the detail payload shape changes so old entries are ignored.
+PRODUCT_DETAIL_CACHE_VERSION = 1
+
+
+def get_cache():
+    return caches[getattr(settings, 'PRODUCT_DETAIL_CACHE_ALIAS', 'default')]
+
+
+def is_process_local(cache):
+    """Whether writes and deletes on ``cache`` stay inside this process."""
+    return isinstance(cache, LocMemCache)
+
+
+def detail_timeout(cache):
+    if is_process_local(cache):
+        return getattr(settings, 'PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT', 5)
+    return getattr(settings, 'PRODUCT_DETAIL_CACHE_TIMEOUT', 3600)
+
+
+def detail_key(product_id):
+    return f'products:detail:v{PRODUCT_DETAIL_CACHE_VERSION}:{product_id}'
+
+
+def slug_key(slug):
+    return f'products:slug:{slug}'
+
+
+def make_entry(data):
+    """Wrap a serialized payload with a strong ETag over its canonical JSON."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return {'etag': f'"{hashlib.sha1(body.encode()).hexdigest()}"', 'data': data}
+
+
+def get_product_detail(build, product_id=None, slug=None):
+    """Return ``{'etag', 'data'}`` for a product, serializing on a miss.
+
+    ``build(product_id=..., slug=...)`` loads and serializes the product and
+    returns None when it doesn't exist.
+    """
+    cache = get_cache()
+    timeout = detail_timeout(cache)
+    if product_id is None and slug is not None:
+        product_id = cache.get(slug_key(slug))
+    if product_id is not None:
+        entry = cache.get(detail_key(product_id))
+        # A renamed product keeps its old slug mapping until the entry is rebuilt.
+        if entry is not None and (slug is None or entry['data']['slug'] == slug):
+            return entry
+
+    data = build(product_id=product_id if slug is None else None, slug=slug)
+    if data is None:
+        return None
+    entry = make_entry(data)
+    cache.set_many({detail_key(data['id']): entry, slug_key(data['slug']): data['id']}, timeout)
+    return entry
+
+
+def invalidate_product_detail(product_ids):
+    """Drop the cached payloads once the surrounding transaction commits."""
+    keys = [detail_key(product_id) for product_id in set(product_ids)]
+    if keys:
+        transaction.on_commit(lambda: get_cache().delete_many(keys))
@@ -0,0 +1,216 @@
+"""Cart storage backends.
+
+Guests' carts live in a fast key-value store (any Django cache: Redis in
+production, locmem or file-based locally) under an opaque token and expire
+after ``GUEST_CART_TTL`` of inactivity, so anonymous browsing writes
+nothing to the database.  Signed-in users keep the ``Cart``/``CartItem``
+tables.  On login the guest cart is folded into the user's cart in bulk.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from techlaptops.db import delete_rows
+
+from .carts import build_guest_summary, get_cart_summary, invalidate_cart_summary
+from .models import Cart, CartItem, Product, ProductColor
+
+
+class CartStore:
+    """Interface shared by the guest and account cart backends.
+
+    Items are ``{(product_id, color_id): quantity}``; ``color_id`` is None for
+    products bought without a color choice.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def add(self, key, product_id, color_id=None, quantity=1):
+        items = self.get(key)
+        self.set(key, product_id, color_id, items.get((product_id, color_id), 0) + quantity)
+
+    def set(self, key, product_id, color_id, quantity):
+        raise NotImplementedError
+
+    def clear(self, key):
+        raise NotImplementedError
+
+    def summary(self, key):
+        raise NotImplementedError
+
+
+class CacheCartStore(CartStore):
+    """Guest carts in a Django cache, keyed by an opaque token, with a sliding TTL."""
+
+    key_prefix = 'products:guest-cart:'
+
+    def __init__(self, alias=None, ttl=None):
+        self.cache = caches[alias or getattr(settings, 'GUEST_CART_CACHE_ALIAS', 'default')]
+        self.ttl = ttl if ttl is not None else getattr(settings, 'GUEST_CART_TTL', 14 * 24 * 3600)
+
+    @staticmethod
+    def new_token():
+        return secrets.token_urlsafe(24)
+
+    def _key(self, token):
+        return f'{self.key_prefix}{token}'
+
+    def get(self, token):
+        items = self.cache.get(self._key(token))
+        if items is None:
+            return {}
+        self.cache.touch(self._key(token), self.ttl)
+        return items
+
+    def set(self, token, product_id, color_id, quantity):
+        items = self.get(token)
+        if quantity > 0:
+            items[(product_id, color_id)] = quantity
+        else:
+            items.pop((product_id, color_id), None)
+        if items:
+            self.cache.set(self._key(token), items, self.ttl)
+        else:
+            self.clear(token)
+
+    def clear(self, token):
+        self.cache.delete(self._key(token))
+
+    def summary(self, token):
+        return build_guest_summary(self.get(token))
+
+
+class DatabaseCartStore(CartStore):
+    """Signed-in users' carts in the ``Cart``/``CartItem`` tables, keyed by user id."""
+
+    def get(self, user_id):
+        return {
+            (product_id, color_id): quantity
+            for product_id, color_id, quantity in CartItem.objects.filter(cart__user_id=user_id).values_list(
+                'product_id', 'color_id', 'quantity'
+            )
+        }
+
+    def set(self, user_id, product_id, color_id, quantity):
+        cart, _ = Cart.objects.get_or_create(user_id=user_id)
+        if quantity > 0:
+            CartItem.objects.update_or_create(
+                cart=cart, product_id=product_id, color_id=color_id, defaults={'quantity': quantity}
+            )
+        else:
+            for item in CartItem.objects.filter(cart=cart, product_id=product_id, color_id=color_id):
+                item.delete()
+
+    def clear(self, user_id):
+        cart_ids = list(Cart.objects.filter(user_id=user_id).values_list('pk', flat=True))
+        CartItem.objects.filter(cart_id__in=cart_ids).delete()
+        invalidate_cart_summary(cart_ids)
+
+    def summary(self, user_id):
+        cart = Cart.objects.filter(user_id=user_id).only('pk').first()
+        if cart is None:
+            return build_guest_summary({})
+        return get_cart_summary(cart.pk)
+
+
+def get_guest_cart_store():
+    path = getattr(settings, 'GUEST_CART_STORE', 'products.cart_store.CacheCartStore')
+    return import_string(path)()
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_guest_cart_cache(app_configs, **kwargs):
+    """Guest carts need a cache every worker shares and that does not cull live entries."""
+    path = getattr(settings, 'GUEST_CART_STORE', 'products.cart_store.CacheCartStore')
+    if settings.DEBUG or not issubclass(import_string(path), CacheCartStore):
+        return []
+    alias = getattr(settings, 'GUEST_CART_CACHE_ALIAS', 'default')
+    if not isinstance(caches[alias], (LocMemCache, FileBasedCache)):
+        return []
+    return [checks.Error(
+        f"Guest carts are stored in the '{alias}' cache, a {type(caches[alias]).__name__}.",
+        hint=(
+            'It is per-process or per-host and culls at MAX_ENTRIES, so carts vanish between workers and '
+            "under load. Set CACHE_URL to a redis:// server, or GUEST_CART_STORE to "
+            "'products.cart_store.DatabaseCartStore'."
+        ),
+        id='products.E001',
+    )]
+
+
+def merge_guest_cart(token, user, store=None):
+    """Fold a guest cart into ``user``'s cart and drop it; returns the number of lines merged.
+
+    Quantities for lines already in the user's cart are added together.  The
+    merge costs a fixed handful of queries however many lines it carries.
+    """
+    store = store or get_guest_cart_store()
+    items = store.get(token)
+    if not items:
+        return 0
+    product_ids = set(
+        Product.objects.filter(pk__in={product_id for product_id, _ in items}, is_active=True)
+        .values_list('pk', flat=True)
+    )
+    colors = dict(
+        ProductColor.objects.filter(pk__in={color_id for _, color_id in items if color_id})
+        .values_list('pk', 'product_id')
+    )
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        existing = {
+            (item.product_id, item.color_id): item
+            for item in CartItem.objects.select_for_update().filter(cart=cart)
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+        for (product_id, color_id), quantity in items.items():
+            if product_id not in product_ids:
+                continue
+            if color_id is not None and colors.get(color_id) != product_id:
+                color_id = None
+            item = existing.get((product_id, color_id))
+            if item is None:
+                item = CartItem(cart=cart, product_id=product_id, color_id=color_id, quantity=quantity)
+                existing[(product_id, color_id)] = item
+                to_create.append(item)
+            else:
+                item.quantity += quantity
+                item.updated_at = now
+                if item.pk:
+                    to_update.append(item)
+        CartItem.objects.bulk_create(to_create)
+        CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+        Cart.objects.filter(pk=cart.pk).update(updated_at=now)
+        # Bulk writes skip the CartItem signals.
+        invalidate_cart_summary([cart.pk])
+    store.clear(token)
+    return len(to_create) + len(to_update)
+
+
+def purge_guest_carts(max_age=None):
+    """Delete guest carts left in the database by the old session-keyed storage.
+
+    Carts in the guest store expire on their own through the cache TTL.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'GUEST_CART_TTL', 14 * 24 * 3600)
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    stale = Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff)
+    cart_ids = list(stale.values_list('pk', flat=True)[:10000])
+    deleted = 0
+    while cart_ids:
+        delete_rows(CartItem, 'cart', cart_ids)
+        deleted += delete_rows(Cart, 'id', cart_ids)
+        cart_ids = list(stale.values_list('pk', flat=True)[:10000])
+    return deleted
@@ -0,0 +1,146 @@
+"""Cart totals computed in the database.
+
+Unit prices (sale price when on sale, plus the color's price adjustment)
+and line totals are annotated onto the cart items in a single query.  The
+resulting summary is cached per cart together with a stamp of what it was
+priced from: the cart's lines and their products' ``updated_at`` and color
+adjustments.  A read whose stamp differs rebuilds it, so a price change
+reaches every worker, even on a process-local cache, and writes elsewhere
+in the catalog leave the summary alone.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import get_cache
+from .models import CartItem, Product, ProductColor
+
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def unit_price_expression():
+    base = Case(
+        When(product__is_on_sale=True, product__sale_price__isnull=False, then=F('product__sale_price')),
+        default=F('product__price'),
+        output_field=MONEY,
+    )
+    return base + Coalesce(F('color__price_adjustment'), Value(Decimal('0')), output_field=MONEY)
+
+
+def priced_items(cart_id):
+    """Cart items with ``price_each`` and ``amount`` computed in SQL."""
+    price = unit_price_expression()
+    return (
+        CartItem.objects.filter(cart_id=cart_id)
+        .annotate(price_each=price, amount=price * F('quantity'))
+        .order_by('added_at', 'pk')
+    )
+
+
+def summary_key(cart_id):
+    return f'products:cart-summary:{cart_id}'
+
+
+def summary_stamp(cart_id):
+    """Digest of the cart's lines and the change stamps of what prices them."""
+    lines = CartItem.objects.filter(cart_id=cart_id).order_by('pk').values_list(
+        'pk', 'product_id', 'color_id', 'quantity', 'product__updated_at', 'color__name', 'color__price_adjustment',
+    )
+    return hashlib.blake2b(repr(list(lines)).encode(), digest_size=8).hexdigest()
+
+
+def build_cart_summary(cart_id):
+    lines = [
+        {
+            'id': row['pk'],
+            'product_id': row['product_id'],
+            'product_name': row['product__name'],
+            'product_slug': row['product__slug'],
+            'color': row['color__name'],
+            'quantity': row['quantity'],
+            'unit_price': row['price_each'].quantize(CENT),
+            'line_total': row['amount'].quantize(CENT),
+        }
+        for row in priced_items(cart_id).values(
+            'pk', 'product_id', 'product__name', 'product__slug', 'color__name', 'quantity', 'price_each', 'amount',
+        )
+    ]
+    return {
+        'total_items': sum(line['quantity'] for line in lines),
+        'subtotal': sum((line['line_total'] for line in lines), Decimal('0.00')),
+        'lines': lines,
+    }
+
+
+def get_cart_summary(cart_id):
+    """Return ``{'total_items', 'subtotal', 'lines'}`` for a cart, from cache when possible."""
+    cache = get_cache()
+    key = summary_key(cart_id)
+    stamp = summary_stamp(cart_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    summary = build_cart_summary(cart_id)
+    cache.set(key, (stamp, summary), getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 900))
+    return summary
+
+
+def invalidate_cart_summary(cart_ids):
+    """Drop cached summaries once the surrounding transaction commits."""
+    cart_ids = set(cart_ids)
+    if cart_ids:
+        transaction.on_commit(lambda: get_cache().delete_many([summary_key(cart_id) for cart_id in cart_ids]))
+
+
+def build_guest_summary(items):
+    """Price ``{(product_id, color_id): quantity}`` from the guest store like a cart summary."""
+    if not items:
+        return {'total_items': 0, 'subtotal': Decimal('0.00'), 'lines': []}
+    product_ids = {product_id for product_id, _ in items}
+    color_ids = {color_id for _, color_id in items if color_id}
+    current = Case(
+        When(is_on_sale=True, sale_price__isnull=False, then=F('sale_price')),
+        default=F('price'),
+        output_field=MONEY,
+    )
+    products = {
+        row['pk']: row
+        for row in Product.objects.filter(pk__in=product_ids, is_active=True)
+        .annotate(price_each=current)
+        .values('pk', 'name', 'slug', 'price_each')
+    }
+    colors = {}
+    if color_ids:
+        colors = {
+            row['pk']: row
+            for row in ProductColor.objects.filter(pk__in=color_ids).values('pk', 'product_id', 'name', 'price_adjustment')
+        }
+    lines = []
+    for (product_id, color_id), quantity in items.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        color = colors.get(color_id)
+        if color is not None and color['product_id'] != product_id:
+            color = None
+        unit_price = (product['price_each'] + (color['price_adjustment'] if color else 0)).quantize(CENT)
+        lines.append({
+            'id': None,
+            'product_id': product_id,
+            'product_name': product['name'],
+            'product_slug': product['slug'],
+            'color': color['name'] if color else None,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'line_total': unit_price * quantity,
+        })
+    return {
+        'total_items': sum(line['quantity'] for line in lines),
+        'subtotal': sum((line['line_total'] for line in lines), Decimal('0.00')),
+        'lines': lines,
+    }
@@ -0,0 +1,181 @@
+import hashlib
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Prefetch
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import CatalogVersion, Product, ProductCard, ProductColor, ProductImage
+from .specs import SPEC_FIELDS
+
+CARD_UPDATE_FIELDS = [
+    'name', 'slug', 'sku', 'short_description', 'brand_id', 'brand_name', 'brand_slug',
+    'categories', 'primary_image', 'primary_image_alt', 'colors', 'price', 'sale_price',
+    'current_price', 'discount_percentage', 'is_on_sale', 'is_featured', 'availability',
+    'is_in_stock', 'rating_average', 'rating_count', 'scoring_key', 'created_at', 'refreshed_at',
+    *SPEC_FIELDS,
+]
+
+# What products.recommendations scores a card on, besides the product's graphics string.
+SCORING_FIELDS = [
+    'is_in_stock', 'current_price', 'cpu_family', 'cpu_generation', 'ram_gb', 'storage_gb',
+    'weight_kg', 'battery_hours', 'screen_inches', 'rating_average',
+]
+SCORING_VERSION = 'recommendation-scoring'
+
+# Sent with ``product_ids`` after their cards were rebuilt or removed.
+cards_refreshed = Signal()
+
+
+def _review_stats(product_ids):
+    """Return {product_id: (average, count)} from the maintained rating summaries."""
+    from reviews.models import RatingSummary
+
+    return {
+        summary.product_id: (summary.average, summary.count)
+        for summary in RatingSummary.objects.filter(product_id__in=product_ids, count__gt=0)
+    }
+
+
+def build_card(product, review_stats=None):
+    """Build an unsaved ProductCard from a product with its relations prefetched."""
+    images = list(product.images.all())
+    primary = next((image for image in images if image.is_primary), images[0] if images else None)
+    average, count = (review_stats or {}).get(product.pk, (0, 0))
+    return ProductCard(
+        product=product,
+        name=product.name,
+        slug=product.slug,
+        sku=product.sku,
+        short_description=product.short_description,
+        brand_id=product.brand_id,
+        brand_name=product.brand.name,
+        brand_slug=product.brand.slug,
+        categories=[
+            {'id': category.id, 'name': category.name, 'slug': category.slug}
+            for category in product.categories.all()
+        ],
+        primary_image=primary.image.name if primary else '',
+        primary_image_alt=primary.alt_text if primary else '',
+        colors=[
+            {'id': color.id, 'name': color.name, 'color_code': color.color_code}
+            for color in product.colors.all()
+        ],
+        price=product.price,
+        sale_price=product.sale_price,
+        current_price=product.current_price,
+        discount_percentage=product.discount_percentage,
+        is_on_sale=product.is_on_sale,
+        is_featured=product.is_featured,
+        availability=product.availability,
+        is_in_stock=product.is_in_stock,
+        rating_average=round(average, 2),
+        rating_count=count,
+        created_at=product.created_at,
+        **{field: getattr(product, field) for field in SPEC_FIELDS},
+    )
+
+
+def scoring_key(card, graphics):
+    """Short digest of the scored values, so stock churn can be told apart from a scoring change."""
+    values = [str(_stored_value(card, field)) for field in SCORING_FIELDS] + [graphics]
+    return hashlib.blake2b('\x1f'.join(values).encode(), digest_size=8).hexdigest()
+
+
+def _stored_value(card, name):
+    """The value as it reads back from the database, so built and loaded cards digest alike."""
+    value = getattr(card, name)
+    field = ProductCard._meta.get_field(name)
+    if value is not None and isinstance(field, DecimalField):
+        value = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def catalog_counter(name):
+    return CatalogVersion.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
+def bump_catalog_counter(name):
+    CatalogVersion.objects.bulk_create([CatalogVersion(name=name)], ignore_conflicts=True)
+    CatalogVersion.objects.filter(name=name).update(value=F('value') + 1)
+
+
+def card_source_queryset():
+    """Products eligible for a card, with everything build_card needs prefetched."""
+    return (
+        Product.objects.filter(is_active=True, brand__is_active=True)
+        .select_related('brand')
+        .prefetch_related(
+            'categories',
+            Prefetch('images', queryset=ProductImage.objects.order_by('-is_primary', 'order', 'id')),
+            Prefetch('colors', queryset=ProductColor.objects.filter(is_available=True)),
+        )
+    )
+
+
+def refresh_product_cards(product_ids):
+    """Rebuild the cards for the given products in a fixed number of queries.
+
+    Products that no longer exist or are no longer listable lose their card.
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+    products = list(card_source_queryset().filter(pk__in=product_ids))
+    stats = _review_stats([product.pk for product in products])
+    cards = [build_card(product, stats) for product in products]
+    for card, product in zip(cards, products):
+        card.scoring_key = scoring_key(card, product.graphics)
+    with transaction.atomic():
+        previous = dict(
+            ProductCard.objects.filter(product_id__in=product_ids).values_list('product_id', 'scoring_key')
+        )
+        stale = product_ids - {product.pk for product in products}
+        if stale:
+            ProductCard.objects.filter(product_id__in=stale).delete()
+        if stale & previous.keys() or any(previous.get(card.product_id) != card.scoring_key for card in cards):
+            # Stock and detail edits leave the key alone; only these make the recommendation matrix stale.
+            bump_catalog_counter(SCORING_VERSION)
+        if cards:
+            ProductCard.objects.bulk_create(
+                cards,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=CARD_UPDATE_FIELDS,
+            )
+    cards_refreshed.send(sender=ProductCard, product_ids=product_ids)
+    return len(cards)
+
+
+def refresh_stock_flags(product_ids):
+    """Update ``is_in_stock`` on the cards whose product's stock crossed zero.
+
+    Conditional stock updates bypass the Product signals; most of them
+    leave every card as it was, so this costs one query and only flipped
+    cards are written, with their scoring key.  Returns the flipped ids.
+    """
+    cards = list(
+        ProductCard.objects.filter(product_id__in=list(product_ids))
+        .annotate(stock_quantity=F('product__stock_quantity'), graphics=F('product__graphics'))
+        .only('product_id', 'is_in_stock', 'availability', *SCORING_FIELDS)
+    )
+    flipped = []
+    for card in cards:
+        in_stock = card.stock_quantity > 0 and card.availability == 'in_stock'
+        if card.is_in_stock != in_stock:
+            card.is_in_stock = in_stock
+            card.scoring_key = scoring_key(card, card.graphics)
+            card.refreshed_at = timezone.now()
+            flipped.append(card)
+    if flipped:
+        ProductCard.objects.bulk_update(flipped, ['is_in_stock', 'scoring_key', 'refreshed_at'])
+        bump_catalog_counter(SCORING_VERSION)
+    return [card.product_id for card in flipped]
+
+
+def schedule_card_refresh(product_ids):
+    """Refresh cards once the surrounding transaction commits."""
+    product_ids = set(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: refresh_product_cards(product_ids))
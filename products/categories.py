@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Category, CategoryClosure
+
+CATEGORY_TREE_CACHE_KEY = 'products:category-tree'
+
+
+def subtree_product_counts():
+    """Return {category_id: active products in the category and everything below it}."""
+    rows = (
+        CategoryClosure.objects.values('ancestor_id')
+        .annotate(count=Count(
+            'descendant__products',
+            filter=Q(descendant__products__is_active=True),
+            distinct=True,
+        ))
+    )
+    return {row['ancestor_id']: row['count'] for row in rows}
+
+
+def build_category_tree():
+    """Nest the active categories under their parents, with subtree product counts."""
+    counts = subtree_product_counts()
+    nodes = {}
+    for category in Category.objects.filter(is_active=True).values('id', 'name', 'slug', 'parent_id'):
+        nodes[category['id']] = {
+            'id': category['id'],
+            'name': category['name'],
+            'slug': category['slug'],
+            'parent_id': category['parent_id'],
+            'product_count': counts.get(category['id'], 0),
+            'children': [],
+        }
+    roots = []
+    for node in nodes.values():
+        parent_id = node.pop('parent_id')
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]['children'].append(node)
+        # Children of an inactive category are hidden along with it.
+    return roots
+
+
+def get_category_tree():
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, getattr(settings, 'CATEGORY_TREE_CACHE_TIMEOUT', 300))
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
+
+
+def rebuild_closure():
+    """Recompute the closure table from the parent pointers."""
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    links = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    CategoryClosure.objects.all().delete()
+    CategoryClosure.objects.bulk_create(links, batch_size=1000)
+    invalidate_category_tree()
+    return len(links)
@@ -0,0 +1,132 @@
+"""Side-by-side product comparison with server-side spec diffing."""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .cache import get_cache
+from .models import Product, ProductColor
+from .recommendations import cpu_score, gpu_score
+from .serializers import ProductColorSerializer, ProductFeatureSerializer
+
+MAX_COMPARE_PRODUCTS = 6
+
+# (key, label, raw display attribute, comparable value, which end wins)
+SPEC_ROWS = [
+    ('price', 'Price', 'current_price', lambda p: p.current_price, 'min'),
+    ('processor', 'Processor', 'processor', lambda p: cpu_score(p.cpu_family, p.cpu_generation), 'max'),
+    ('ram', 'Memory', 'ram', lambda p: p.ram_gb, 'max'),
+    ('storage', 'Storage', 'storage', lambda p: p.storage_gb, 'max'),
+    ('display', 'Display', 'display', lambda p: p.screen_inches, None),
+    ('graphics', 'Graphics', 'graphics', lambda p: gpu_score(p.graphics), 'max'),
+    ('weight', 'Weight', 'weight', lambda p: p.weight_kg, 'min'),
+    ('battery_life', 'Battery life', 'battery_life', lambda p: p.battery_hours, 'max'),
+    ('operating_system', 'Operating system', 'operating_system', None, None),
+    ('dimensions', 'Dimensions', 'dimensions', None, None),
+    ('warranty', 'Warranty', 'warranty', None, None),
+    ('rating', 'Rating', None, lambda p: _rating(p), 'max'),
+]
+
+
+def _rating(product):
+    card = getattr(product, 'card', None)
+    return card.rating_average if card and card.rating_count else None
+
+
+def _is_missing(value):
+    # NaN from the CPU/GPU scorers never equals itself.
+    return value is None or value != value
+
+
+def compare_key(product_ids):
+    """Key on the compared products' own change stamps, so unrelated catalog writes keep the entry."""
+    stamps = Product.objects.filter(pk__in=product_ids).order_by('pk').values_list('pk', 'updated_at', 'card__refreshed_at')
+    digest = hashlib.blake2b(repr(list(stamps)).encode(), digest_size=8).hexdigest()
+    ids = '-'.join(str(product_id) for product_id in product_ids)
+    return f'products:compare:{ids}:{digest}'
+
+
+def load_products(product_ids):
+    """Load the products with everything the comparison needs in a fixed number of queries."""
+    return list(
+        Product.objects.filter(pk__in=product_ids, is_active=True)
+        .select_related('brand', 'card')
+        .prefetch_related(
+            'features',
+            Prefetch('colors', queryset=ProductColor.objects.filter(is_available=True)),
+            'images',
+        )
+    )
+
+
+def diff_rows(products):
+    rows = []
+    for key, label, attribute, comparable, winner in SPEC_ROWS:
+        display = [getattr(product, attribute) if attribute else _rating(product) for product in products]
+        values = [comparable(product) if comparable else None for product in products]
+        best = []
+        known = [(value, i) for i, value in enumerate(values) if not _is_missing(value)]
+        if winner and len(known) > 1:
+            target = (min if winner == 'min' else max)(value for value, _ in known)
+            if any(value != target for value, _ in known):
+                best = [i for value, i in known if value == target]
+        rows.append({
+            'key': key,
+            'label': label,
+            'values': [str(value) if value not in (None, '') else None for value in display],
+            'differs': len({str(value) for value in display}) > 1,
+            'best': best,
+        })
+    return rows
+
+
+def build_comparison(product_ids):
+    products = {product.pk: product for product in load_products(product_ids)}
+    ordered = [products[product_id] for product_id in product_ids if product_id in products]
+    return {
+        'products': [
+            {
+                'id': product.pk,
+                'name': product.name,
+                'slug': product.slug,
+                'brand': product.brand.name,
+                'image': next((image.image.name for image in product.images.all() if image.is_primary), None),
+                'price': str(product.price),
+                'current_price': str(product.current_price),
+                'colors': ProductColorSerializer(product.colors.all(), many=True).data,
+                'features': ProductFeatureSerializer(product.features.all(), many=True).data,
+            }
+            for product in ordered
+        ],
+        'specs': diff_rows(ordered),
+    }
+
+
+def in_requested_order(comparison, product_ids):
+    """Reorder a comparison built in id order to follow ``product_ids``."""
+    position = {product['id']: i for i, product in enumerate(comparison['products'])}
+    order = [position[product_id] for product_id in product_ids if product_id in position]
+    moved_to = {old: new for new, old in enumerate(order)}
+    return {
+        'products': [comparison['products'][i] for i in order],
+        'specs': [
+            {**row, 'values': [row['values'][i] for i in order], 'best': sorted(moved_to[i] for i in row['best'])}
+            for row in comparison['specs']
+        ],
+    }
+
+
+def compare_products(product_ids):
+    """Return the comparison for the given ids in the order asked for.
+
+    It is cached once per set of ids, built in id order.
+    """
+    requested = list(dict.fromkeys(product_ids))
+    product_ids = sorted(requested)
+    cache = get_cache()
+    key = compare_key(product_ids)
+    comparison = cache.get(key)
+    if comparison is None:
+        comparison = build_comparison(product_ids)
+        cache.set(key, comparison, getattr(settings, 'COMPARE_CACHE_TIMEOUT', 3600))
+    return in_requested_order(comparison, requested)
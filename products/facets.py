@@ -0,0 +1,264 @@
+"""Per-process faceted search over the product card table.
+
+Each facet value keeps a posting bitmap (a Python int, one bit per product
+slot), so a filtered result set and every facet count come out of a few
+ANDs and popcounts.  The index follows ``cards_refreshed`` in this process
+and polls the card table for writes made by other workers.
+"""
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.dispatch import receiver
+
+from .catalog import cards_refreshed
+from .models import ProductCard
+
+RAM_TIERS = [
+    (8, '8gb-or-less'),
+    (16, '16gb'),
+    (32, '32gb'),
+    (None, '64gb-plus'),
+]
+
+PRICE_BUCKETS = [
+    (Decimal('50000'), 'under-50000'),
+    (Decimal('75000'), '50000-75000'),
+    (Decimal('100000'), '75000-100000'),
+    (Decimal('150000'), '100000-150000'),
+    (None, '150000-plus'),
+]
+
+FACETS = ['brand', 'category', 'ram', 'price', 'availability']
+
+CARD_FIELDS = ['product_id', 'brand_slug', 'categories', 'ram_gb', 'current_price', 'availability', 'created_at']
+
+
+def _bucket(value, buckets):
+    if value is None:
+        return None
+    for upper, label in buckets:
+        if upper is None or value <= upper:
+            return label
+    return None
+
+
+def card_facet_values(card):
+    """Return {facet: [values]} for a card (or a values() row of one)."""
+    get = card.get if isinstance(card, dict) else lambda name: getattr(card, name)
+    ram = _bucket(get('ram_gb'), RAM_TIERS)
+    return {
+        'brand': [get('brand_slug')],
+        'category': [category['slug'] for category in get('categories') or []],
+        'ram': [ram] if ram else [],
+        'price': [_bucket(get('current_price'), PRICE_BUCKETS)],
+        'availability': [get('availability')],
+    }
+
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+
+def _set_slots(bits):
+    """The slots whose bit is set, ascending, unpacked in C rather than bit by bit."""
+    if not bits:
+        return np.empty(0, dtype=np.int64)
+    data = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder='little'))
+
+
+class FacetIndex:
+    """Bitmap postings per facet value, answering results and counts together."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.postings = {facet: {} for facet in FACETS}
+        self.slots = {}           # product id -> slot
+        self.slot_products = []   # slot -> product id (None when free)
+        self.slot_values = []     # slot -> facet values, used to unindex
+        self.slot_sort_keys = []  # slot -> created_at, for result ordering
+        self.free_slots = []
+        self.all_bits = 0
+        self._order = None
+        self.watermark = None
+        self.card_count = 0
+        self.checked_at = 0.0
+        self.ready = False
+
+    # -- maintenance -------------------------------------------------------
+
+    def rebuild(self):
+        """Load every card into a fresh index."""
+        rows = ProductCard.objects.values(*CARD_FIELDS, 'refreshed_at').iterator(chunk_size=2000)
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(row)
+                if self.watermark is None or row['refreshed_at'] > self.watermark:
+                    self.watermark = row['refreshed_at']
+            self.card_count = len(self.slots)
+            self.checked_at = time.monotonic()
+            self.ready = True
+
+    def update(self, product_ids):
+        """Re-index the given products from the card table."""
+        if not self.ready:
+            return
+        product_ids = set(product_ids)
+        rows = ProductCard.objects.filter(product_id__in=product_ids).values(*CARD_FIELDS)
+        rows = {row['product_id']: row for row in rows}
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+                if product_id in rows:
+                    self._add(rows[product_id])
+            self.card_count = len(self.slots)
+
+    def sync(self):
+        """Pick up cards written by other processes since the last check."""
+        with self._lock:
+            interval = getattr(settings, 'FACET_INDEX_SYNC_INTERVAL', 30)
+            if not self.ready:
+                self.rebuild()
+                return
+            if time.monotonic() - self.checked_at < interval:
+                return
+            self.checked_at = time.monotonic()
+            watermark = self.watermark
+        changed = ProductCard.objects.all()
+        if watermark is not None:
+            # refreshed_at is stamped before commit, so a transaction committing after a newer one can
+            # carry an older stamp; re-reading a window behind the watermark picks those up too.
+            overlap = timedelta(seconds=getattr(settings, 'FACET_INDEX_SYNC_OVERLAP', 120))
+            changed = changed.filter(refreshed_at__gt=watermark - overlap)
+        changed = list(changed.values_list('product_id', 'refreshed_at'))
+        total = ProductCard.objects.count()
+        if changed:
+            self.update(product_id for product_id, _ in changed)
+            with self._lock:
+                self.watermark = max([refreshed_at for _, refreshed_at in changed] + [watermark])
+        if total != self.card_count:
+            # Cards were deleted elsewhere; deletions leave no watermark trace.
+            self.rebuild()
+
+    def _add(self, row):
+        product_id = row['product_id']
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.slot_products)
+            self.slot_products.append(None)
+            self.slot_values.append(None)
+            self.slot_sort_keys.append(None)
+        values = card_facet_values(row)
+        bit = 1 << slot
+        for facet, facet_values in values.items():
+            postings = self.postings[facet]
+            for value in facet_values:
+                postings[value] = postings.get(value, 0) | bit
+        self.slots[product_id] = slot
+        self.slot_products[slot] = product_id
+        self.slot_values[slot] = values
+        self.slot_sort_keys[slot] = row['created_at']
+        self.all_bits |= bit
+        self._order = None
+
+    def _remove(self, product_id):
+        slot = self.slots.pop(product_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        for facet, facet_values in self.slot_values[slot].items():
+            postings = self.postings[facet]
+            for value in facet_values:
+                remaining = postings[value] & ~bit
+                if remaining:
+                    postings[value] = remaining
+                else:
+                    del postings[value]
+        self.slot_products[slot] = None
+        self.slot_values[slot] = None
+        self.slot_sort_keys[slot] = None
+        self.all_bits &= ~bit
+        self.free_slots.append(slot)
+        self._order = None
+
+    def _slot_ranks(self):
+        """Listing position (newest product first) of every slot; free slots rank last."""
+        if self._order is None:
+            occupied = list(self.slots.values())
+            occupied.sort(key=lambda slot: (self.slot_sort_keys[slot], self.slot_products[slot]), reverse=True)
+            ranks = np.full(len(self.slot_products), len(occupied), dtype=np.int64)
+            ranks[occupied] = np.arange(len(occupied))
+            self._order = ranks
+        return self._order
+
+    # -- queries -----------------------------------------------------------
+
+    def search(self, filters, offset=0, limit=None):
+        """Apply ``{facet: [values]}`` filters.
+
+        Values within a facet are OR-ed, facets are AND-ed.  Each facet's
+        counts ignore that facet's own selection, so toggling a value shows
+        what the other values would add.  Returns ``(total, product_ids,
+        counts)`` with product ids for the requested window.
+        """
+        self.sync()
+        with self._lock:
+            masks = {}
+            for facet, values in filters.items():
+                if facet not in self.postings or not values:
+                    continue
+                postings = self.postings[facet]
+                mask = 0
+                for value in values:
+                    mask |= postings.get(value, 0)
+                masks[facet] = mask
+
+            matched = self.all_bits
+            for mask in masks.values():
+                matched &= mask
+
+            counts = {}
+            for facet, postings in self.postings.items():
+                base = self.all_bits
+                for other, mask in masks.items():
+                    if other != facet:
+                        base &= mask
+                counts[facet] = {
+                    value: count
+                    for value, count in ((value, _popcount(bits & base)) for value, bits in postings.items())
+                    if count
+                }
+
+            slots = _set_slots(matched)
+            total = len(slots)
+            end = total if limit is None else min(offset + limit, total)
+            product_ids = []
+            if offset < end:
+                ranks = self._slot_ranks()[slots]
+                # Only the first ``end`` matches in listing order need sorting.
+                window = np.argpartition(ranks, end - 1)[:end] if end < total else np.arange(total)
+                window = window[np.argsort(ranks[window])][offset:]
+                product_ids = [self.slot_products[slot] for slot in slots[window].tolist()]
+        return total, product_ids, counts
+
+
+facet_index = FacetIndex()
+
+
+def warm_up():
+    """Build the index up front so the first catalog request doesn't pay for it."""
+    facet_index.rebuild()
+
+
+@receiver(cards_refreshed)
+def update_facet_index(sender, product_ids, **kwargs):
+    facet_index.update(product_ids)
@@ -0,0 +1,322 @@
+"""Streaming catalog import/export for distributor feeds (CSV or JSONL).
+
+Rows are processed in chunks: brands, categories and existing SKUs are
+resolved with one query each, products are written with bulk_create /
+bulk_update, and category links and images go straight into their tables
+in batches.  Bulk writes skip model signals, so each chunk refreshes the
+derived read models (cards, search documents, detail cache) explicitly.
+"""
+import csv
+import json
+import uuid
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from techlaptops.db import delete_rows
+
+from .cache import invalidate_product_detail
+from .catalog import refresh_product_cards
+from .categories import invalidate_category_tree
+from .models import Brand, Category, Product, ProductImage
+from .search import refresh_search_documents
+from .specs import SPEC_FIELDS, apply_normalized_specs
+
+PRODUCT_FIELDS = [
+    'name', 'description', 'short_description', 'price', 'sale_price', 'is_on_sale',
+    'stock_quantity', 'availability', 'is_featured', 'is_active', 'processor', 'ram',
+    'storage', 'display', 'graphics', 'operating_system', 'weight', 'dimensions',
+    'battery_life', 'warranty',
+]
+FEED_FIELDS = ['sku', 'slug', 'brand', 'categories', 'images', *PRODUCT_FIELDS]
+LIST_SEPARATOR = '|'
+SLUG_PREFIX_BATCH = 100
+
+DECIMAL_FIELDS = {'price', 'sale_price'}
+BOOLEAN_FIELDS = {'is_on_sale', 'is_featured', 'is_active'}
+INTEGER_FIELDS = {'stock_quantity'}
+AVAILABILITY_VALUES = {value for value, _ in Product.AVAILABILITY_CHOICES}
+
+
+class FeedError(ValueError):
+    """A feed row that cannot be imported."""
+
+
+def read_rows(stream, fmt):
+    """Yield dict rows from a CSV or JSONL text stream without loading it whole."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    # Passed on in place of the row so the importer records it with its line number.
+                    yield FeedError(f'invalid JSON: {exc}')
+
+
+def _split(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or '').split(LIST_SEPARATOR) if item.strip()]
+
+
+def _clean_value(field, value):
+    if field in DECIMAL_FIELDS:
+        if value in (None, ''):
+            if field == 'price':
+                raise FeedError('price is required')
+            return None
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise FeedError(f'{field} is not a number: {value!r}')
+    if field in BOOLEAN_FIELDS:
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+    if field in INTEGER_FIELDS:
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            raise FeedError(f'{field} is not an integer: {value!r}')
+    if field == 'availability':
+        value = value or 'in_stock'
+        if value not in AVAILABILITY_VALUES:
+            raise FeedError(f'unknown availability {value!r}')
+        return value
+    return '' if value is None else str(value)
+
+
+def clean_row(row):
+    """Validate one feed row into (sku, brand, categories, images, slug, {field: value})."""
+    name = (row.get('name') or '').strip()
+    brand = (row.get('brand') or '').strip()
+    if not name:
+        raise FeedError('name is required')
+    if not brand:
+        raise FeedError('brand is required')
+    values = {field: _clean_value(field, row.get(field)) for field in PRODUCT_FIELDS if field in row or field == 'price'}
+    values['name'] = name
+    sku = (row.get('sku') or '').strip()
+    return sku, brand, _split(row.get('categories')), _split(row.get('images')), (row.get('slug') or '').strip(), values
+
+
+class CatalogImporter:
+    """Upsert feed rows into the catalog, keyed by SKU."""
+
+    def __init__(self, chunk_size=1000, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.brands = {}
+        self.categories = {}
+        self.seen_slugs = set()
+
+    def run(self, rows):
+        self._load_lookups()
+        numbered = enumerate(rows, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        if not self.dry_run:
+            invalidate_category_tree()
+        return self
+
+    def _load_lookups(self):
+        for brand_id, name, slug in Brand.objects.values_list('id', 'name', 'slug'):
+            self.brands[slug] = self.brands[name.lower()] = brand_id
+        for category_id, name, slug in Category.objects.values_list('id', 'name', 'slug'):
+            self.categories[slug] = self.categories[name.lower()] = category_id
+
+    def _brand_id(self, value):
+        key = value.lower()
+        if key not in self.brands and slugify(value) not in self.brands:
+            brand = Brand(name=value)
+            if not self.dry_run:
+                brand.save()
+            self.brands[key] = self.brands[brand.slug] = brand.pk
+        return self.brands.get(key, self.brands.get(slugify(value)))
+
+    def _category_id(self, value):
+        key = value.lower()
+        if key not in self.categories and slugify(value) not in self.categories:
+            # Category.save maintains the closure table, so new categories are saved one by one;
+            # feeds introduce few of them compared to products.
+            category = Category(name=value)
+            if not self.dry_run:
+                category.save()
+            self.categories[key] = self.categories[category.slug] = category.pk
+        return self.categories.get(key, self.categories.get(slugify(value)))
+
+    def import_chunk(self, chunk):
+        cleaned = {}
+        for line, row in chunk:
+            try:
+                if isinstance(row, FeedError):
+                    raise row
+                sku, *rest = clean_row(row)
+            except (FeedError, AttributeError) as exc:
+                self.errors.append((line, str(exc)))
+                continue
+            # A SKU repeated within a chunk keeps its last row.
+            cleaned[sku or f'__line_{line}'] = (sku, *rest)
+        cleaned = list(cleaned.values())
+
+        skus = [sku for sku, *_ in cleaned if sku]
+        existing = {product.sku: product for product in Product.objects.filter(sku__in=skus)}
+        new_rows = [row for row in cleaned if row[0] not in existing]
+        slugs = iter(self._resolve_slugs([slug or slugify(values['name']) for _, _, _, _, slug, values in new_rows]))
+
+        to_create, to_update, links, images = [], [], [], []
+        for sku, brand, categories, image_paths, slug, values in cleaned:
+            product = existing.get(sku)
+            if product is None:
+                product = Product(sku=sku or f"LP-{uuid.uuid4().hex[:8].upper()}", slug=next(slugs))
+                to_create.append(product)
+            else:
+                to_update.append(product)
+            for field, value in values.items():
+                setattr(product, field, value)
+            product.brand_id = self._brand_id(brand)
+            apply_normalized_specs(product)
+            if categories:
+                # Rows without categories (e.g. a price-only feed) keep the product's current links.
+                links.append((product, {self._category_id(category) for category in categories}))
+            if image_paths:
+                images.append((product, image_paths))
+
+        if self.dry_run:
+            self.created += len(to_create)
+            self.updated += len(to_update)
+            return
+
+        # bulk_update skips auto_now, and cart summaries and comparisons key off updated_at.
+        update_fields = sorted(
+            {field for *_, values in cleaned for field in values} | {'brand', 'updated_at'} | set(SPEC_FIELDS)
+        )
+        now = timezone.now()
+        for product in to_update:
+            product.updated_at = now
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create)
+            if to_update:
+                Product.objects.bulk_update(to_update, update_fields)
+            self._write_links(links)
+            self._write_images(images)
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+        product_ids = [product.pk for product in to_create + to_update]
+        refresh_product_cards(product_ids)
+        refresh_search_documents(product_ids)
+        invalidate_product_detail(product_ids)
+
+    def _resolve_slugs(self, bases):
+        """Return a slug per base that is unused in the database and in this import."""
+        if not bases:
+            return []
+        bases = [base or 'product' for base in bases]
+        distinct = set(bases)
+        taken = set(Product.objects.filter(slug__in=distinct).values_list('slug', flat=True)) | self.seen_slugs
+        # Only bases that are taken or repeated need suffixes, so only they need the prefix lookup;
+        # it is OR-ed in small groups to keep the expression tree shallow.
+        counts = Counter(bases)
+        suffixed = sorted(base for base in distinct if base in taken or counts[base] > 1)
+        for start in range(0, len(suffixed), SLUG_PREFIX_BATCH):
+            query = Q()
+            for base in suffixed[start:start + SLUG_PREFIX_BATCH]:
+                query |= Q(slug__startswith=f'{base}-')
+            taken.update(Product.objects.filter(query).values_list('slug', flat=True))
+        resolved = []
+        for base in bases:
+            slug, suffix = base, 2
+            while slug in taken:
+                slug, suffix = f'{base}-{suffix}', suffix + 1
+            taken.add(slug)
+            self.seen_slugs.add(slug)
+            resolved.append(slug)
+        return resolved
+
+    def _write_links(self, links):
+        if not links:
+            return
+        through = Product.categories.through
+        delete_rows(through, 'product', [product.pk for product, _ in links])
+        through.objects.bulk_create(
+            [
+                through(product_id=product.pk, category_id=category_id)
+                for product, category_ids in links
+                for category_id in category_ids
+            ],
+            batch_size=1000,
+        )
+
+    def _write_images(self, images):
+        if not images:
+            return
+        # A plain DELETE skips the per-image post_delete receivers; the chunk refreshes cards once itself.
+        delete_rows(ProductImage, 'product', [product.pk for product, _ in images])
+        ProductImage.objects.bulk_create(
+            [
+                ProductImage(product_id=product.pk, image=path, is_primary=order == 0, order=order)
+                for product, paths in images
+                for order, path in enumerate(paths)
+            ],
+            batch_size=1000,
+        )
+
+
+def export_rows(chunk_size=1000):
+    """Yield feed rows for every product, keyset-paginated so memory stays flat."""
+    last_id = 0
+    while True:
+        products = list(
+            Product.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values('pk', 'sku', 'slug', 'brand__slug', *PRODUCT_FIELDS)[:chunk_size]
+        )
+        if not products:
+            return
+        last_id = products[-1]['pk']
+        product_ids = [product['pk'] for product in products]
+
+        categories = {}
+        for product_id, slug in Product.categories.through.objects.filter(
+            product_id__in=product_ids
+        ).values_list('product_id', 'category__slug'):
+            categories.setdefault(product_id, []).append(slug)
+        images = {}
+        for product_id, image in ProductImage.objects.filter(
+            product_id__in=product_ids
+        ).order_by('product_id', '-is_primary', 'order').values_list('product_id', 'image'):
+            images.setdefault(product_id, []).append(image)
+
+        for product in products:
+            product_id = product.pop('pk')
+            product['brand'] = product.pop('brand__slug')
+            product['categories'] = LIST_SEPARATOR.join(sorted(categories.get(product_id, [])))
+            product['images'] = LIST_SEPARATOR.join(images.get(product_id, []))
+            yield product
+
+
+def write_rows(rows, stream, fmt):
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FEED_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: '' if value is None else value for key, value in row.items()})
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, default=str) + '\n')
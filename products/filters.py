@@ -0,0 +1,31 @@
+import django_filters
+from .models import Product, ProductCard
+from .specs import CPU_FAMILY_CHOICES
+
+
+class ProductCardFilter(django_filters.FilterSet):
+    brand = django_filters.CharFilter(field_name='brand_slug')
+    category = django_filters.CharFilter(method='filter_category')
+    min_price = django_filters.NumberFilter(field_name='current_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='current_price', lookup_expr='lte')
+    in_stock = django_filters.BooleanFilter(field_name='is_in_stock')
+    min_ram_gb = django_filters.NumberFilter(field_name='ram_gb', lookup_expr='gte')
+    max_ram_gb = django_filters.NumberFilter(field_name='ram_gb', lookup_expr='lte')
+    min_storage_gb = django_filters.NumberFilter(field_name='storage_gb', lookup_expr='gte')
+    max_storage_gb = django_filters.NumberFilter(field_name='storage_gb', lookup_expr='lte')
+    min_screen_inches = django_filters.NumberFilter(field_name='screen_inches', lookup_expr='gte')
+    max_screen_inches = django_filters.NumberFilter(field_name='screen_inches', lookup_expr='lte')
+    min_weight_kg = django_filters.NumberFilter(field_name='weight_kg', lookup_expr='gte')
+    max_weight_kg = django_filters.NumberFilter(field_name='weight_kg', lookup_expr='lte')
+    min_battery_hours = django_filters.NumberFilter(field_name='battery_hours', lookup_expr='gte')
+    cpu_family = django_filters.MultipleChoiceFilter(choices=CPU_FAMILY_CHOICES)
+    min_cpu_generation = django_filters.NumberFilter(field_name='cpu_generation', lookup_expr='gte')
+
+    class Meta:
+        model = ProductCard
+        fields = ['is_featured', 'is_on_sale', 'storage_type']
+
+    def filter_category(self, queryset, name, value):
+        """Match the category and all of its subcategories."""
+        links = Product.categories.through.objects.filter(category__ancestor_links__ancestor__slug=value)
+        return queryset.filter(product_id__in=links.values('product_id'))
@@ -0,0 +1,210 @@
+"""Stock reservations for checkout.
+
+Stock is taken with a conditional ``UPDATE ... SET stock_quantity =
+stock_quantity - n WHERE stock_quantity >= n`` (one statement for every
+line of a checkout), so concurrent buyers never oversell and never wait on
+a lock held across the checkout.  Each
+decrement is recorded as a hold that expires after ``STOCK_HOLD_TTL``; a
+paid order commits its holds, a failed or abandoned one hands the stock
+back.  A payment that succeeds after its holds lapsed takes the stock
+again (``commit_order_holds``).  ``release_expired_holds`` (the ``sweep_stock_holds`` command) returns
+stock from holds that were never settled.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, TextField, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .cache import invalidate_product_detail
+from .catalog import refresh_stock_flags
+from .models import Product, StockReservation
+
+
+class InsufficientStock(Exception):
+    """Raised when a product cannot cover the requested quantity."""
+
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f'Not enough stock for product {product_id} (requested {requested}).')
+
+
+def take_stock(lines):
+    """Atomically decrement stock for ``{product_id: quantity}`` in one statement.
+
+    Only rows that can cover their quantity are touched; returns whether
+    every line was taken.  Callers roll back when it wasn't.
+    """
+    if not lines:
+        return True
+    covered = Q()
+    for product_id, quantity in lines.items():
+        covered |= Q(pk=product_id, stock_quantity__gte=quantity)
+    remaining = Case(
+        *[When(pk=product_id, then=F('stock_quantity') - quantity) for product_id, quantity in lines.items()],
+        default=F('stock_quantity'),
+        output_field=IntegerField(),
+    )
+    return Product.objects.filter(covered).update(stock_quantity=remaining) == len(lines)
+
+
+def _stock_changed(product_ids):
+    # Detail payloads show the count; cards only whether it is above zero.
+    refresh_stock_flags(product_ids)
+    invalidate_product_detail(product_ids)
+
+
+def reserve_stock(lines, reference, order=None, ttl=None):
+    """Hold stock for ``{product_id: quantity}`` and return the reservations.
+
+    All lines are held or none are: if any product runs short the
+    decrements roll back and ``InsufficientStock`` is raised.
+    """
+    ttl = ttl if ttl is not None else getattr(settings, 'STOCK_HOLD_TTL', 900)
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    try:
+        with transaction.atomic():
+            if not take_stock(lines):
+                raise InsufficientStock(None, None)
+            reservations = StockReservation.objects.bulk_create([
+                StockReservation(
+                    product_id=product_id, order=order, reference=reference,
+                    quantity=quantity, expires_at=expires_at,
+                )
+                for product_id, quantity in sorted(lines.items())
+            ])
+            _stock_changed(lines)
+    except InsufficientStock:
+        # Look for the culprit only after the partial decrement has rolled back.
+        short = _short_product(lines)
+        raise InsufficientStock(short, lines[short]) from None
+    return reservations
+
+
+def _short_product(lines):
+    stock = dict(Product.objects.filter(pk__in=lines).values_list('pk', 'stock_quantity'))
+    ordered = sorted(lines.items())
+    return next((product_id for product_id, quantity in ordered if stock.get(product_id, 0) < quantity), ordered[0][0])
+
+
+def return_stock(lines):
+    """Put ``{product_id: quantity}`` back on the shelf in one statement."""
+    if lines:
+        Product.objects.filter(pk__in=lines).update(stock_quantity=Case(
+            *[When(pk=product_id, then=F('stock_quantity') + quantity) for product_id, quantity in lines.items()],
+            default=F('stock_quantity'),
+            output_field=IntegerField(),
+        ))
+
+
+def _settle(reservations, status):
+    """Move held reservations to ``status`` and return the ones this call settled."""
+    with transaction.atomic():
+        held = list(reservations.select_for_update(skip_locked=True).filter(status='held'))
+        if not held:
+            return []
+        StockReservation.objects.filter(pk__in=[hold.pk for hold in held]).update(
+            status=status, updated_at=timezone.now()
+        )
+        if status != 'committed':
+            returned = defaultdict(int)
+            for hold in held:
+                returned[hold.product_id] += hold.quantity
+            return_stock(returned)
+            _stock_changed(returned)
+    return held
+
+
+def commit_holds(reference=None, order=None):
+    """Keep the stock of a paid checkout for good."""
+    return _settle(_holds_for(reference, order), 'committed')
+
+
+def release_holds(reference=None, order=None):
+    """Hand back the stock of a failed or cancelled checkout."""
+    return _settle(_holds_for(reference, order), 'released')
+
+
+def commit_order_holds(order_ids):
+    """Keep the stock of many paid orders for good.
+
+    An order paid after its holds lapsed takes its stock again; returns the
+    ids of orders that could not, which are flagged for review.
+    """
+    order_ids = set(order_ids)
+    settled = _settle(StockReservation.objects.filter(order_id__in=order_ids), 'committed')
+    lapsed = order_ids - {hold.order_id for hold in settled}
+    return _reclaim_lapsed(lapsed) if lapsed else []
+
+
+# Appended to the admin notes of a paid order whose stock is gone.
+OVERSOLD_NOTE = 'Paid after its stock hold lapsed and the stock has since sold; review before shipping.'
+
+
+def _reclaim_lapsed(order_ids):
+    """Retake the stock of paid orders whose holds were all released or expired."""
+    from orders.models import Order
+
+    holds = defaultdict(list)
+    for hold in StockReservation.objects.filter(order_id__in=order_ids):
+        holds[hold.order_id].append(hold)
+    short = []
+    for order_id, order_holds in holds.items():
+        if any(hold.status in ('held', 'committed') for hold in order_holds):
+            # Already kept, or being settled by someone else right now.
+            continue
+        lines = defaultdict(int)
+        for hold in order_holds:
+            lines[hold.product_id] += hold.quantity
+        with transaction.atomic():
+            taken = take_stock(lines)
+            if taken:
+                StockReservation.objects.filter(pk__in=[hold.pk for hold in order_holds]).update(
+                    status='committed', updated_at=timezone.now()
+                )
+                _stock_changed(lines)
+            else:
+                transaction.set_rollback(True)
+        if not taken:
+            short.append(order_id)
+    if short:
+        Order.objects.filter(pk__in=short).update(
+            admin_notes=Case(
+                When(admin_notes='', then=Value(OVERSOLD_NOTE)),
+                default=Concat('admin_notes', Value(f'\n{OVERSOLD_NOTE}')),
+                output_field=TextField(),
+            ),
+            updated_at=timezone.now(),
+        )
+    return short
+
+
+def release_order_holds(order_ids):
+    """Hand back the stock still held for many orders, e.g. a bulk cancellation."""
+    return _settle(StockReservation.objects.filter(order_id__in=order_ids), 'released')
+
+
+def release_expired_holds(now=None, batch_size=500):
+    """Return stock from holds past their expiry; returns the number of holds swept."""
+    now = now or timezone.now()
+    expired = StockReservation.objects.filter(status='held', expires_at__lte=now)
+    swept = 0
+    while True:
+        batch = list(expired.order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        settled = _settle(StockReservation.objects.filter(pk__in=batch), 'expired') if batch else []
+        if not settled:
+            # Nothing left, or the rest is locked by a concurrent sweep or settlement.
+            return swept
+        swept += len(settled)
+
+
+def _holds_for(reference, order):
+    if order is not None:
+        return StockReservation.objects.filter(order=order)
+    if reference is None:
+        raise ValueError('Pass a reference or an order.')
+    return StockReservation.objects.filter(reference=reference)
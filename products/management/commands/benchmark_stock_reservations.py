@@ -0,0 +1,69 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from products.inventory import InsufficientStock, reserve_stock
+from products.models import Brand, Product, StockReservation
+
+
+class Command(BaseCommand):
+    help = (
+        'Race concurrent buyers for one SKU through reserve_stock and report throughput '
+        'and oversell.  Creates a throwaway product and deletes it afterwards; point it '
+        'at a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=500)
+        parser.add_argument('--stock', type=int, default=100)
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--quantity', type=int, default=1, help='Units each buyer tries to reserve.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('Each thread needs its own connection to a shared database; in-memory SQLite cannot do that.')
+
+        brand, _ = Brand.objects.get_or_create(slug='benchmark', defaults={'name': 'Benchmark'})
+        product = Product.objects.create(
+            name='Stock reservation benchmark', slug=f'benchmark-{uuid.uuid4().hex[:8]}', brand=brand,
+            description='', price=1, stock_quantity=options['stock'], is_active=False,
+        )
+        quantity = options['quantity']
+        results = {'held': 0, 'sold_out': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def buy(buyer):
+            try:
+                reserve_stock({product.pk: quantity}, reference=f'benchmark-{buyer}')
+                outcome = 'held'
+            except InsufficientStock:
+                outcome = 'sold_out'
+            except OperationalError:
+                outcome = 'errors'
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(buy, range(options['buyers'])))
+        elapsed = time.perf_counter() - started
+
+        product.refresh_from_db()
+        held_units = sum(StockReservation.objects.filter(product=product).values_list('quantity', flat=True))
+        oversold = held_units + product.stock_quantity - options['stock']
+        self.stdout.write(
+            f"{options['buyers']} buyers on {options['threads']} threads in {elapsed:.2f}s "
+            f"({options['buyers'] / elapsed:.0f} checkouts/s)\n"
+            f"held: {results['held']}  sold out: {results['sold_out']}  errors: {results['errors']}\n"
+            f"stock left: {product.stock_quantity}  units held: {held_units}  oversold: {max(oversold, 0)}"
+        )
+        product.delete()
+        if product.stock_quantity < 0 or oversold != 0:
+            raise CommandError('Stock accounting is off: units were oversold or lost.')
+        self.stdout.write(self.style.SUCCESS('No oversell.'))
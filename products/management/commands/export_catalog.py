@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from products.feeds import export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream the catalog out as a CSV or JSONL feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help="Output file, or '-' for stdout.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        stream = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        try:
+            write_rows(export_rows(options['chunk_size']), stream, options['format'])
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
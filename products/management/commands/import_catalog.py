@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.feeds import CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or JSONL product feed into the catalog, upserting by SKU.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count rows without writing.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+        with stream:
+            importer = CatalogImporter(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+            importer.run(read_rows(stream, fmt))
+
+        for line, message in importer.errors[:50]:
+            self.stderr.write(f'  row {line}: {message}')
+        if len(importer.errors) > 50:
+            self.stderr.write(f'  ... and {len(importer.errors) - 50} more errors')
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {importer.created}, updated {importer.updated}, skipped {len(importer.errors)} rows.'
+        ))
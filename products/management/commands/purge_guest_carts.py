@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.cart_store import purge_guest_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete expired guest carts stored in the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, help='Seconds since last update; defaults to GUEST_CART_TTL.')
+
+    def handle(self, *args, **options):
+        deleted = purge_guest_carts(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} guest carts.'))
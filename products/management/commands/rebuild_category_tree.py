@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.categories import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category closure table from the parent links.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            links = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt category tree with {links} closure links.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from products.catalog import refresh_product_cards
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized product card table used by listing endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--product', type=int, action='append', dest='product_ids',
+            help='Only rebuild the given product id (repeatable).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        product_ids = options['product_ids']
+        if product_ids:
+            built = refresh_product_cards(product_ids)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {built} product cards.'))
+            return
+
+        built = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Product.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            built += refresh_product_cards(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'  ... {built} cards up to product {last_id}')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {built} product cards.'))
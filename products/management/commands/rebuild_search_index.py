@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products.models import Product, ProductSearchDocument
+from products.search import get_search_backend, refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Install the full-text search structures and re-index every product.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with connection.cursor() as cursor:
+            get_search_backend().install(cursor)
+
+        indexed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Product.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            indexed += refresh_search_documents(batch)
+            last_id = batch[-1]
+
+        total = ProductSearchDocument.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} products ({total} documents).'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from products.catalog import refresh_product_cards
+from products.models import Product
+from products.specs import SPEC_FIELDS, apply_normalized_specs
+
+
+class Command(BaseCommand):
+    help = 'Re-parse the free-text spec fields of every product into the normalized spec columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        source_fields = ['processor', 'ram', 'storage', 'display', 'weight', 'battery_life']
+
+        scanned = updated = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Product.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('pk', *source_fields, *SPEC_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            scanned += len(batch)
+            changed = [product for product in batch if apply_normalized_specs(product)]
+            updated += len(changed)
+            if changed and not dry_run:
+                Product.objects.bulk_update(changed, SPEC_FIELDS)
+                refresh_product_cards(product.pk for product in changed)
+
+        verb = 'Would update' if dry_run else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {updated} of {scanned} products.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Return stock from checkout holds that expired without being paid for.'
+
+    def handle(self, *args, **options):
+        swept = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Released {swept} expired stock holds.'))
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 import uuid
 
+from .specs import CPU_FAMILY_CHOICES, SPEC_SOURCE_FIELDS, STORAGE_TYPE_CHOICES, apply_normalized_specs
+
 class Category(models.Model):
     """Product category model."""
     
@@ -24,7 +26,77 @@ class Category(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        is_new = self._state.adding
+        previous_parent_id = None
+        if not is_new:
+            previous_parent_id = Category.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            if self.parent_id and self.parent_id != previous_parent_id and (
+                CategoryClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists()
+            ):
+                raise ValueError('A category cannot be moved underneath itself.')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                CategoryClosure.objects.create(ancestor=self, descendant=self, depth=0)
+                self._attach_subtree()
+            elif self.parent_id != previous_parent_id:
+                self._detach_subtree()
+                self._attach_subtree()
+    
+    def _detach_subtree(self):
+        """Remove the links between this subtree and everything above it."""
+        subtree = CategoryClosure.objects.filter(ancestor_id=self.pk).values('descendant_id')
+        above = CategoryClosure.objects.filter(descendant_id=self.pk, depth__gt=0).values('ancestor_id')
+        CategoryClosure.objects.filter(descendant_id__in=subtree, ancestor_id__in=above).delete()
+    
+    def _attach_subtree(self):
+        """Link this subtree to the ancestors of its current parent."""
+        if not self.parent_id:
+            return
+        ancestors = list(CategoryClosure.objects.filter(descendant_id=self.parent_id).values_list('ancestor_id', 'depth'))
+        subtree = list(CategoryClosure.objects.filter(ancestor_id=self.pk).values_list('descendant_id', 'depth'))
+        CategoryClosure.objects.bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ])
+    
+    def get_ancestors(self, include_self=False):
+        """Ancestors from the root down, e.g. for breadcrumbs."""
+        min_depth = 0 if include_self else 1
+        return Category.objects.filter(
+            descendant_links__descendant=self, descendant_links__depth__gte=min_depth
+        ).order_by('-descendant_links__depth')
+    
+    def get_descendants(self, include_self=False):
+        """Every category below this one, at any depth."""
+        min_depth = 0 if include_self else 1
+        return Category.objects.filter(ancestor_links__ancestor=self, ancestor_links__depth__gte=min_depth)
+    
+    def get_subtree_products(self):
+        """Products linked to this category or any category below it."""
+        return Product.objects.filter(
+            pk__in=Product.categories.through.objects.filter(
+                category__ancestor_links__ancestor=self
+            ).values('product_id')
+        )
+
+
+class CategoryClosure(models.Model):
+    """Closure table holding every (ancestor, descendant) pair of the category tree."""
+    
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='categoryclosure_desc_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
 
 
 class Brand(models.Model):
@@ -88,8 +160,26 @@ class Product(models.Model):
     battery_life = models.CharField(max_length=50, blank=True)
     warranty = models.CharField(max_length=100, blank=True)
     
+    # Normalized specs, parsed from the free-text fields above on save
+    ram_gb = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    storage_gb = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    storage_type = models.CharField(max_length=10, choices=STORAGE_TYPE_CHOICES, blank=True, editable=False)
+    screen_inches = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True, editable=False)
+    weight_kg = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, editable=False)
+    battery_hours = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True, editable=False)
+    cpu_family = models.CharField(max_length=30, choices=CPU_FAMILY_CHOICES, blank=True, editable=False)
+    cpu_generation = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ram_gb'], name='product_ram_gb_idx'),
+            models.Index(fields=['storage_type', 'storage_gb'], name='product_storage_idx'),
+            models.Index(fields=['screen_inches'], name='product_screen_idx'),
+            models.Index(fields=['weight_kg'], name='product_weight_idx'),
+            models.Index(fields=['battery_hours'], name='product_battery_idx'),
+            models.Index(fields=['cpu_family', 'cpu_generation'], name='product_cpu_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -99,6 +189,12 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         if not self.sku:
             self.sku = f"LP-{uuid.uuid4().hex[:8].upper()}"
+        changed_specs = apply_normalized_specs(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and changed_specs:
+            # Keep derived columns in step with a partial save of their source fields
+            touched = {f for source in update_fields for f in SPEC_SOURCE_FIELDS.get(source, [])}
+            kwargs['update_fields'] = set(update_fields) | (touched & set(changed_specs))
         super().save(*args, **kwargs)
     
     @property
@@ -210,15 +306,26 @@ class Cart(models.Model):
             return f"Cart for {self.user.email}"
         return f"Cart for session {self.session_id}"
     
+    @property
+    def summary(self):
+        """Item count, subtotal and priced lines, computed in one query and cached."""
+        if getattr(self, '_summary', None) is None:
+            from .carts import get_cart_summary
+            self._summary = get_cart_summary(self.pk)
+        return self._summary
+    
+    def clear_summary(self):
+        self._summary = None
+    
     @property
     def total_items(self):
         """Get the total number of items in the cart."""
-        return sum(item.quantity for item in self.items.all())
+        return self.summary['total_items']
     
     @property
     def subtotal(self):
         """Calculate the subtotal of all items in the cart."""
-        return sum(item.line_total for item in self.items.all())
+        return self.summary['subtotal']
 
 
 class CartItem(models.Model):
@@ -249,3 +356,110 @@ class CartItem(models.Model):
     def line_total(self):
         """Calculate the total price for this line item."""
         return self.unit_price * self.quantity
+
+
+class ProductCard(models.Model):
+    """Denormalized read model backing product listing cards."""
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255)
+    sku = models.CharField(max_length=50)
+    short_description = models.TextField(blank=True)
+    brand_id = models.BigIntegerField(db_index=True)
+    brand_name = models.CharField(max_length=100)
+    brand_slug = models.SlugField(max_length=100)
+    categories = models.JSONField(default=list, blank=True)
+    primary_image = models.CharField(max_length=255, blank=True)
+    primary_image_alt = models.CharField(max_length=255, blank=True)
+    colors = models.JSONField(default=list, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    sale_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    current_price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount_percentage = models.PositiveSmallIntegerField(default=0)
+    is_on_sale = models.BooleanField(default=False)
+    is_featured = models.BooleanField(default=False)
+    availability = models.CharField(max_length=20, choices=Product.AVAILABILITY_CHOICES)
+    is_in_stock = models.BooleanField(default=False)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    # Digest of what the recommendation scorer reads; see products.catalog.scoring_key.
+    scoring_key = models.CharField(max_length=16, blank=True)
+    ram_gb = models.PositiveSmallIntegerField(null=True, blank=True)
+    storage_gb = models.PositiveIntegerField(null=True, blank=True)
+    storage_type = models.CharField(max_length=10, choices=STORAGE_TYPE_CHOICES, blank=True)
+    screen_inches = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
+    weight_kg = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    battery_hours = models.DecimalField(max_digits=4, decimal_places=1, null=True, blank=True)
+    cpu_family = models.CharField(max_length=30, choices=CPU_FAMILY_CHOICES, blank=True)
+    cpu_generation = models.PositiveSmallIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-product_id']
+        indexes = [
+            models.Index(fields=['-created_at', '-product'], name='productcard_created_idx'),
+            models.Index(fields=['current_price', 'product'], name='productcard_price_idx'),
+            models.Index(fields=['rating_average', 'product'], name='productcard_rating_idx'),
+            models.Index(fields=['is_featured', '-created_at'], name='productcard_featured_idx'),
+            models.Index(fields=['ram_gb', 'current_price'], name='productcard_ram_idx'),
+            models.Index(fields=['storage_gb', 'current_price'], name='productcard_storage_idx'),
+            models.Index(fields=['weight_kg', 'current_price'], name='productcard_weight_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Card for {self.name}"
+
+
+class CatalogVersion(models.Model):
+    """Named counters every process can read, bumped when data derived from the catalog goes stale."""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} v{self.value}"
+
+
+class ProductSearchDocument(models.Model):
+    """Flattened product text indexed by the full-text search backend."""
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    name = models.CharField(max_length=255)
+    brand_name = models.CharField(max_length=100)
+    features = models.TextField(blank=True)
+    short_description = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for {self.name}"
+
+
+class StockReservation(models.Model):
+    """Stock held for a checkout until it is paid for, released or expires."""
+    
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('committed', 'Committed'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, null=True, blank=True, related_name='stock_reservations')
+    reference = models.CharField(max_length=64, db_index=True)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='held')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='stockreservation_expiry_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for {self.reference}"
@@ -0,0 +1,197 @@
+"""Vectorized laptop recommendations for the finder quiz.
+
+The in-stock catalog is held as a NumPy feature matrix (one row per product,
+columns scaled to 0..1).  A quiz answer becomes a weight vector, and every
+product is scored with one matrix-vector product plus a budget penalty.  The
+matrix is rebuilt only when a card's scored values change (the scoring
+counter in ``CatalogVersion``, shared by every worker), not on stock churn.
+"""
+import re
+import threading
+
+import numpy as np
+
+from .catalog import SCORING_VERSION, catalog_counter
+from .models import ProductCard
+
+FEATURES = ['performance', 'graphics', 'memory', 'storage', 'portability', 'battery', 'screen', 'rating']
+
+FEATURE_REASONS = {
+    'performance': 'Fast processor for demanding work',
+    'graphics': 'Dedicated graphics for games and rendering',
+    'memory': 'Plenty of RAM for multitasking',
+    'storage': 'Roomy storage for projects and media',
+    'portability': 'Light enough to carry all day',
+    'battery': 'Long battery life away from the charger',
+    'screen': 'Large display for detailed work',
+    'rating': 'Highly rated by customers',
+}
+
+USER_TYPE_WEIGHTS = {
+    'student': {'battery': 0.3, 'portability': 0.3, 'performance': 0.1, 'memory': 0.05, 'storage': 0.05, 'rating': 0.2},
+    'creator': {'performance': 0.25, 'graphics': 0.2, 'memory': 0.15, 'storage': 0.15, 'screen': 0.15, 'rating': 0.1},
+    'professional': {'portability': 0.25, 'battery': 0.25, 'performance': 0.2, 'memory': 0.1, 'rating': 0.2},
+    'gamer': {'graphics': 0.4, 'performance': 0.3, 'memory': 0.1, 'storage': 0.1, 'rating': 0.1},
+}
+
+USAGE_INTENSITY_SCALE = {'light': 0.5, 'medium': 1.0, 'heavy': 1.5}
+
+PORTABILITY_BOOST = {
+    'ultraportable': {'portability': 0.4, 'battery': 0.1},
+    'balanced': {'portability': 0.15, 'battery': 0.05},
+    'performance': {'performance': 0.2, 'graphics': 0.2},
+}
+
+# Rupee price windows matching the quiz's budget buttons.
+BUDGET_RANGES = {
+    'budget': (50000, 80000),
+    'midrange': (80000, 120000),
+    'premium': (120000, None),
+}
+
+CPU_TIER = {
+    'intel_celeron': 0.1, 'intel_pentium': 0.15, 'mediatek': 0.15,
+    'intel_core_i3': 0.3, 'amd_ryzen_3': 0.3,
+    'intel_core_i5': 0.5, 'amd_ryzen_5': 0.5, 'qualcomm_snapdragon': 0.55,
+    'intel_core_i7': 0.7, 'amd_ryzen_7': 0.7, 'intel_core_ultra_5': 0.6, 'intel_core_ultra_7': 0.75,
+    'apple_m': 0.75,
+    'intel_core_i9': 0.9, 'amd_ryzen_9': 0.9, 'intel_core_ultra_9': 0.9,
+}
+
+_DISCRETE_GPU_RE = re.compile(r'\b(rtx|gtx|radeon\s+rx|rx\s*\d{4}|arc\s+a\d)', re.IGNORECASE)
+_GPU_TIER_RE = re.compile(r'(\d{2})(\d)0\b')
+
+
+def cpu_score(family, generation):
+    base = CPU_TIER.get(family)
+    if base is None:
+        return np.nan
+    # Newer generations within a family nudge the score up, capped at +0.1.
+    return min(base + 0.01 * (generation or 0), base + 0.1)
+
+
+def gpu_score(graphics):
+    if not graphics:
+        return np.nan
+    if not _DISCRETE_GPU_RE.search(graphics):
+        return 0.2
+    tier = _GPU_TIER_RE.search(graphics)
+    # RTX 4050 -> 0.75 ... RTX 4090 -> 0.95
+    return 0.5 + 0.05 * int(tier.group(2)) if tier else 0.6
+
+
+class CatalogMatrix:
+    """Feature matrix, prices and ids for every in-stock listable product."""
+
+    def __init__(self, product_ids, features, prices):
+        self.product_ids = product_ids
+        self.features = features
+        self.prices = prices
+
+    @classmethod
+    def build(cls):
+        rows = list(
+            ProductCard.objects.filter(is_in_stock=True).values_list(
+                'product_id', 'current_price', 'cpu_family', 'cpu_generation', 'product__graphics',
+                'ram_gb', 'storage_gb', 'weight_kg', 'battery_hours', 'screen_inches', 'rating_average',
+            )
+        )
+        count = len(rows)
+        product_ids = np.empty(count, dtype=np.int64)
+        prices = np.empty(count, dtype=np.float64)
+        raw = np.full((count, len(FEATURES)), np.nan, dtype=np.float64)
+        for i, (product_id, price, family, generation, graphics, ram, storage, weight, battery, screen, rating) in enumerate(rows):
+            product_ids[i] = product_id
+            prices[i] = float(price)
+            raw[i] = (
+                cpu_score(family, generation),
+                gpu_score(graphics),
+                np.log2(ram) if ram else np.nan,
+                np.log2(storage) if storage else np.nan,
+                float(weight) if weight is not None else np.nan,
+                float(battery) if battery is not None else np.nan,
+                float(screen) if screen is not None else np.nan,
+                float(rating) if rating else np.nan,
+            )
+        return cls(product_ids, cls._scale(raw), prices)
+
+    @staticmethod
+    def _scale(raw):
+        features = raw.copy()
+        # Fixed ranges keep scores comparable as the catalog changes.
+        bounds = {
+            'memory': (3.0, 6.0),        # 8GB .. 64GB
+            'storage': (7.0, 12.0),      # 128GB .. 4TB
+            'portability': (1.0, 3.0),   # kg, inverted below
+            'battery': (4.0, 22.0),      # hours
+            'screen': (11.0, 18.0),      # inches
+            'rating': (1.0, 5.0),
+        }
+        for name, (low, high) in bounds.items():
+            column = FEATURES.index(name)
+            features[:, column] = np.clip((features[:, column] - low) / (high - low), 0.0, 1.0)
+        portability = FEATURES.index('portability')
+        features[:, portability] = 1.0 - features[:, portability]
+        # Unknown specs score slightly below an average laptop instead of zero.
+        return np.where(np.isnan(features), 0.35, features)
+
+
+_lock = threading.Lock()
+_matrix = None
+_matrix_version = None
+
+
+def get_catalog_matrix():
+    global _matrix, _matrix_version
+    version = catalog_counter(SCORING_VERSION)
+    with _lock:
+        if _matrix is None or _matrix_version != version:
+            _matrix = CatalogMatrix.build()
+            _matrix_version = version
+        return _matrix
+
+
+def answer_weights(user_type, usage_intensity=None, portability=None):
+    """Turn quiz answers into a weight per feature column."""
+    weights = dict(USER_TYPE_WEIGHTS[user_type])
+    for name, boost in PORTABILITY_BOOST.get(portability, {}).items():
+        weights[name] = weights.get(name, 0.0) + boost
+    scale = USAGE_INTENSITY_SCALE.get(usage_intensity, 1.0)
+    for name in ('performance', 'graphics', 'memory'):
+        if name in weights:
+            weights[name] *= scale
+    vector = np.array([weights.get(name, 0.0) for name in FEATURES], dtype=np.float64)
+    return vector / vector.sum()
+
+
+def budget_penalty(prices, budget_range):
+    """Penalize prices outside the budget window; overspending costs more than underspending."""
+    if budget_range not in BUDGET_RANGES:
+        return np.zeros_like(prices)
+    low, high = BUDGET_RANGES[budget_range]
+    penalty = np.zeros_like(prices)
+    if high is not None:
+        penalty += np.maximum(prices - high, 0.0) / high * 2.0
+    penalty += np.maximum(low - prices, 0.0) / low * 0.5
+    return penalty
+
+
+def recommend(user_type, usage_intensity=None, budget_range=None, portability=None, limit=5):
+    """Return the top ``limit`` products as ``(product_id, score, reasons)``."""
+    matrix = get_catalog_matrix()
+    if not len(matrix.product_ids):
+        return []
+    weights = answer_weights(user_type, usage_intensity, portability)
+    contributions = matrix.features * weights
+    scores = contributions.sum(axis=1) - budget_penalty(matrix.prices, budget_range)
+
+    limit = min(limit, len(scores))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind='stable')]
+
+    results = []
+    for index in top:
+        strongest = np.argsort(-contributions[index])[:2]
+        reasons = [FEATURE_REASONS[FEATURES[column]] for column in strongest if contributions[index, column] > 0]
+        results.append((int(matrix.product_ids[index]), round(float(scores[index]), 4), reasons))
+    return results
@@ -0,0 +1,220 @@
+"""Ranked full-text product search.
+
+On PostgreSQL the document table gets a generated, weighted ``tsvector``
+column with a GIN index, plus a trigram index on the name for typo
+tolerance.  Elsewhere (SQLite) an FTS5 table mirrors the document table
+through triggers and typos are corrected against its vocabulary.
+"""
+import difflib
+import re
+
+from django.db import connection, transaction
+
+from .models import Product, ProductSearchDocument
+
+DOCUMENT_TABLE = ProductSearchDocument._meta.db_table
+DOCUMENT_FIELDS = ['name', 'brand_name', 'features', 'short_description', 'description']
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TOKENS = 10
+
+
+def tokenize(query):
+    return [token.lower() for token in _TOKEN_RE.findall(query or '')][:MAX_QUERY_TOKENS]
+
+
+def build_document(product):
+    """Build an unsaved search document from a product with brand and features loaded."""
+    return ProductSearchDocument(
+        product=product,
+        name=product.name,
+        brand_name=product.brand.name,
+        features=' '.join(f'{feature.title} {feature.description}' for feature in product.features.all()),
+        short_description=product.short_description,
+        description=product.description,
+    )
+
+
+def refresh_search_documents(product_ids):
+    """Re-index the given products; inactive or deleted products drop out."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0
+    products = list(
+        Product.objects.filter(pk__in=product_ids, is_active=True, brand__is_active=True)
+        .select_related('brand')
+        .prefetch_related('features')
+    )
+    documents = [build_document(product) for product in products]
+    with transaction.atomic():
+        stale = product_ids - {product.pk for product in products}
+        if stale:
+            ProductSearchDocument.objects.filter(product_id__in=stale).delete()
+        if documents:
+            ProductSearchDocument.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=[*DOCUMENT_FIELDS, 'updated_at'],
+            )
+    return len(documents)
+
+
+def schedule_search_refresh(product_ids):
+    """Re-index products once the surrounding transaction commits."""
+    product_ids = set(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: refresh_search_documents(product_ids))
+
+
+class PostgresSearchBackend:
+    """tsvector/GIN ranking with pg_trgm fallback for misspelled queries."""
+
+    install_sql = [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        f"""
+        ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(brand_name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(features, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(short_description, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'D')
+        ) STORED
+        """,
+        f'CREATE INDEX IF NOT EXISTS products_search_vector_gin ON {DOCUMENT_TABLE} USING gin (search_vector)',
+        f'CREATE INDEX IF NOT EXISTS products_search_name_trgm ON {DOCUMENT_TABLE} USING gin (name gin_trgm_ops)',
+    ]
+
+    def install(self, cursor):
+        for statement in self.install_sql:
+            cursor.execute(statement)
+
+    def search(self, tokens, limit, prefix):
+        terms = list(tokens)
+        if prefix:
+            terms[-1] += ':*'
+        sql = f"""
+            SELECT product_id FROM {DOCUMENT_TABLE}, to_tsquery('english', %s) AS query
+            WHERE search_vector @@ query
+            ORDER BY ts_rank_cd(search_vector, query) DESC, product_id DESC
+            LIMIT %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [' & '.join(terms), limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def fuzzy_search(self, tokens, limit):
+        sql = f"""
+            SELECT product_id FROM {DOCUMENT_TABLE}
+            WHERE %s <%% name
+            ORDER BY word_similarity(%s, name) DESC, product_id DESC
+            LIMIT %s
+        """
+        text = ' '.join(tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [text, text, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteSearchBackend:
+    """FTS5 with bm25 column weights; typos are corrected against the index vocabulary."""
+
+    fts_table = 'products_search_fts'
+    vocab_table = 'products_search_vocab'
+    # bm25 weights, in DOCUMENT_FIELDS order
+    weights = (10.0, 10.0, 4.0, 2.0, 1.0)
+
+    def install(self, cursor):
+        columns = ', '.join(DOCUMENT_FIELDS)
+        new_columns = ', '.join(f'new.{field}' for field in DOCUMENT_FIELDS)
+        old_columns = ', '.join(f'old.{field}' for field in DOCUMENT_FIELDS)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.fts_table])
+        created = cursor.fetchone() is None
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5(
+                {columns},
+                content='{DOCUMENT_TABLE}', content_rowid='product_id',
+                tokenize='porter unicode61 remove_diacritics 2', prefix='2 3 4'
+            )
+        """)
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.vocab_table} USING fts5vocab({self.fts_table}, 'col')")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS products_search_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+                INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.product_id, {new_columns});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS products_search_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+                INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns})
+                VALUES ('delete', old.product_id, {old_columns});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS products_search_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+                INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns})
+                VALUES ('delete', old.product_id, {old_columns});
+                INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.product_id, {new_columns});
+            END
+        """)
+        if created:
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+
+    def search(self, tokens, limit, prefix):
+        terms = [f'"{token}"' for token in tokens]
+        if prefix:
+            terms[-1] += '*'
+        weights = ', '.join(str(weight) for weight in self.weights)
+        sql = f"""
+            SELECT rowid FROM {self.fts_table}
+            WHERE {self.fts_table} MATCH %s
+            ORDER BY bm25({self.fts_table}, {weights}), rowid DESC
+            LIMIT %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [' '.join(terms), limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def fuzzy_search(self, tokens, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT term FROM {self.vocab_table} WHERE col IN ('name', 'brand_name')")
+            vocabulary = [row[0] for row in cursor.fetchall()]
+        corrected = []
+        for token in tokens:
+            matches = difflib.get_close_matches(token, vocabulary, n=1, cutoff=0.7)
+            if matches:
+                corrected.append(matches[0])
+        if not corrected or corrected == tokens:
+            return []
+        return self.search(corrected, limit, prefix=False)
+
+
+def get_search_backend(vendor=None):
+    if (vendor or connection.vendor) == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+def search_products(query, limit=50, prefix=False):
+    """Return product ids matching query, best match first.
+
+    With ``prefix`` the last word matches as a prefix (autocomplete).  If the
+    exact search finds nothing the backend retries with typo tolerance.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    backend = get_search_backend()
+    product_ids = backend.search(tokens, limit, prefix)
+    if not product_ids:
+        product_ids = backend.fuzzy_search(tokens, limit)
+    return product_ids
+
+
+def install_search_index(sender, using, **kwargs):
+    """post_migrate hook creating the backend-specific index structures."""
+    from django.db import connections
+
+    db = connections[using]
+    with db.cursor() as cursor:
+        get_search_backend(db.vendor).install(cursor)
@@ -0,0 +1,137 @@
+from rest_framework import serializers
+from .recommendations import BUDGET_RANGES, PORTABILITY_BOOST, USAGE_INTENSITY_SCALE, USER_TYPE_WEIGHTS
+from .models import (
+    Brand, Category, Product, ProductCard, ProductColor, ProductFeature, ProductImage, ProductVideo
+)
+
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='product_id', read_only=True)
+    brand = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductCard
+        fields = [
+            'id', 'name', 'slug', 'sku', 'short_description', 'brand', 'categories',
+            'primary_image', 'primary_image_alt', 'colors', 'price', 'sale_price',
+            'current_price', 'discount_percentage', 'is_on_sale', 'is_featured',
+            'availability', 'is_in_stock', 'rating_average', 'rating_count', 'ram_gb',
+            'storage_gb', 'storage_type', 'screen_inches', 'weight_kg', 'battery_hours',
+            'cpu_family', 'cpu_generation', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_brand(self, obj):
+        return {'id': obj.brand_id, 'name': obj.brand_name, 'slug': obj.brand_slug}
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
+
+
+class CategoryDetailSerializer(serializers.ModelSerializer):
+    breadcrumbs = serializers.SerializerMethodField()
+    children = serializers.SerializerMethodField()
+    product_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug', 'description', 'image', 'breadcrumbs', 'children', 'product_count']
+
+    def get_breadcrumbs(self, obj):
+        return CategorySerializer(obj.get_ancestors(include_self=True), many=True).data
+
+    def get_children(self, obj):
+        return CategorySerializer(obj.children.filter(is_active=True), many=True).data
+
+    def get_product_count(self, obj):
+        return obj.get_subtree_products().filter(is_active=True).count()
+
+
+class BrandSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Brand
+        fields = ['id', 'name', 'slug', 'logo', 'website']
+
+
+class ProductImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductImage
+        fields = ['id', 'image', 'alt_text', 'is_primary', 'order']
+
+
+class ProductVideoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductVideo
+        fields = ['id', 'title', 'video_url', 'thumbnail', 'order']
+
+
+class ProductFeatureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductFeature
+        fields = ['id', 'title', 'description', 'icon', 'order']
+
+
+class ProductColorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductColor
+        fields = ['id', 'name', 'color_code', 'image', 'price_adjustment', 'is_available']
+
+
+class ProductDetailSerializer(serializers.ModelSerializer):
+    brand = BrandSerializer(read_only=True)
+    categories = CategorySerializer(many=True, read_only=True)
+    images = ProductImageSerializer(many=True, read_only=True)
+    videos = ProductVideoSerializer(many=True, read_only=True)
+    features = ProductFeatureSerializer(many=True, read_only=True)
+    colors = ProductColorSerializer(many=True, read_only=True)
+    current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_percentage = serializers.IntegerField(read_only=True)
+    is_in_stock = serializers.BooleanField(read_only=True)
+    rating_average = serializers.SerializerMethodField()
+    rating_count = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
+    rating_verified_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'name', 'slug', 'sku', 'brand', 'categories', 'description', 'short_description',
+            'price', 'sale_price', 'is_on_sale', 'current_price', 'discount_percentage',
+            'stock_quantity', 'availability', 'is_in_stock', 'is_featured',
+            'processor', 'ram', 'storage', 'display', 'graphics', 'operating_system', 'weight',
+            'dimensions', 'battery_life', 'warranty', 'ram_gb', 'storage_gb', 'storage_type',
+            'screen_inches', 'weight_kg', 'battery_hours', 'cpu_family', 'cpu_generation',
+            'images', 'videos', 'features', 'colors', 'rating_average', 'rating_count',
+            'rating_histogram', 'rating_verified_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def _summary(self, obj):
+        return getattr(obj, 'rating_summary', None)
+
+    def get_rating_average(self, obj):
+        summary = self._summary(obj)
+        return str(summary.average) if summary else '0.00'
+
+    def get_rating_count(self, obj):
+        summary = self._summary(obj)
+        return summary.count if summary else 0
+
+    def get_rating_histogram(self, obj):
+        summary = self._summary(obj)
+        return {str(stars): count for stars, count in summary.histogram.items()} if summary else dict.fromkeys('12345', 0)
+
+    def get_rating_verified_count(self, obj):
+        summary = self._summary(obj)
+        return summary.verified_count if summary else 0
+
+
+class RecommendationRequestSerializer(serializers.Serializer):
+    user_type = serializers.ChoiceField(choices=list(USER_TYPE_WEIGHTS))
+    usage_intensity = serializers.ChoiceField(choices=list(USAGE_INTENSITY_SCALE), required=False)
+    budget_range = serializers.ChoiceField(choices=list(BUDGET_RANGES), required=False)
+    portability = serializers.ChoiceField(choices=list(PORTABILITY_BOOST), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
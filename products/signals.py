@@ -0,0 +1,121 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from payments.models import Payment
+from reviews.models import Review
+from reviews.ratings import apply_rating_change
+
+from .cache import invalidate_product_detail
+from .carts import invalidate_cart_summary
+from .catalog import schedule_card_refresh
+from .categories import invalidate_category_tree
+from .inventory import commit_order_holds
+from .models import Brand, CartItem, Category, Product, ProductColor, ProductFeature, ProductImage, ProductVideo
+from .search import schedule_search_refresh
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_card_on_product_change(sender, instance, **kwargs):
+    schedule_card_refresh([instance.pk])
+    schedule_search_refresh([instance.pk])
+    invalidate_product_detail([instance.pk])
+    invalidate_category_tree()
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def refresh_card_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        invalidate_category_tree()
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_card_refresh([instance.pk])
+            invalidate_product_detail([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        schedule_card_refresh(pk_set)
+        invalidate_product_detail(pk_set)
+    elif action == 'pre_clear':
+        # The affected products are only known before the links are removed.
+        product_ids = list(instance.products.values_list('pk', flat=True))
+        schedule_card_refresh(product_ids)
+        invalidate_product_detail(product_ids)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductColor)
+@receiver(post_delete, sender=ProductColor)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_card_on_child_change(sender, instance, **kwargs):
+    schedule_card_refresh([instance.product_id])
+    invalidate_product_detail([instance.product_id])
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating_on_review_delete(sender, instance, **kwargs):
+    # Review.save() keeps the summary current; deletes, cascades included, end up here.
+    apply_rating_change(instance, None)
+
+
+@receiver(post_save, sender=Brand)
+def refresh_cards_on_brand_save(sender, instance, **kwargs):
+    product_ids = list(instance.products.values_list('pk', flat=True))
+    schedule_card_refresh(product_ids)
+    schedule_search_refresh(product_ids)
+    invalidate_product_detail(product_ids)
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+def refresh_search_on_feature_change(sender, instance, **kwargs):
+    schedule_search_refresh([instance.product_id])
+    invalidate_product_detail([instance.product_id])
+    # Comparisons show features and key off the card's refreshed_at.
+    schedule_card_refresh([instance.product_id])
+
+
+@receiver(post_save, sender=ProductVideo)
+@receiver(post_delete, sender=ProductVideo)
+def invalidate_detail_on_video_change(sender, instance, **kwargs):
+    invalidate_product_detail([instance.product_id])
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_summary_on_cart_item_change(sender, instance, **kwargs):
+    invalidate_cart_summary([instance.cart_id])
+
+
+@receiver(pre_delete, sender=Category)
+def detach_category_subtree(sender, instance, **kwargs):
+    # Children are re-parented to the root by SET_NULL without a save().
+    instance._detach_subtree()
+
+
+@receiver(pre_delete, sender=Category)
+def refresh_cards_on_category_delete(sender, instance, **kwargs):
+    # The cascade drops the product links without m2m_changed, and only before it are they known.
+    product_ids = list(instance.products.values_list('pk', flat=True))
+    schedule_card_refresh(product_ids)
+    invalidate_product_detail(product_ids)
+
+
+@receiver(post_save, sender=Category)
+def refresh_on_category_save(sender, instance, **kwargs):
+    invalidate_category_tree()
+    product_ids = list(instance.products.values_list('pk', flat=True))
+    schedule_card_refresh(product_ids)
+    invalidate_product_detail(product_ids)
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_tree_on_category_delete(sender, instance, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver(post_save, sender=Payment)
+def settle_stock_on_payment(sender, instance, **kwargs):
+    # A failed attempt keeps its holds so a retry can still pay for them; hold expiry returns the stock.
+    if instance.status == 'completed':
+        commit_order_holds([instance.order_id])
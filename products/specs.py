@@ -0,0 +1,175 @@
+"""Parse the free-text laptop spec fields into typed, filterable values."""
+import re
+from decimal import Decimal
+
+STORAGE_TYPE_CHOICES = [
+    ('ssd', 'SSD'),
+    ('hdd', 'HDD'),
+    ('emmc', 'eMMC'),
+    ('hybrid', 'Hybrid'),
+]
+
+CPU_FAMILY_CHOICES = [
+    ('intel_core_i3', 'Intel Core i3'),
+    ('intel_core_i5', 'Intel Core i5'),
+    ('intel_core_i7', 'Intel Core i7'),
+    ('intel_core_i9', 'Intel Core i9'),
+    ('intel_core_ultra_5', 'Intel Core Ultra 5'),
+    ('intel_core_ultra_7', 'Intel Core Ultra 7'),
+    ('intel_core_ultra_9', 'Intel Core Ultra 9'),
+    ('intel_celeron', 'Intel Celeron'),
+    ('intel_pentium', 'Intel Pentium'),
+    ('amd_ryzen_3', 'AMD Ryzen 3'),
+    ('amd_ryzen_5', 'AMD Ryzen 5'),
+    ('amd_ryzen_7', 'AMD Ryzen 7'),
+    ('amd_ryzen_9', 'AMD Ryzen 9'),
+    ('apple_m', 'Apple M-series'),
+    ('qualcomm_snapdragon', 'Qualcomm Snapdragon'),
+    ('mediatek', 'MediaTek'),
+]
+
+# Raw Product field -> normalized fields derived from it.
+SPEC_SOURCE_FIELDS = {
+    'ram': ['ram_gb'],
+    'storage': ['storage_gb', 'storage_type'],
+    'display': ['screen_inches'],
+    'weight': ['weight_kg'],
+    'battery_life': ['battery_hours'],
+    'processor': ['cpu_family', 'cpu_generation'],
+}
+SPEC_FIELDS = [field for fields in SPEC_SOURCE_FIELDS.values() for field in fields]
+
+_CAPACITY_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(TB|GB)\b', re.IGNORECASE)
+_SCREEN_RE = re.compile(r'(\d{1,2}(?:\.\d{1,2})?)\s*(?:"|\'\'|”|-?\s*inch(?:es)?\b|in\b)', re.IGNORECASE)
+_WEIGHT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(kg|kgs|g|grams?|lbs?|pounds?)\b', re.IGNORECASE)
+_HOURS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:hours?|hrs?|h)\b', re.IGNORECASE)
+_INTEL_CORE_RE = re.compile(r'\bi([3579])[\s-]*(\d{4,5})', re.IGNORECASE)
+_INTEL_ULTRA_RE = re.compile(r'\bultra\s*([579])(?:[\s-]*(\d)\d{2})?', re.IGNORECASE)
+_RYZEN_RE = re.compile(r'\bryzen\s*([3579])(?:\s*(?:pro\s*)?(\d)\d{3})?', re.IGNORECASE)
+_APPLE_RE = re.compile(r'\bM(\d)\b')
+
+_LB_TO_KG = Decimal('0.45359237')
+
+
+def _to_gb(amount, unit):
+    amount = Decimal(amount)
+    return int(amount * 1024) if unit.upper() == 'TB' else int(amount)
+
+
+def parse_ram(value):
+    """'16GB DDR5' -> 16."""
+    match = _CAPACITY_RE.search(value or '')
+    return _to_gb(*match.groups()) if match else None
+
+
+def parse_storage(value):
+    """'1TB NVMe SSD + 1TB HDD' -> (2048, 'hybrid')."""
+    value = value or ''
+    total = sum(_to_gb(amount, unit) for amount, unit in _CAPACITY_RE.findall(value))
+    lowered = value.lower()
+    kinds = set()
+    if 'ssd' in lowered or 'nvme' in lowered or 'pcie' in lowered:
+        kinds.add('ssd')
+    if 'hdd' in lowered or 'rpm' in lowered:
+        kinds.add('hdd')
+    if 'emmc' in lowered:
+        kinds.add('emmc')
+    if len(kinds) > 1:
+        storage_type = 'hybrid'
+    else:
+        storage_type = kinds.pop() if kinds else ''
+    return (total or None), storage_type
+
+
+def parse_screen(value):
+    """'15.6" FHD IPS' -> Decimal('15.6')."""
+    match = _SCREEN_RE.search(value or '')
+    if not match:
+        return None
+    inches = Decimal(match.group(1))
+    return inches if 7 <= inches <= 21 else None
+
+
+def parse_weight(value):
+    """'1.4 kg' / '3.1 lbs' / '1250 g' -> kilograms; the first weight a laptop could have."""
+    for amount, unit in _WEIGHT_RE.findall(value or ''):
+        amount, unit = Decimal(amount), unit.lower()
+        if unit.startswith('l') or unit.startswith('p'):
+            amount *= _LB_TO_KG
+        elif unit.startswith('g'):
+            amount /= 1000
+        # Anything else is a typo or a shipping weight, and would not fit weight_kg.
+        if Decimal('0.3') <= amount <= 10:
+            return amount.quantize(Decimal('0.01'))
+    return None
+
+
+def parse_battery(value):
+    """'Up to 18 hours' -> Decimal('18'); ranges keep the upper bound, standby figures are ignored."""
+    hours = [Decimal(hours) for hours in _HOURS_RE.findall(value or '')]
+    # No laptop runs past two days on a charge; longer figures are standby times and would not fit battery_hours.
+    hours = [amount for amount in hours if 0 < amount <= 48]
+    return max(hours).quantize(Decimal('0.1')) if hours else None
+
+
+def parse_processor(value):
+    """'Intel Core i7-1360P' -> ('intel_core_i7', 13)."""
+    value = value or ''
+    lowered = value.lower()
+
+    match = _INTEL_ULTRA_RE.search(value)
+    if match and ('intel' in lowered or 'core' in lowered):
+        generation = int(match.group(2)) if match.group(2) else None
+        return f'intel_core_ultra_{match.group(1)}', generation
+
+    match = _INTEL_CORE_RE.search(value)
+    if match:
+        model = match.group(2)
+        # 10th gen onwards carries a two-digit generation prefix (i7-1165G7, i7-13700H).
+        generation = int(model[:2]) if model.startswith('1') else int(model[0])
+        return f'intel_core_i{match.group(1)}', generation
+
+    match = _RYZEN_RE.search(value)
+    if match:
+        generation = int(match.group(2)) if match.group(2) else None
+        return f'amd_ryzen_{match.group(1)}', generation
+
+    match = _APPLE_RE.search(value)
+    if match:
+        return 'apple_m', int(match.group(1))
+
+    for keyword, family in (
+        ('celeron', 'intel_celeron'),
+        ('pentium', 'intel_pentium'),
+        ('snapdragon', 'qualcomm_snapdragon'),
+        ('mediatek', 'mediatek'),
+    ):
+        if keyword in lowered:
+            return family, None
+    return '', None
+
+
+def normalized_specs(product):
+    """Return {normalized field: value} for a product's raw spec strings."""
+    storage_gb, storage_type = parse_storage(product.storage)
+    cpu_family, cpu_generation = parse_processor(product.processor)
+    return {
+        'ram_gb': parse_ram(product.ram),
+        'storage_gb': storage_gb,
+        'storage_type': storage_type,
+        'screen_inches': parse_screen(product.display),
+        'weight_kg': parse_weight(product.weight),
+        'battery_hours': parse_battery(product.battery_life),
+        'cpu_family': cpu_family,
+        'cpu_generation': cpu_generation,
+    }
+
+
+def apply_normalized_specs(product):
+    """Set the normalized spec fields on product in place; return the changed names."""
+    changed = []
+    for field, value in normalized_specs(product).items():
+        if getattr(product, field) != value:
+            setattr(product, field, value)
+            changed.append(field)
+    return changed
@@ -0,0 +1,15 @@
+"""Background work queued by products (see jobs.queue)."""
+from jobs.queue import task
+
+from .cart_store import purge_guest_carts as purge_stale_guest_carts
+from .inventory import release_expired_holds
+
+
+@task
+def sweep_stock_holds():
+    release_expired_holds()
+
+
+@task
+def purge_guest_carts():
+    purge_stale_guest_carts()
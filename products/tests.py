@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from products.specs import (
+    parse_battery, parse_processor, parse_ram, parse_screen, parse_storage, parse_weight,
+)
+
+
+class SpecParserTests(SimpleTestCase):
+    def assert_parses(self, parser, cases):
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(parser(raw), expected)
+
+    def test_ram(self):
+        self.assert_parses(parse_ram, [
+            ('16GB DDR5', 16),
+            ('8 gb LPDDR4x', 8),
+            ('1TB', 1024),
+            ('32GB (2x16GB)', 32),
+            ('Unified memory', None),
+            ('', None),
+            (None, None),
+        ])
+
+    def test_storage(self):
+        self.assert_parses(parse_storage, [
+            ('512GB NVMe SSD', (512, 'ssd')),
+            ('1TB NVMe SSD + 1TB HDD', (2048, 'hybrid')),
+            ('1TB 5400rpm', (1024, 'hdd')),
+            ('64GB eMMC', (64, 'emmc')),
+            ('256 GB', (256, '')),
+            ('SSD', (None, 'ssd')),
+            ('', (None, '')),
+            (None, (None, '')),
+        ])
+
+    def test_screen(self):
+        self.assert_parses(parse_screen, [
+            ('15.6" FHD IPS', Decimal('15.6')),
+            ('14-inch 2.8K OLED', Decimal('14')),
+            ('13.3 in Retina', Decimal('13.3')),
+            ('16 inches', Decimal('16')),
+            ('4" status display', None),
+            ('32" external monitor', None),
+            ('Full HD', None),
+            (None, None),
+        ])
+
+    def test_weight(self):
+        self.assert_parses(parse_weight, [
+            ('1.4 kg', Decimal('1.40')),
+            ('3.1 lbs', Decimal('1.41')),
+            ('1250 g', Decimal('1.25')),
+            ('2 kgs', Decimal('2.00')),
+            ('12 g hinge, 1.2 kg total', Decimal('1.20')),
+            ('1500 kg', None),
+            ('150 g', None),
+            ('light', None),
+            (None, None),
+        ])
+
+    def test_battery(self):
+        self.assert_parses(parse_battery, [
+            ('Up to 18 hours', Decimal('18.0')),
+            ('6-8 hrs', Decimal('8.0')),
+            ('10.5h video playback', Decimal('10.5')),
+            ('12+ hours', Decimal('12.0')),
+            ('10 hours, 1000 hours standby', Decimal('10.0')),
+            ('1000 hours standby', None),
+            ('0 hours', None),
+            ('All day', None),
+            (None, None),
+        ])
+
+    def test_processor(self):
+        self.assert_parses(parse_processor, [
+            ('Intel Core i7-1360P', ('intel_core_i7', 13)),
+            ('Intel Core i5-1135G7', ('intel_core_i5', 11)),
+            ('Intel Core i3 8130U', ('intel_core_i3', 8)),
+            ('Intel Core Ultra 7 155H', ('intel_core_ultra_7', 1)),
+            ('AMD Ryzen 5 7530U', ('amd_ryzen_5', 7)),
+            ('AMD Ryzen 9 PRO 6950H', ('amd_ryzen_9', 6)),
+            ('Apple M2 Pro', ('apple_m', 2)),
+            ('Intel Celeron N4500', ('intel_celeron', None)),
+            ('Qualcomm Snapdragon X Elite', ('qualcomm_snapdragon', None)),
+            ('Unknown CPU', ('', None)),
+            (None, ('', None)),
+        ])
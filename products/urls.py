@@ -0,0 +1,18 @@
+from django.urls import path
+from .views import (
+    CategoryDetailView, CategoryTreeView, ProductAutocompleteView, ProductCompareView, ProductDetailView,
+    ProductFacetView, ProductListView, ProductRecommendationView, ProductSearchView
+)
+
+urlpatterns = [
+    path('', ProductListView.as_view(), name='product-list'),
+    path('facets/', ProductFacetView.as_view(), name='product-facets'),
+    path('search/', ProductSearchView.as_view(), name='product-search'),
+    path('autocomplete/', ProductAutocompleteView.as_view(), name='product-autocomplete'),
+    path('compare/', ProductCompareView.as_view(), name='product-compare'),
+    path('recommendations/', ProductRecommendationView.as_view(), name='product-recommendations'),
+    path('categories/tree/', CategoryTreeView.as_view(), name='category-tree'),
+    path('categories/<slug:slug>/', CategoryDetailView.as_view(), name='category-detail'),
+    path('<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('<slug:slug>/', ProductDetailView.as_view(), name='product-detail-slug'),
+]
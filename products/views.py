@@ -0,0 +1,168 @@
+from rest_framework import generics, status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from techlaptops.pagination import KeysetPagination
+from .cache import get_product_detail
+from .categories import get_category_tree
+from .compare import MAX_COMPARE_PRODUCTS, compare_products
+from .facets import FACETS, facet_index
+from .filters import ProductCardFilter
+from .models import Category, Product, ProductCard
+from .recommendations import recommend
+from .search import search_products
+from .serializers import (
+    CategoryDetailSerializer, ProductCardSerializer, ProductDetailSerializer, RecommendationRequestSerializer
+)
+
+
+class ProductListView(generics.ListAPIView):
+    """List products from the denormalized card table."""
+    serializer_class = ProductCardSerializer
+    permission_classes = [AllowAny]
+    filterset_class = ProductCardFilter
+    queryset = ProductCard.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ['created_at', 'current_price', 'rating_average']
+
+
+class ProductFacetView(APIView):
+    """Filter the catalog by facets and return the matching page with all facet counts."""
+    permission_classes = [AllowAny]
+    max_page_size = 100
+
+    def get(self, request, *args, **kwargs):
+        filters = {
+            facet: [value for raw in request.query_params.getlist(facet) for value in raw.split(',') if value]
+            for facet in FACETS
+        }
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 10)), 1), self.max_page_size)
+        except ValueError:
+            return Response({"detail": "page and page_size must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, product_ids, counts = facet_index.search(filters, offset=(page - 1) * page_size, limit=page_size)
+        cards = ProductCard.objects.in_bulk(product_ids)
+        results = [cards[product_id] for product_id in product_ids if product_id in cards]
+        return Response({
+            'count': total,
+            'results': ProductCardSerializer(results, many=True, context={'request': request}).data,
+            'facets': counts,
+        })
+
+
+class ProductSearchView(generics.ListAPIView):
+    """Ranked full-text search over the catalog."""
+    serializer_class = ProductCardSerializer
+    permission_classes = [AllowAny]
+    filter_backends = []
+    max_results = 200
+
+    def get_queryset(self):
+        product_ids = search_products(self.request.query_params.get('q', ''), limit=self.max_results)
+        cards = ProductCard.objects.in_bulk(product_ids)
+        return [cards[product_id] for product_id in product_ids if product_id in cards]
+
+
+class ProductAutocompleteView(APIView):
+    """Suggest products as the user types, matching the last word as a prefix."""
+    permission_classes = [AllowAny]
+    max_suggestions = 8
+
+    def get(self, request, *args, **kwargs):
+        product_ids = search_products(request.query_params.get('q', ''), limit=self.max_suggestions, prefix=True)
+        cards = {
+            card['product_id']: card
+            for card in ProductCard.objects.filter(product_id__in=product_ids).values('product_id', 'name', 'slug')
+        }
+        suggestions = [
+            {'id': product_id, 'name': cards[product_id]['name'], 'slug': cards[product_id]['slug']}
+            for product_id in product_ids if product_id in cards
+        ]
+        return Response(suggestions)
+
+
+class CategoryTreeView(APIView):
+    """Return the cached category tree used by the navbar."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_category_tree())
+
+
+class CategoryDetailView(generics.RetrieveAPIView):
+    """Retrieve a category with its breadcrumbs, children and subtree product count."""
+    serializer_class = CategoryDetailSerializer
+    permission_classes = [AllowAny]
+    queryset = Category.objects.filter(is_active=True)
+    lookup_field = 'slug'
+
+
+class ProductDetailView(APIView):
+    """Retrieve a product by id or slug from the detail cache, honouring If-None-Match."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk=None, slug=None, *args, **kwargs):
+        entry = get_product_detail(self.build, product_id=pk, slug=slug)
+        if entry is None:
+            return Response({"detail": "Product not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if entry['etag'] in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    @staticmethod
+    def build(product_id=None, slug=None):
+        queryset = (
+            Product.objects.filter(is_active=True)
+            .select_related('brand', 'rating_summary')
+            .prefetch_related('categories', 'images', 'videos', 'features', 'colors')
+        )
+        lookup = {'pk': product_id} if product_id is not None else {'slug': slug}
+        product = queryset.filter(**lookup).first()
+        if product is None:
+            return None
+        return ProductDetailSerializer(product).data
+
+
+class ProductRecommendationView(APIView):
+    """Score the in-stock catalog against laptop finder quiz answers."""
+    permission_classes = [AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = RecommendationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ranked = recommend(**serializer.validated_data)
+        cards = ProductCard.objects.in_bulk([product_id for product_id, _, _ in ranked])
+        results = []
+        for product_id, score, reasons in ranked:
+            if product_id not in cards:
+                continue
+            data = ProductCardSerializer(cards[product_id], context={'request': request}).data
+            data['score'] = score
+            data['reasons'] = reasons
+            results.append(data)
+        return Response(results)
+
+
+class ProductCompareView(APIView):
+    """Compare up to MAX_COMPARE_PRODUCTS products, e.g. ?ids=3,7,12."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            product_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            return Response({"detail": "ids must be a comma-separated list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 2 <= len(set(product_ids)) <= MAX_COMPARE_PRODUCTS:
+            return Response(
+                {"detail": f"Select between 2 and {MAX_COMPARE_PRODUCTS} products to compare."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(compare_products(product_ids))
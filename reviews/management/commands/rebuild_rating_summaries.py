@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.cache import invalidate_product_detail
+from products.catalog import schedule_card_refresh
+from products.models import Product
+from reviews.models import RatingSummary
+from reviews.ratings import SUMMARY_FIELDS, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute product rating summaries from approved reviews and repair any that drifted; '
+        'with --check, only report them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--check', action='store_true', help='Report drifted summaries without repairing them.')
+
+    def handle(self, *args, **options):
+        drifted = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Product.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            drifted += self.reconcile(batch, options['check'])
+            last_id = batch[-1]
+
+        if options['check'] and drifted:
+            raise CommandError(f'{drifted} rating summaries differ from their reviews.')
+        verb = 'Found' if options['check'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {drifted} drifted rating summaries.'))
+
+    def reconcile(self, product_ids, check):
+        empty = dict.fromkeys(SUMMARY_FIELDS, 0)
+        with transaction.atomic():
+            # Locking the summaries first makes concurrent review saves queue behind the repair
+            # and apply their deltas on top of it.
+            stored = {
+                row.pop('product_id'): row
+                for row in RatingSummary.objects.select_for_update()
+                .filter(product_id__in=product_ids)
+                .values('product_id', *SUMMARY_FIELDS)
+            }
+            expected = summarize(product_ids)
+            drifted = sorted(
+                product_id for product_id in set(stored) | set(expected)
+                if stored.get(product_id, empty) != expected.get(product_id, empty)
+            )
+            for product_id in drifted:
+                self.stdout.write(
+                    f'  product {product_id}: stored {stored.get(product_id, empty)}, '
+                    f'expected {expected.get(product_id, empty)}'
+                )
+            if check or not drifted:
+                return len(drifted)
+
+            RatingSummary.objects.filter(product_id__in=[pk for pk in drifted if pk not in expected]).delete()
+            RatingSummary.objects.bulk_create(
+                [RatingSummary(product_id=pk, **expected[pk]) for pk in drifted if pk in expected],
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=[*SUMMARY_FIELDS, 'updated_at'],
+            )
+            schedule_card_refresh(drifted)
+            invalidate_product_detail(drifted)
+        return len(drifted)
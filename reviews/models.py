@@ -1,4 +1,6 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 class Review(models.Model):
@@ -19,9 +21,51 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ('product', 'user')
+        indexes = [
+            models.Index(fields=['product', 'is_approved', '-created_at', '-id'], name='review_product_recent_idx'),
+        ]
     
     def __str__(self):
         return f"Review by {self.user.email} for {self.product.name}"
+    
+    def save(self, *args, **kwargs):
+        from .ratings import RATED_FIELDS, apply_rating_change
+        
+        with transaction.atomic():
+            before = None
+            if not self._state.adding:
+                # Read under lock: a stale instance must not decide what the summary loses.
+                before = Review.objects.select_for_update().filter(pk=self.pk).values(*RATED_FIELDS).first()
+            super().save(*args, **kwargs)
+            apply_rating_change(before, self)
+
+
+class RatingSummary(models.Model):
+    """Approved-review totals per product, kept current by reviews.ratings."""
+    
+    product = models.OneToOneField(
+        'products.Product', on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Rating summary for product #{self.product_id}"
+    
+    @property
+    def average(self):
+        return round(Decimal(self.total) / self.count, 2) if self.count else Decimal('0.00')
+    
+    @property
+    def histogram(self):
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
 
 
 class ReviewImage(models.Model):
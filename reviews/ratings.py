@@ -0,0 +1,70 @@
+"""Per-product rating summaries, maintained by deltas instead of aggregation.
+
+An approved review adds one to its product's ``count``, its rating to
+``total`` and one to its star bucket, and one to ``verified_count`` if it
+is a verified purchase.  Saving or deleting a review applies the
+difference between its old and new contribution as one UPDATE in the same
+transaction.  Listings and the product page then read their stars without
+touching ``Review`` at all.  ``summarize`` recomputes summaries from the
+reviews themselves for the rebuild_rating_summaries consistency check.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import RatingSummary, Review
+
+RATED_FIELDS = ('product_id', 'rating', 'is_approved', 'is_verified_purchase')
+SUMMARY_FIELDS = ['count', 'total', 'verified_count', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5']
+
+
+def _contribution(state):
+    """Return (product_id, counters) for a review, or a values() dict of one; unapproved reviews add nothing."""
+    if isinstance(state, Review):
+        state = {field: getattr(state, field) for field in RATED_FIELDS}
+    if not state or not state['is_approved']:
+        return None, {}
+    return state['product_id'], {
+        'count': 1,
+        'total': state['rating'],
+        'verified_count': int(state['is_verified_purchase']),
+        f"stars_{state['rating']}": 1,
+    }
+
+
+def apply_rating_change(before, after):
+    """Move one review's contribution from ``before`` to ``after``; either may be None."""
+    deltas = defaultdict(Counter)
+    for state, sign in ((before, -1), (after, 1)):
+        product_id, counters = _contribution(state)
+        for field, value in counters.items():
+            deltas[product_id][field] += sign * value
+
+    for product_id, delta in deltas.items():
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            continue
+        if any(value > 0 for value in delta.values()):
+            RatingSummary.objects.bulk_create([RatingSummary(product_id=product_id)], ignore_conflicts=True)
+        RatingSummary.objects.filter(product_id=product_id).update(
+            updated_at=timezone.now(),
+            # Clamped so that drift from bulk edits can never push a counter below zero.
+            **{field: Greatest(F(field) + value, 0) for field, value in delta.items()},
+        )
+
+
+def summarize(product_ids):
+    """Return {product_id: counters} computed from the approved reviews of the given products."""
+    rows = (
+        Review.objects.filter(product_id__in=product_ids, is_approved=True)
+        .values('product_id')
+        .annotate(
+            count=Count('id'),
+            total=Sum('rating'),
+            verified_count=Count('id', filter=Q(is_verified_purchase=True)),
+            **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)},
+        )
+    )
+    return {row.pop('product_id'): row for row in rows}
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from .models import Review, ReviewImage, ReviewVideo
+
+
+class ReviewImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReviewImage
+        fields = ['id', 'image', 'caption']
+
+
+class ReviewVideoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReviewVideo
+        fields = ['id', 'video_url', 'thumbnail', 'caption']
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    author = serializers.SerializerMethodField()
+    images = ReviewImageSerializer(many=True, read_only=True)
+    videos = ReviewVideoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Review
+        fields = [
+            'id', 'product', 'author', 'rating', 'title', 'content', 'is_verified_purchase',
+            'helpful_votes', 'unhelpful_votes', 'images', 'videos', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_author(self, obj):
+        return obj.user.get_full_name() or obj.user.email.split('@')[0]
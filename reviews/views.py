@@ -0,0 +1,20 @@
+from rest_framework import generics
+from rest_framework.permissions import AllowAny
+from techlaptops.pagination import KeysetPagination
+from .models import Review
+from .serializers import ReviewSerializer
+
+
+class ProductReviewListView(generics.ListAPIView):
+    """List the approved reviews of a product, newest first."""
+    serializer_class = ReviewSerializer
+    permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering_fields = ['created_at', 'rating', 'helpful_votes']
+
+    def get_queryset(self):
+        return (
+            Review.objects.filter(product_id=self.kwargs['product_id'], is_approved=True)
+            .select_related('user')
+            .prefetch_related('images', 'videos')
+        )
@@ -0,0 +1,23 @@
+from django.db import connections, router
+
+# Values per DELETE; stays under SQLite's bound-parameter limit on old builds.
+DELETE_BATCH_SIZE = 900
+
+
+def delete_rows(model, field, values):
+    """DELETE the rows of ``model`` whose ``field`` is in ``values`` and return how many went.
+
+    The rows are neither loaded nor sent delete signals, and nothing
+    cascades, so callers handle related rows and derived data themselves.
+    """
+    values = list(values)
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), DELETE_BATCH_SIZE):
+            batch = values[start:start + DELETE_BATCH_SIZE]
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(batch))})', batch)
+            deleted += cursor.rowcount
+    return deleted
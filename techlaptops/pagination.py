@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on an indexed (sort key, primary key) tuple.
+
+    Each page is a range scan starting after the last row of the previous
+    page, so deep pages cost the same as the first and no COUNT(*) runs.
+    Views choose the sort key with ``?ordering=`` from
+    ``keyset_ordering_fields``; ``?include_total=true`` adds a capped,
+    approximate total.
+    """
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    total_query_param = 'include_total'
+    default_ordering = '-created_at'
+    total_cap = 1000
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        self.sort_field = self.ordering.lstrip('-')
+        self.model_field = self._get_model_field(queryset.model, self.sort_field)
+        self.pk_field = queryset.model._meta.pk
+        descending = self.ordering.startswith('-')
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        # Walking backwards flips the scan; the page is put back in order below.
+        scan_descending = descending != reverse
+        prefix = '-' if scan_descending else ''
+        ordered = queryset.order_by(f'{prefix}{self.sort_field}', f'{prefix}pk')
+
+        if cursor:
+            operator = 'lt' if scan_descending else 'gt'
+            value, pk = cursor['v'], cursor['k']
+            ordered = ordered.filter(
+                Q(**{f'{self.sort_field}__{operator}': value})
+                | Q(**{self.sort_field: value, f'pk__{operator}': pk})
+            )
+
+        rows = list(ordered[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+
+        self.total = None
+        if self._wants_total(request):
+            self.total = queryset.order_by()[:self.total_cap + 1].count()
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.total is not None:
+            payload['total'] = min(self.total, self.total_cap)
+            payload['total_is_approximate'] = self.total > self.total_cap
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'total': {'type': 'integer'},
+                'total_is_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        default = getattr(view, 'keyset_default_ordering', self.default_ordering)
+        allowed = getattr(view, 'keyset_ordering_fields', [default.lstrip('-')])
+        requested = request.query_params.get(self.ordering_query_param)
+        if requested and requested.lstrip('-') in allowed:
+            return requested
+        return default
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, row, reverse):
+        url = replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(row, reverse))
+        return replace_query_param(url, self.ordering_query_param, self.ordering)
+
+    def encode_cursor(self, row, reverse):
+        payload = {
+            'o': self.ordering,
+            'v': self.model_field.value_to_string(row),
+            'k': row.pk,
+            'r': reverse,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            if payload['o'] != self.ordering:
+                raise ValueError('cursor belongs to another ordering')
+            payload['v'] = self.model_field.to_python(payload['v'])
+            payload['k'] = self.pk_field.to_python(payload['k'])
+            if payload['v'] is None or payload['k'] is None:
+                raise ValueError('cursor has no position')
+            payload['r'] = bool(payload.get('r'))
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    def _wants_total(self, request):
+        return request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def _get_model_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotFound(self.invalid_cursor_message)
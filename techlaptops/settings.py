@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'orders.apps.OrdersConfig',
     'reviews.apps.ReviewsConfig',
     'payments.apps.PaymentsConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
@@ -82,6 +83,21 @@ DATABASES = {
     )
 }
 
+# The order indexes cover their listings with INCLUDE columns on PostgreSQL; SQLite drops
+# those columns and keeps a plain index, which is fine for development, so don't warn.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# Cache
+# CACHE_URL picks the backend: locmem:// (default), file:///var/tmp/django_cache
+# or redis://host:6379/0 (any Redis-compatible server).
+CACHE_URL = os.environ.get('CACHE_URL', 'locmem://')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('file://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
@@ -151,6 +167,65 @@ CORS_ALLOW_CREDENTIALS = True
 # Razorpay settings
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', '')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', '')
+# Signs webhook deliveries; falls back to the key secret when unset
+RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
+# Gateway client (payments.gateway): point RAZORPAY_API_BASE_URL at a fake server for offline runs
+RAZORPAY_API_BASE_URL = os.environ.get('RAZORPAY_API_BASE_URL', '')
+RAZORPAY_CONNECT_TIMEOUT = float(os.environ.get('RAZORPAY_CONNECT_TIMEOUT', 3.05))
+RAZORPAY_READ_TIMEOUT = float(os.environ.get('RAZORPAY_READ_TIMEOUT', 10))
+RAZORPAY_RETRIES = int(os.environ.get('RAZORPAY_RETRIES', 2))
+RAZORPAY_POOL_SIZE = int(os.environ.get('RAZORPAY_POOL_SIZE', 20))
+RAZORPAY_BREAKER_THRESHOLD = int(os.environ.get('RAZORPAY_BREAKER_THRESHOLD', 5))  # consecutive failures
+RAZORPAY_BREAKER_RESET = int(os.environ.get('RAZORPAY_BREAKER_RESET', 30))  # seconds before a trial call
+
+# Seconds between checks of the per-process facet index against the card table
+FACET_INDEX_SYNC_INTERVAL = int(os.environ.get('FACET_INDEX_SYNC_INTERVAL', 30))
+# Seconds behind the newest seen card the index re-reads, covering transactions that commit late
+FACET_INDEX_SYNC_OVERLAP = int(os.environ.get('FACET_INDEX_SYNC_OVERLAP', 120))
+
+# Seconds the navbar category tree stays cached between category changes
+CATEGORY_TREE_CACHE_TIMEOUT = int(os.environ.get('CATEGORY_TREE_CACHE_TIMEOUT', 300))
+
+# Product detail payload cache. Invalidation only reaches other workers through a shared
+# backend (redis://); with locmem each worker keeps payloads for the short local timeout instead.
+PRODUCT_DETAIL_CACHE_ALIAS = 'default'
+PRODUCT_DETAIL_CACHE_TIMEOUT = int(os.environ.get('PRODUCT_DETAIL_CACHE_TIMEOUT', 3600))
+PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT = int(os.environ.get('PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT', 5))
+COMPARE_CACHE_TIMEOUT = int(os.environ.get('COMPARE_CACHE_TIMEOUT', 3600))
+CART_SUMMARY_CACHE_TIMEOUT = int(os.environ.get('CART_SUMMARY_CACHE_TIMEOUT', 900))
+
+# Guest carts live in a cache (see CACHE_URL) instead of the Cart table; outside DEBUG that cache must be
+# shared (Redis), which `check --deploy` enforces (products.E001), or use products.cart_store.DatabaseCartStore
+GUEST_CART_STORE = 'products.cart_store.CacheCartStore'
+GUEST_CART_CACHE_ALIAS = 'default'
+GUEST_CART_TTL = int(os.environ.get('GUEST_CART_TTL', 14 * 24 * 3600))
+
+# Seconds checkout stock holds last before the sweeper returns them
+STOCK_HOLD_TTL = int(os.environ.get('STOCK_HOLD_TTL', 900))
+
+# Order numbers: 'sortable' (timestamp + worker + sequence) or the legacy 'random'.
+# A process's worker id is ORDER_NUMBER_WORKER_BASE plus its ORDER_NUMBER_WORKER_INDEX (environment).
+# gunicorn.conf.py gives web workers indexes 0, 1, ...; give each host a base past the previous
+# host's block, and any other process that creates orders an index above the web workers'.
+ORDER_NUMBER_SCHEME = os.environ.get('ORDER_NUMBER_SCHEME', 'sortable')
+ORDER_NUMBER_WORKER_BASE = int(os.environ.get('ORDER_NUMBER_WORKER_BASE', 0))
+
+# Seconds each process keeps its copy of the active coupons
+COUPON_CACHE_TTL = int(os.environ.get('COUPON_CACHE_TTL', 60))
+
+# Background job queue (manage.py run_jobs)
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BACKOFF = int(os.environ.get('JOB_RETRY_BACKOFF', 10))  # seconds before the first retry, doubling after
+JOB_RETRY_BACKOFF_MAX = int(os.environ.get('JOB_RETRY_BACKOFF_MAX', 3600))
+JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT', 600))  # seconds before a running job counts as lost
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 3600))  # seconds succeeded jobs are kept
+# Periodic tasks: {task name: interval in seconds}
+JOB_SCHEDULE = {
+    'products.tasks.sweep_stock_holds': 60,
+    'products.tasks.purge_guest_carts': 24 * 3600,
+    # Safety net; webhook deliveries normally queue their own processing.
+    'payments.tasks.process_webhook_events': 60,
+}
 
 # AWS S3 settings (optional, for production file storage)
 if 'AWS_ACCESS_KEY_ID' in os.environ:
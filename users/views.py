@@ -2,6 +2,9 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
+from products.cart_store import merge_guest_cart
 from .models import Address, Wishlist, WishlistItem
 from .serializers import (
     RegisterSerializer, UserSerializer, ProfileSerializer, AddressSerializer,
@@ -11,6 +14,21 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+class LoginView(TokenObtainPairView):
+    """Obtain a JWT pair and fold the caller's guest cart into their account cart."""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        guest_cart = request.data.get('guest_cart') or request.headers.get('X-Guest-Cart')
+        if guest_cart:
+            merge_guest_cart(guest_cart, serializer.user)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 class RegisterView(generics.CreateAPIView):
     """User registration view."""
     serializer_class = RegisterSerializer